@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""benchmarks
+
+Browser-free benchmarks for sda. Run with ``pytest benchmarks``.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
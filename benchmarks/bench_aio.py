@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_aio
+
+Wall time of the same journey run by N :mod:`sda.aio` sessions at once on one event loop, against the local W3C
+stand-in server. With per-command latency dominating, N sessions should take about as long as one.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import asyncio
+import pytest
+from selenium.webdriver.common.by import By
+from sda.aio import AsyncWebDriver, ConnectionPool, Page, structures
+from benchmarks.fakedriver import BASE_URL
+from benchmarks.server import StandInServer
+
+SESSIONS = (1, 10, 50)
+
+
+class AsyncIndexPage(Page):
+    """Async page model of benchmarks/fixtures/index.html"""
+
+    def __init__(self, web_driver):
+
+        super(AsyncIndexPage, self).__init__(web_driver, '/')
+
+        self.header = structures.Text(web_driver, By.XPATH, '//*[@data-qa-id="header"]')
+        self.link = structures.Link(web_driver, By.XPATH, '//*[@data-qa-id="link"]')
+        self.multiple = structures.Select(web_driver, By.XPATH, '//*[@data-qa-id="multiple"]')
+
+
+@pytest.fixture(scope='module')
+def server(request):
+
+    with StandInServer(latency=request.config.getoption('--sda-latency') / 1000.0) as stand_in:
+        yield stand_in
+
+
+async def journey(pool):
+    """Open the index, read a few values, follow the link"""
+
+    async with AsyncWebDriver(pool, {'browserName': 'standin'}) as driver:
+
+        await driver.get(BASE_URL + '/')
+        page = AsyncIndexPage(driver)
+
+        await page.header.text()
+        await page.link.get_attribute('href')
+        await page.multiple.selected_options()
+        await page.link.click()
+
+        return sum(driver.commands.values())
+
+
+async def fleet(url, sessions):
+
+    pool = ConnectionPool(url, maxsize=sessions)
+
+    try:
+        return await asyncio.gather(*(journey(pool) for _ in range(sessions)))
+
+    finally:
+        pool.close()
+
+
+@pytest.mark.parametrize('sessions', SESSIONS)
+def bench_aio_sessions(server, benchmark, sessions):
+
+    commands = benchmark.pedantic(lambda: asyncio.run(fleet(server.url, sessions)), rounds=3, iterations=1)
+
+    benchmark.extra_info['commands'] = sum(commands)
+    assert len(commands) == sessions
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_broker
+
+Wall time of suites sharing a small stand-in grid through :class:`sda.broker.SessionBroker`. The grid rejects sessions
+past its slots, so a run with no rejections shows the broker queued locally, and the wait of the small suite shows
+whether it was starved by the large one.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+from selenium import webdriver
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from sda.broker import SessionBroker, grid_slots
+from benchmarks.bench_roundtrips import IndexPage
+from benchmarks.fakedriver import BASE_URL
+from benchmarks.server import StandInServer
+
+SLOTS = 3
+SUITES = {'large': 12, 'small': 3}
+
+
+@pytest.fixture
+def server(request):
+
+    # Selenium 3 hands urllib3 a sentinel timeout by default, which urllib3 2 rejects
+    RemoteConnection.set_timeout(30)
+
+    with StandInServer(latency=request.config.getoption('--sda-latency') / 1000.0, slots=SLOTS) as stand_in:
+        yield stand_in
+
+    RemoteConnection.reset_timeout()
+
+
+def remote(server):
+    return lambda: webdriver.Remote(server.url, desired_capabilities={'browserName': 'standin'})
+
+
+def run(broker, jobs):
+    """Run every suite's jobs at once, the large suite queued first, and return the most sessions each suite held"""
+
+    lock = threading.Lock()
+    held = dict((suite, 0) for suite in jobs)
+    peak = dict(held)
+
+    def job(suite):
+
+        with broker.session(suite, timeout=60) as driver:
+
+            with lock:
+                held[suite] += 1
+                peak[suite] = max(peak[suite], held[suite])
+
+            driver.get(BASE_URL + '/')
+            IndexPage(driver).header.text()
+
+            with lock:
+                held[suite] -= 1
+
+    with ThreadPoolExecutor(max_workers=sum(jobs.values())) as executor:
+        list(executor.map(job, [suite for suite in jobs for _ in range(jobs[suite])]))
+
+    return peak
+
+
+def bench_broker_suites(server, benchmark):
+
+    broker = SessionBroker(remote(server), grid_url=server.url, caps={'large': 2})
+    peak = benchmark.pedantic(lambda: run(broker, SUITES), rounds=3, iterations=1)
+    wait = dict((suite, broker._waits[suite].total / broker._waits[suite].count) for suite in SUITES)
+
+    benchmark.extra_info.update(('wait_' + suite, round(seconds, 4)) for suite, seconds in wait.items())
+    assert broker.capacity == SLOTS
+    assert server.rejected == 0 and server.peak <= SLOTS
+    assert peak['large'] <= 2
+    assert not broker.depth and not broker.active
+    assert 'sda_broker_queue_depth' in broker.render()
+
+
+def bench_broker_retry(server, benchmark):
+
+    # Twice the grid's slots: sessions past them are refused and retried until a slot frees up
+    broker = SessionBroker(remote(server), capacity=SLOTS * 2, retries=20, backoff=0.01, max_backoff=0.05)
+    benchmark.pedantic(lambda: run(broker, {'default': SLOTS * 4}), rounds=1, iterations=1)
+
+    benchmark.extra_info['retries'] = broker._retried['default']
+    assert broker._created['default'] == SLOTS * 4
+    assert server.rejected == broker._retried['default'] > 0
+    assert grid_slots(server.url) == {'total': SLOTS, 'free': SLOTS}
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_definition
+
+Cost of moving a page model between processes with :mod:`sda.definition`: defining a page, pickling its definition,
+and unpickling and binding it to a driver, next to building the page through its constructor.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pickle
+from sda.definition import PageDef, define
+from benchmarks.bench_roundtrips import IndexPage
+
+
+def bench_page_build(micro, driver):
+    micro(IndexPage, driver)
+
+
+def bench_page_define(micro, driver):
+    micro(define, IndexPage(driver))
+
+
+def bench_page_def_pickle(micro):
+    micro(pickle.dumps, PageDef.of(IndexPage), pickle.HIGHEST_PROTOCOL)
+
+
+def bench_page_def_bind(micro, driver):
+
+    data = pickle.dumps(PageDef.of(IndexPage), pickle.HIGHEST_PROTOCOL)
+
+    micro(lambda: pickle.loads(data).bind(driver))
+    assert pickle.loads(data).bind(driver).header.text() == 'Example Domain'
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_locators
+
+Micro-benchmarks for the pure-Python locator paths: normalize, join, Locators.is_valid, the URL pattern behind
+Page.in_view and structures.TYPES lookups. No driver is involved.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pytest
+from selenium.webdriver.common.by import By
+from sda import Locators
+from sda.element import join, normalize
+from sda.page import url_pattern
+from sda.structures import TYPES
+
+CSS_SELECTORS = {
+    'simple': 'h1',
+    'class': 'div.container .item',
+    'attribute': 'form[data-qa-id="login"] input[type="text"][name="username"]',
+    'complex': 'div.container > ul[data-qa-id="items"] li.item:nth-child(2n+1):not(.disabled) ~ li a[href^="/"]',
+}
+
+LOCATORS = [
+    (By.CLASS_NAME, 'btn-primary'),
+    (By.ID, 'username'),
+    (By.LINK_TEXT, 'More information...'),
+    (By.NAME, 'password'),
+    (By.PARTIAL_LINK_TEXT, 'More'),
+    (By.TAG_NAME, 'button'),
+    (By.XPATH, '//div[@data-qa-id="container"]//p[2]/a'),
+]
+
+URL_PATHS = ['/', '/users/:id', '/orgs/:org/repos/:repo/pulls/:number/files']
+
+
+def deep_chain(depth):
+    """Returns a join chain of depth locators, mixing strategies"""
+
+    return [LOCATORS[index % len(LOCATORS)] for index in range(depth)]
+
+
+def many_locators(count):
+    """Returns an instance of a Locators class with count locators"""
+
+    attributes = dict(('LOCATOR_{}'.format(index), (By.XPATH, '//*[@data-qa-id="element.{}"]'.format(index)))
+                      for index in range(count))
+
+    return type(str('ManyLocators'), (Locators,), attributes)()
+
+
+@pytest.mark.parametrize('locator', LOCATORS, ids=[locator[0].replace(' ', '_') for locator in LOCATORS])
+def bench_normalize(micro, locator):
+    micro(normalize, *locator)
+
+
+@pytest.mark.parametrize('name', sorted(CSS_SELECTORS))
+def bench_normalize_css(micro, name):
+    micro(normalize, By.CSS_SELECTOR, CSS_SELECTORS[name])
+
+
+@pytest.mark.parametrize('depth', [2, 8, 32])
+def bench_join(micro, depth):
+    micro(join, *deep_chain(depth))
+
+
+def bench_join_css(micro):
+    micro(join, *[(By.CSS_SELECTOR, CSS_SELECTORS[name]) for name in sorted(CSS_SELECTORS)])
+
+
+def bench_is_valid(micro):
+    micro(lambda: [Locators.is_valid(*locator) for locator in LOCATORS])
+
+
+def bench_locators_as_dict(micro):
+    micro(many_locators(500).as_dict)
+
+
+@pytest.mark.parametrize('url_path', URL_PATHS)
+def bench_url_pattern(micro, url_path):
+    micro(url_pattern, url_path)
+
+
+def bench_types_lookup(micro):
+    micro(lambda: [TYPES.get(name) for name in ('button', 'dropdown', 'inputtext', 'multiselect', 'unknown')])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_remote
+
+The same operations as :mod:`benchmarks.bench_roundtrips`, sent over HTTP by a real ``webdriver.Remote`` to the local
+W3C stand-in server. In W3C mode Selenium turns get_attribute and is_displayed into atom scripts, so round trips and
+wall time here are what a W3C browser would see.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pytest
+from selenium import webdriver
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+from benchmarks.bench_roundtrips import FormPage, IndexPage, reload_page
+from benchmarks.fakedriver import BASE_URL
+from benchmarks.server import StandInServer
+
+
+@pytest.fixture(scope='module')
+def server(request):
+
+    # Selenium 3 hands urllib3 a sentinel timeout by default, which urllib3 2 rejects
+    RemoteConnection.set_timeout(30)
+
+    with StandInServer(latency=request.config.getoption('--sda-latency') / 1000.0) as stand_in:
+        yield stand_in
+
+    RemoteConnection.reset_timeout()
+
+
+@pytest.fixture
+def driver(server):
+    """Remote web driver on the index fixture"""
+
+    web_driver = webdriver.Remote(server.url, desired_capabilities={'browserName': 'standin'})
+    web_driver.get(BASE_URL + '/')
+
+    yield web_driver
+
+    web_driver.quit()
+
+
+@pytest.fixture
+def executor(server, driver):
+    return server.sessions[driver.session_id]
+
+
+@pytest.fixture
+def page(driver):
+    return IndexPage(driver)
+
+
+def bench_remote_exists(page, measure):
+    measure(page.header.exists)
+
+
+def bench_remote_exists_missing(page, measure):
+    measure(page.banner.exists)
+
+
+def bench_remote_text(page, measure):
+    measure(page.header.text)
+
+
+def bench_remote_attribute(page, measure):
+    measure(lambda: page.link.href)
+
+
+def bench_remote_options(page, measure):
+    measure(page.multiple.options)
+
+
+def bench_remote_click(page, driver, measure):
+    measure(page.button.click, setup=reload_page(driver))
+
+
+def bench_remote_dropdown_expand(page, driver, measure):
+    measure(page.dropdown.expand, setup=reload_page(driver))
+
+
+def bench_remote_navigate_to(driver, measure):
+    measure(FormPage(driver).navigate_to, setup=reload_page(driver))
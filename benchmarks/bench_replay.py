@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_replay
+
+sda's own Python overhead for a whole journey: the journey is recorded once against the fake driver and replayed as
+fast as possible, so the wall time holds no browser or transport latency.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pytest
+from sda.replay import ReplayDriver, record
+from benchmarks.bench_roundtrips import FormPage, IndexPage
+from benchmarks.fakedriver import BASE_URL, FakeWebDriver
+
+
+def journey(web_driver):
+    """Read, expand, click and navigate across both fixture pages"""
+
+    web_driver.get(BASE_URL + '/')
+    page = IndexPage(web_driver)
+
+    page.header.text()
+    page.multiple.options()
+    page.link.href
+    page.banner.exists()
+    page.dropdown.expand()
+    page.button.click()
+    FormPage(web_driver).navigate_to()
+
+
+@pytest.fixture(scope='module')
+def recording(tmpdir_factory):
+
+    path = str(tmpdir_factory.mktemp('replay').join('journey.sda.gz'))
+    web_driver = FakeWebDriver()
+
+    with record(web_driver, path):
+        journey(web_driver)
+
+    web_driver.quit()
+
+    return path
+
+
+def bench_replay_journey(recording, benchmark):
+
+    drivers = []
+
+    def setup():
+        drivers[:] = [ReplayDriver(recording)]
+
+    benchmark.pedantic(lambda: journey(drivers[0]), setup=setup, rounds=50, iterations=1)
+    benchmark.extra_info['commands'] = sum(drivers[0].commands.values())
+
+    assert drivers[0].command_executor.remaining == 0
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_roundtrips
+
+Round trips and wall time for sda's public operations against the fake driver.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pytest
+from selenium.webdriver.common.by import By
+from sda import Page, structures, wait_all
+from sda.shortcuts import generate_elements
+from benchmarks.fakedriver import BASE_URL
+
+
+class IndexPage(Page):
+    """Page model of benchmarks/fixtures/index.html"""
+
+    def __init__(self, web_driver):
+
+        super(IndexPage, self).__init__(web_driver, '/')
+
+        self.header = structures.Text(web_driver, By.XPATH, '//*[@data-qa-id="header"]')
+        self.banner = structures.Text(web_driver, By.XPATH, '//*[@data-qa-id="missing.banner"]')
+        self.link = structures.Link(web_driver, By.XPATH, '//*[@data-qa-id="link"]')
+        self.button = structures.Button(web_driver, By.XPATH, '//*[@data-qa-id="button"]')
+        self.single = structures.Select(web_driver, By.XPATH, '//*[@data-qa-id="single"]')
+        self.multiple = structures.Select(web_driver, By.XPATH, '//*[@data-qa-id="multiple"]')
+        self.dropdown = structures.Dropdown(web_driver, By.XPATH, '//*[@data-qa-id="dropdown"]')
+        self.multiselect = structures.MultiSelect(web_driver, By.XPATH, '//*[@data-qa-id="multiselect"]')
+        self.form = structures.Form(web_driver, By.XPATH, '//*[@data-qa-id="form"]')
+
+    @generate_elements(structures.Text, (By.XPATH, '//li[@class="item"]'))
+    def items(self):
+        """All list items"""
+
+        return self.driver
+
+
+class FormPage(Page):
+    """Page model of benchmarks/fixtures/form.html"""
+
+    def __init__(self, web_driver):
+
+        super(FormPage, self).__init__(web_driver, '/form')
+
+        self.submit = structures.Button(web_driver, By.XPATH, '//*[@data-qa-id="submit"]')
+
+
+@pytest.fixture
+def page(driver):
+    return IndexPage(driver)
+
+
+def reload_page(driver):
+    """Returns a benchmark setup that reloads the index fixture"""
+
+    return lambda: driver.get(BASE_URL + '/')
+
+
+def bench_exists(page, measure):
+    measure(page.header.exists)
+
+
+def bench_exists_missing(page, measure):
+    measure(page.banner.exists)
+
+
+def bench_exists_missing_implicit_wait(page, measure):
+
+    page.wait_implicitly(10)
+    measure(page.banner.exists)
+
+
+@pytest.mark.parametrize('method', ['click', 'double_click', 'hover'])
+def bench_click_mixin(page, driver, measure, method):
+    measure(getattr(page.button, method), setup=reload_page(driver))
+
+
+SELECT_CASES = [
+    ('deselect_all', ()),
+    ('deselect_by_index', (1,)),
+    ('deselect_by_text', ('Option B',)),
+    ('deselect_by_value', ('b',)),
+    ('options', ()),
+    ('selected_first', ()),
+    ('selected_options', ()),
+    ('select_by_index', (2,)),
+    ('select_by_text', ('Option C',)),
+    ('select_by_value', ('c',)),
+]
+
+
+@pytest.mark.parametrize('method, args', SELECT_CASES, ids=[case[0] for case in SELECT_CASES])
+def bench_select_mixin(page, driver, measure, method, args):
+    measure(getattr(page.multiple, method), *args, setup=reload_page(driver))
+
+
+@pytest.mark.parametrize('method', ['text', 'visible_text'])
+def bench_text_mixin(page, measure, method):
+    measure(getattr(page.header, method))
+
+
+def bench_attribute(page, measure):
+    measure(lambda: page.link.href)
+
+
+def bench_dropdown_expand(page, driver, measure):
+    measure(page.dropdown.expand, setup=reload_page(driver))
+
+
+def bench_multiselect_select_by_index(page, driver, measure):
+    measure(page.multiselect.select_by_index, 1, setup=reload_page(driver))
+
+
+def bench_form_get_field(page, measure):
+    measure(page.form.get_field, 'username')
+
+
+def bench_wait_all(page, measure):
+    measure(wait_all, [page.header, page.link, page.button, page.single, page.multiple, page.form])
+
+
+def bench_navigate_to(driver, measure):
+    measure(FormPage(driver).navigate_to, setup=reload_page(driver))
+
+
+def bench_navigate_to_in_view(page, measure):
+    measure(page.navigate_to)
+
+
+def bench_generate_elements(page, measure):
+    measure(page.items)
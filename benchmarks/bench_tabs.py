@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.bench_tabs
+
+Wall time of a read-only sweep through :meth:`sda.site.Site.tabs` on one session, against the fake driver with a
+simulated page load time. With one window every load is waited for in turn; with N windows up to N loads overlap.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import pytest
+from sda import Site
+from benchmarks.bench_roundtrips import IndexPage
+from benchmarks.fakedriver import BASE_URL, FakeWebDriver
+
+LOAD_TIME = 0.02
+PAGES = 24
+WINDOWS = (1, 2, 4)
+
+
+class IndexSite(Site):
+    """Site model of the index fixture"""
+
+    def __init__(self, web_driver):
+
+        super(IndexSite, self).__init__(web_driver)
+        self.index = IndexPage(web_driver)
+
+
+@pytest.mark.parametrize('windows', WINDOWS)
+def bench_tabs_sweep(request, benchmark, windows):
+
+    driver = FakeWebDriver(latency=request.config.getoption('--sda-latency') / 1000.0, load_time=LOAD_TIME)
+    driver.get(BASE_URL + '/')
+    site = IndexSite(driver)
+
+    def sweep():
+
+        with site.tabs(windows) as tabs:
+            return list(tabs.map(lambda page: page.header.text(), site.index, [()] * PAGES)), tabs.stats
+
+    results, stats = benchmark.pedantic(sweep, rounds=3, iterations=1)
+
+    benchmark.extra_info.update(stats)
+    assert [text for _, text in results] == ['Example Domain'] * PAGES
+    assert driver.window_handles == ['main']
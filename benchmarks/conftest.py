@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.conftest
+
+Fixtures for the round-trip benchmarks. Every benchmark records the number of WebDriver commands a single cold call
+sends and fails if that number grew past benchmarks/baseline.json. Wall time is reported by pytest-benchmark and can
+be gated with its own ``--benchmark-compare-fail`` option.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import json
+import os
+import pytest
+from benchmarks.fakedriver import BASE_URL, FakeWebDriver
+
+# Python 3.4+. Without it micro benchmarks only record their wall time
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+ALLOCATION_CALLS = 1000
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def pytest_addoption(parser):
+
+    group = parser.getgroup('sda', 'sda benchmarks')
+    group.addoption('--sda-latency', type=float, default=0.0,
+                    help='Milliseconds of latency the fake driver adds to every command')
+    group.addoption('--sda-update-baseline', action='store_true', default=False,
+                    help='Rewrite benchmarks/baseline.json with the measured round trips')
+
+
+def pytest_configure(config):
+
+    config.sda_allocations = {}
+    config.sda_measured = {}
+
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as baseline:
+            config.sda_baseline = json.load(baseline)
+
+    else:
+        config.sda_baseline = {}
+
+
+def pytest_sessionfinish(session):
+
+    config = session.config
+
+    if config.getoption('--sda-update-baseline') and config.sda_measured:
+
+        baseline = dict(config.sda_baseline)
+        baseline.update(config.sda_measured)
+
+        with open(BASELINE, 'w') as output:
+            json.dump(baseline, output, indent=2, sort_keys=True)
+            output.write('\n')
+
+
+def pytest_terminal_summary(terminalreporter):
+
+    # The config argument is only passed from pytest 4.2
+    config = terminalreporter.config
+
+    measured = getattr(config, 'sda_measured', {})
+
+    if measured:
+
+        terminalreporter.section('sda round trips')
+        width = max(len(name) for name in measured)
+
+        for name in sorted(measured):
+
+            expected = config.sda_baseline.get(name, {}).get('round_trips')
+            trips = measured[name]['round_trips']
+            delta = '' if expected is None or expected == trips else ' (baseline {})'.format(expected)
+            terminalreporter.write_line('{}  {:>4}{}'.format(name.ljust(width), trips, delta))
+
+    allocations = getattr(config, 'sda_allocations', {})
+
+    if allocations:
+
+        terminalreporter.section('sda allocations (peak bytes per call, bytes retained after {} calls)'.format(
+            ALLOCATION_CALLS))
+        width = max(len(name) for name in allocations)
+
+        for name in sorted(allocations):
+            terminalreporter.write_line('{}  {:>8}  {:>8}'.format(name.ljust(width), *allocations[name]))
+
+
+@pytest.fixture
+def driver(request):
+    """Fake web driver on the index fixture"""
+
+    web_driver = FakeWebDriver(latency=request.config.getoption('--sda-latency') / 1000.0)
+    web_driver.get(BASE_URL + '/')
+    web_driver.reset_counts()
+
+    yield web_driver
+
+    web_driver.quit()
+
+
+@pytest.fixture
+def executor(driver):
+    """Executor whose command counters :func:`measure` reads"""
+
+    return driver.command_executor
+
+
+@pytest.fixture
+def measure(request, executor, benchmark):
+    """Count the round trips of one cold call, gate them against the baseline, then benchmark the call
+
+    ``setup`` runs before the counted call and before every benchmark round, outside of the timing.
+    """
+
+    def _measure(func, *args, **kwargs):
+
+        setup = kwargs.pop('setup', None)
+        name = request.node.name
+
+        if setup:
+            setup()
+
+        executor.commands.clear()
+        result = func(*args)
+
+        measured = {'round_trips': executor.round_trips, 'commands': dict(executor.commands)}
+        request.config.sda_measured[name] = measured
+        benchmark.extra_info.update(measured)
+
+        if setup:
+            benchmark.pedantic(func, args=args, setup=setup, rounds=20, iterations=1)
+
+        else:
+            benchmark(func, *args)
+
+        expected = request.config.sda_baseline.get(name, {}).get('round_trips')
+
+        if expected is not None and not request.config.getoption('--sda-update-baseline'):
+            assert measured['round_trips'] <= expected, \
+                '{} sends {} commands, baseline is {}: {}'.format(name, measured['round_trips'], expected,
+                                                                  measured['commands'])
+
+        return result
+
+    return _measure
+
+
+@pytest.fixture
+def micro(request, benchmark):
+    """Benchmark a pure-Python call and record its memory use with tracemalloc
+
+    Records the peak bytes traced during a single call and the bytes still held after a thousand calls, which catches
+    caches that grow without bound. Memory is not recorded before Python 3.4.
+    """
+
+    def _micro(func, *args):
+
+        if tracemalloc is None:
+            return benchmark(func, *args)
+
+        tracemalloc.start()
+
+        try:
+
+            # reset_peak is Python 3.9+. Clearing the traces also resets the peak
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+            else:
+                tracemalloc.clear_traces()
+
+            start = tracemalloc.get_traced_memory()[0]
+            result = func(*args)
+            peak = tracemalloc.get_traced_memory()[1] - start
+
+            for _ in range(ALLOCATION_CALLS):
+                func(*args)
+
+            retained = tracemalloc.get_traced_memory()[0] - start
+
+        finally:
+            tracemalloc.stop()
+
+        benchmark.extra_info.update(peak_bytes=peak, retained_bytes=retained)
+        request.config.sda_allocations[request.node.name] = (peak, retained)
+        benchmark(func, *args)
+
+        return result
+
+    return _micro
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.fakedriver
+
+A scriptable, browser-free WebDriver for measuring how many round trips sda sends. It is the
+:mod:`sda.browserless` driver serving fixture pages from memory instead of over HTTP, so every command costs only the
+configured latency.
+
+.. code-block:: python
+
+    from benchmarks.fakedriver import FakeWebDriver, load_fixtures
+
+    driver = FakeWebDriver(load_fixtures(), latency=0.002)
+    driver.get('http://sda.test/')
+
+    Text(driver, By.XPATH, '//h1').text()
+    driver.round_trips  # 1
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from __future__ import unicode_literals
+from collections import Counter
+import glob
+import os
+import time
+import weakref
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+from sda import scripts
+from sda.browserless import BrowserlessExecutor, Document
+
+try:
+    from urlparse import urlparse
+except (ImportError, ModuleNotFoundError):
+    from urllib.parse import urlparse
+
+__all__ = ['FakeExecutor', 'FakeWebDriver', 'load_fixtures']
+
+BASE_URL = 'http://sda.test'
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+NOT_FOUND = '<html><head><title>Not Found</title></head><body><h1>Not Found</h1></body></html>'
+
+
+def load_fixtures(directory=FIXTURES):
+    """Returns every .html file in a directory keyed by URL path. index.html is served at '/'
+
+    :param str directory: Fixture directory
+    :return: Dictionary of URL path to HTML
+    :rtype: dict
+    """
+
+    pages = {}
+
+    for path in glob.glob(os.path.join(directory, '*.html')):
+
+        name = os.path.splitext(os.path.basename(path))[0]
+
+        with open(path, 'rb') as fixture:
+            pages['/' if name == 'index' else '/' + name] = fixture.read().decode('utf-8')
+
+    return pages
+
+
+class FakeDocument(Document):
+    """The FakeDocument implementation
+
+    Elements with a ``data-fake-toggle`` xpath toggle the ``hidden`` attribute of the matching nodes when clicked,
+    standing in for the page's own JavaScript.
+    """
+
+    def click(self, node):
+
+        for target in self.find('xpath', node.get('data-fake-toggle')) if node.get('data-fake-toggle') else []:
+
+            if target.get('hidden') is None:
+                target.set('hidden', '')
+
+            else:
+                del target.attrib['hidden']
+
+        return super(FakeDocument, self).click(node)
+
+
+class FakeExecutor(BrowserlessExecutor):
+    """The FakeExecutor implementation
+
+    Stands in for selenium's RemoteConnection. Each command is counted, delayed by ``latency`` seconds and answered
+    from the current :class:`FakeDocument`. Handlers can be replaced per command name with :meth:`script`, and
+    sda-style scripts can be answered with :meth:`on_script`.
+
+    A page takes ``load_time`` seconds to load. ``get`` blocks for it, while a page loaded into another window through
+    ``scripts.OPEN_WINDOW`` only reads as ready to ``scripts.READY`` once that time has passed, as it would in a
+    browser loading it in the background.
+    """
+
+    document_class = FakeDocument
+
+    def __init__(self, pages=None, base_url=BASE_URL, latency=0.0, load_time=0.0):
+        """Fake command executor
+
+        :param dict pages: URL path to HTML source
+        :param str base_url: Scheme and host the pages are served from
+        :param float latency: Seconds to sleep for every command
+        :param float load_time: Seconds every page takes to load
+        """
+
+        super(FakeExecutor, self).__init__()
+
+        self.pages = pages if pages is not None else load_fixtures()
+        self.base_url = base_url
+        self.latency = latency
+        self.load_time = load_time
+        self.commands = Counter()
+
+        # Document to the time it finishes loading
+        self._ready_at = weakref.WeakKeyDictionary()
+
+        ready = self.scripts[scripts.READY]
+        self.on_script(scripts.READY, lambda doc, requested: ready(doc, requested) and
+                       time.time() >= self._ready_at.get(doc, 0))
+
+    @property
+    def round_trips(self):
+        """Total number of commands executed"""
+
+        return sum(self.commands.values())
+
+    def execute(self, command, params):
+        """Count and delay a command, then execute it
+
+        :param str command: Selenium command name
+        :param dict params: Command parameters
+        :return: Response
+        :rtype: dict
+        """
+
+        self.commands[command] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        response = super(FakeExecutor, self).execute(command, params)
+
+        if command == Command.NEW_SESSION:
+            response['sessionId'] = 'fake-session'
+
+        return response
+
+    def fetch(self, method, url, fields=None):
+        """Serve a fixture page, answering unknown paths with a Not Found document
+
+        :param str method: HTTP method
+        :param str url: Absolute URL
+        :param list fields: Form fields, ignored
+        :return: HTTP status, response headers, body
+        :rtype: tuple
+        """
+
+        path = urlparse(url).path or '/'
+
+        # Sent as UTF-8 bytes, so the page is decoded by its Content-Type charset as a fetched page is
+        return (200, {'Content-Type': 'text/html; charset=utf-8'}, self.pages[path].encode('utf-8')) \
+            if path in self.pages else (404, {}, NOT_FOUND)
+
+    def load(self, method, url, fields=None, remember=True):
+        """Load a page, finishing ``load_time`` seconds from now
+
+        :param str method: HTTP method
+        :param str url: Absolute URL
+        :param list fields: Form fields, ignored
+        :param bool remember: Add the final URL to the history
+        :return:
+        """
+
+        super(FakeExecutor, self).load(method, url, fields, remember)
+        self._ready_at[self.document] = time.time() + self.load_time
+
+    def navigate(self, url):
+        """Load a URL, blocking until it finished loading the way WebDriver.get does
+
+        :param str url: Absolute URL
+        :return:
+        """
+
+        super(FakeExecutor, self).navigate(url)
+
+        if self.load_time:
+            time.sleep(self.load_time)
+
+
+class FakeWebDriver(WebDriver):
+    """The FakeWebDriver implementation
+
+    A selenium WebDriver bound to a :class:`FakeExecutor`. Speaks the JSON wire protocol, so element commands such as
+    get_attribute are sent as single commands rather than atom scripts.
+    """
+
+    def __init__(self, pages=None, base_url=BASE_URL, latency=0.0, load_time=0.0):
+        """Fake web driver
+
+        :param dict pages: URL path to HTML source. Defaults to benchmarks/fixtures
+        :param str base_url: Scheme and host the pages are served from
+        :param float latency: Seconds to sleep for every command
+        :param float load_time: Seconds every page takes to load
+        """
+
+        super(FakeWebDriver, self).__init__(command_executor=FakeExecutor(pages, base_url, latency, load_time),
+                                            desired_capabilities={})
+
+    @property
+    def commands(self):
+        """Counter of executed commands by name"""
+
+        return self.command_executor.commands
+
+    @property
+    def latency(self):
+        """Seconds slept for every command"""
+
+        return self.command_executor.latency
+
+    @latency.setter
+    def latency(self, value):
+        self.command_executor.latency = value
+
+    @property
+    def round_trips(self):
+        """Total number of commands executed"""
+
+        return self.command_executor.round_trips
+
+    def reset_counts(self):
+        """Reset the command counters
+
+        :return:
+        """
+
+        self.command_executor.commands.clear()
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""benchmarks.server
+
+A browser-free W3C WebDriver remote end. It speaks enough of the protocol for the commands sda sends, answers them
+from lxml-parsed fixture pages (see :mod:`benchmarks.fakedriver`) and adds a configurable latency to every command, so
+sda can run end-to-end against a real ``webdriver.Remote`` with realistic network costs.
+
+Run it standalone::
+
+    python -m benchmarks.server --port 4444 --latency 5
+
+With ``--slots N`` it behaves like a one-node Selenium Grid: sessions past N are refused and ``/status`` lists the
+slots. Element references are sent with the W3C key only, as W3C browsers do, and ``--chunked`` sends responses with
+chunked transfer encoding.
+
+or start it in-process:
+
+.. code-block:: python
+
+    from selenium import webdriver
+    from benchmarks.server import StandInServer
+
+    with StandInServer(latency=0.005) as server:
+
+        driver = webdriver.Remote(server.url, desired_capabilities={'browserName': 'standin'})
+        driver.get('http://sda.test/')
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from __future__ import print_function, unicode_literals
+import argparse
+import itertools
+import json
+import re
+import threading
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorCode
+from sda.waits import GET_TIMEOUTS
+from benchmarks.fakedriver import FIXTURES, FakeExecutor, load_fixtures
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except (ImportError, ModuleNotFoundError):
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+__all__ = ['StandInServer']
+
+SESSION = '/session/(?P<sessionId>[^/]+)'
+ELEMENT = SESSION + '/element/(?P<id>[^/]+)'
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+# (HTTP method, path, command) for every endpoint served
+ROUTES = [
+    ('POST', '/session', Command.NEW_SESSION),
+    ('DELETE', SESSION, Command.QUIT),
+    ('GET', '/status', Command.STATUS),
+    ('GET', SESSION + '/timeouts', GET_TIMEOUTS),
+    ('POST', SESSION + '/timeouts', Command.SET_TIMEOUTS),
+    ('POST', SESSION + '/url', Command.GET),
+    ('GET', SESSION + '/url', Command.GET_CURRENT_URL),
+    ('POST', SESSION + '/refresh', Command.REFRESH),
+    ('GET', SESSION + '/title', Command.GET_TITLE),
+    ('GET', SESSION + '/source', Command.GET_PAGE_SOURCE),
+    ('GET', SESSION + '/window', Command.W3C_GET_CURRENT_WINDOW_HANDLE),
+    ('POST', SESSION + '/window', Command.SWITCH_TO_WINDOW),
+    ('DELETE', SESSION + '/window', Command.CLOSE),
+    ('GET', SESSION + '/window/handles', Command.W3C_GET_WINDOW_HANDLES),
+    ('POST', SESSION + '/execute/sync', Command.W3C_EXECUTE_SCRIPT),
+    ('POST', SESSION + '/element', Command.FIND_ELEMENT),
+    ('POST', SESSION + '/elements', Command.FIND_ELEMENTS),
+    ('POST', ELEMENT + '/element', Command.FIND_CHILD_ELEMENT),
+    ('POST', ELEMENT + '/elements', Command.FIND_CHILD_ELEMENTS),
+    ('GET', ELEMENT + '/attribute/(?P<name>[^/]+)', Command.GET_ELEMENT_ATTRIBUTE),
+    ('GET', ELEMENT + '/property/(?P<name>[^/]+)', Command.GET_ELEMENT_PROPERTY),
+    ('GET', ELEMENT + '/css/(?P<propertyName>[^/]+)', Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY),
+    ('GET', ELEMENT + '/text', Command.GET_ELEMENT_TEXT),
+    ('GET', ELEMENT + '/name', Command.GET_ELEMENT_TAG_NAME),
+    ('GET', ELEMENT + '/displayed', Command.IS_ELEMENT_DISPLAYED),
+    ('GET', ELEMENT + '/selected', Command.IS_ELEMENT_SELECTED),
+    ('GET', ELEMENT + '/enabled', Command.IS_ELEMENT_ENABLED),
+    ('POST', ELEMENT + '/click', Command.CLICK_ELEMENT),
+    ('POST', ELEMENT + '/clear', Command.CLEAR_ELEMENT),
+    ('POST', ELEMENT + '/value', Command.SEND_KEYS_TO_ELEMENT),
+    ('POST', SESSION + '/actions', Command.W3C_ACTIONS),
+    ('DELETE', SESSION + '/actions', Command.W3C_CLEAR_ACTIONS),
+]
+
+# W3C error name to HTTP status
+HTTP_STATUS = {
+    'invalid argument': 400,
+    'invalid selector': 400,
+    'invalid session id': 404,
+    'no such element': 404,
+    'no such window': 404,
+    'stale element reference': 404,
+    'unknown command': 404,
+}
+
+
+def error_name(status):
+    """Returns the W3C error name for a JSON wire status code
+
+    :param int status: JSON wire status code
+    :return: W3C error name
+    :rtype: str
+    """
+
+    for name in dir(ErrorCode):
+
+        code = getattr(ErrorCode, name)
+
+        if isinstance(code, list) and code[0] == status:
+            return code[1]
+
+    return 'unknown error'
+
+
+def w3c(value):
+    """Returns a response value with the JSON wire 'ELEMENT' key dropped from element references
+
+    :param value: Response value
+    :return: Response value
+    """
+
+    if isinstance(value, dict):
+
+        if ELEMENT_KEY in value:
+            return {ELEMENT_KEY: value[ELEMENT_KEY]}
+
+        return dict((key, w3c(item)) for key, item in value.items())
+
+    if isinstance(value, list):
+        return [w3c(item) for item in value]
+
+    return value
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """HTTP handler routing requests to :meth:`StandInServer.dispatch`"""
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body go out in separate writes. With Nagle's algorithm on, a keep-alive client's delayed ACK holds
+    # the body back ~40 ms
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, payload = self.server.dispatch(self.command, self.path, body)
+        data = json.dumps(payload).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+
+        if self.server.chunked:
+
+            # Two chunks, so a client must join them
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            for chunk in (data[:len(data) // 2], data[len(data) // 2:]):
+
+                if chunk:
+                    self.wfile.write('{:x}\r\n'.format(len(chunk)).encode('latin-1') + chunk + b'\r\n')
+
+            self.wfile.write(b'0\r\n\r\n')
+
+        else:
+
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    do_DELETE = do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingMixIn, HTTPServer):
+    """The StandInServer implementation
+
+    Every session gets its own :class:`benchmarks.fakedriver.FakeExecutor`, which also holds the command counters for
+    that session (``server.sessions[driver.session_id].commands``).
+    """
+
+    daemon_threads = True
+    # Room for many sessions connecting at once, the socketserver default of 5 drops SYNs under a burst
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), pages=None, latency=0.0, slots=None, chunked=False):
+        """W3C WebDriver stand-in
+
+        :param tuple address: Host and port to listen on. Port 0 picks a free port
+        :param dict pages: URL path to HTML source. Defaults to benchmarks/fixtures
+        :param float latency: Seconds added to every command
+        :param int slots: Sessions allowed at once, like a Selenium Grid node. New sessions past it fail with 'session
+            not created', and /status lists the slots the way Grid 4 does. None for no limit
+        :param bool chunked: Send responses with chunked transfer encoding instead of a Content-Length
+        """
+
+        HTTPServer.__init__(self, address, StandInHandler)
+
+        self.pages = pages if pages is not None else load_fixtures()
+        self.latency = latency
+        self.slots = slots
+        self.chunked = chunked
+        self.sessions = {}
+        self.rejected = 0
+        self.peak = 0
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._routes = [(method, re.compile(path + '$'), command) for method, path, command in ROUTES]
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self):
+        """Remote end URL to hand to webdriver.Remote"""
+
+        return 'http://{}:{}'.format(*self.server_address[:2])
+
+    def dispatch(self, method, path, body):
+        """Execute a request, returning the HTTP status and JSON payload
+
+        :param str method: HTTP method
+        :param str path: Request path
+        :param bytes body: Request body
+        :return: HTTP status, payload
+        :rtype: tuple
+        """
+
+        path = path.split('?')[0].rstrip('/') or '/'
+
+        for route_method, pattern, command in self._routes:
+
+            match = pattern.match(path)
+
+            if match and route_method == method:
+                break
+
+        else:
+            return 404, {'value': {'error': 'unknown command', 'message': '{} {}'.format(method, path),
+                                   'stacktrace': ''}}
+
+        params = json.loads(body.decode('utf-8')) if body else {}
+        params.update(match.groupdict())
+
+        if command == Command.STATUS:
+            return 200, {'value': self._status()}
+
+        if command == Command.NEW_SESSION:
+            return self._new_session(params)
+
+        with self._lock:
+            executor = self.sessions.get(params.pop('sessionId'))
+
+        if executor is None:
+            return 404, {'value': {'error': 'invalid session id', 'message': 'No active session', 'stacktrace': ''}}
+
+        response = executor.execute(command, params)
+
+        if command == Command.QUIT:
+
+            with self._lock:
+                self.sessions = dict((key, value) for key, value in self.sessions.items() if value is not executor)
+
+        if response.get('status', 0):
+
+            error = error_name(response['status'])
+            value = {'error': error, 'stacktrace': '', 'message': response['value'].get('message', '')}
+
+            return HTTP_STATUS.get(error, 500), {'value': value}
+
+        return 200, {'value': w3c(response.get('value'))}
+
+    def start(self):
+        """Serve requests on a background thread
+
+        :return: self
+        :rtype: StandInServer
+        """
+
+        self._thread = threading.Thread(target=self.serve_forever, name='sda-standin')
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket
+
+        :return:
+        """
+
+        self.shutdown()
+        self.server_close()
+
+        if self._thread:
+            self._thread.join()
+
+    def _new_session(self, params):
+
+        executor = FakeExecutor(self.pages, latency=self.latency)
+        capabilities = executor.execute(Command.NEW_SESSION, params)['value']
+        capabilities.update(((params.get('capabilities') or {}).get('alwaysMatch') or {}))
+        session_id = 'standin-{}'.format(next(self._ids))
+
+        with self._lock:
+
+            if self.slots is not None and len(self.sessions) >= self.slots:
+
+                self.rejected += 1
+                return 500, {'value': {'error': 'session not created', 'stacktrace': '',
+                                       'message': 'No free slot among {}'.format(self.slots)}}
+
+            self.sessions[session_id] = executor
+            self.peak = max(self.peak, len(self.sessions))
+
+        return 200, {'value': {'sessionId': session_id, 'capabilities': capabilities}}
+
+    def _status(self):
+
+        if self.slots is None:
+            return {'ready': True, 'message': 'sda stand-in ready'}
+
+        with self._lock:
+            sessions = sorted(self.sessions)
+
+        slots = [{'stereotype': {'browserName': 'standin'},
+                  'session': {'sessionId': sessions[index]} if index < len(sessions) else None}
+                 for index in range(self.slots)]
+
+        return {'ready': len(sessions) < self.slots, 'message': 'sda stand-in grid',
+                'nodes': [{'availability': 'UP', 'slots': slots}]}
+
+
+def main(args=None):
+    """Command line entry point
+
+    :param list args: Command line arguments
+    :return:
+    """
+
+    parser = argparse.ArgumentParser(description='Browser-free W3C WebDriver stand-in for sda')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=4444)
+    parser.add_argument('--latency', type=float, default=0.0, help='Milliseconds added to every command')
+    parser.add_argument('--fixtures', default=FIXTURES, help='Directory of .html fixtures')
+    parser.add_argument('--slots', type=int, default=None, help='Sessions allowed at once, like a Grid node')
+    parser.add_argument('--chunked', action='store_true', help='Send responses with chunked transfer encoding')
+    options = parser.parse_args(args)
+
+    server = StandInServer((options.host, options.port), load_fixtures(options.fixtures), options.latency / 1000.0,
+                           options.slots, options.chunked)
+    print('sda stand-in listening on {}'.format(server.url))
+
+    try:
+        server.serve_forever()
+
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,10 +11,11 @@ from sda.element import Element
 from sda.locators import Locators
 from sda.page import Page
 from sda.site import Site
+from sda.waits import deadline, wait_all, wait_any
 
 __author__ = 'jlane'
 __email__ = 'jlane@fanthreesixty.com'
 __license__ = "MIT"
 __version__ = '1.0.3'
 
-__all__ = ['shortcuts', 'structures', 'Element', 'Locators', 'Page', 'Site']
+__all__ = ['shortcuts', 'structures', 'Element', 'Locators', 'Page', 'Site', 'deadline', 'wait_all', 'wait_any']
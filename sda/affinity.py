@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""sda.affinity
+
+Page affinity for test runs: which page each test targets, an order that keeps tests of the same page together, the
+xdist group each test belongs to, and the navigations a warm driver saves. Used by :mod:`sda.pytest_plugin`.
+
+A test targets a page through the ``sda_page`` marker, or through a fixture listed in the ``sda_page_fixtures`` ini
+option. The marker takes a url_path, or a Page class as ``page=`` (pytest takes a lone class argument for the thing
+being marked):
+
+.. code-block:: python
+
+    @pytest.mark.sda_page(page=LoginPage)
+    def test_remember_me(sda_page):
+        ...
+
+    @pytest.mark.sda_page('/users/:id', args=(42,))
+    def test_profile(sda_page):
+        ...
+
+.. code-block:: ini
+
+    [pytest]
+    sda_page_fixtures =
+        cart_page = /cart
+        login = myproject.pages.LoginPage
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import defaultdict
+import inspect
+import threading
+import time
+from six import string_types
+from sda.cache import dom_cache
+from sda.page import fill_path
+from sda.waits import limit_page_load
+
+try:
+    from urlparse import urljoin, urlparse
+except (ImportError, ModuleNotFoundError):
+    from urllib.parse import urljoin, urlparse
+
+__all__ = ['NavigationStats', 'group_name', 'marked_page', 'marker_page', 'navigate', 'order', 'page_key',
+           'page_marker', 'parse_fixtures', 'target_of']
+
+MARKER = 'sda_page'
+
+
+def marked_page(item):
+    """Returns the page of a test's sda_page marker
+
+    :param item: pytest test item
+    :return: Page class or url_path, or None without a marker
+    """
+
+    return marker_page(page_marker(item))
+
+
+def marker_page(marker):
+    """Returns the page an sda_page marker names
+
+    :param marker: sda_page marker, or None
+    :return: Page class or url_path, or None without a marker
+    """
+
+    if marker is None:
+        return None
+
+    return marker.args[0] if marker.args else marker.kwargs.get('page')
+
+
+def page_marker(item):
+    """Returns a test's sda_page marker
+
+    :param item: pytest test item
+    :return: Marker, or None without one
+    """
+
+    # get_closest_marker is new in pytest 3.6
+    if hasattr(item, 'get_closest_marker'):
+        return item.get_closest_marker(MARKER)
+
+    return item.get_marker(MARKER)
+
+
+def page_key(target):
+    """Returns the name tests of the same page share
+
+    :param target: Page class, Page instance or url_path
+    :return: Page key, ex. 'myproject.pages.LoginPage' or '/cart'
+    :rtype: str
+    """
+
+    if isinstance(target, string_types):
+        return target
+
+    cls = target if inspect.isclass(target) else type(target)
+
+    return '{}.{}'.format(cls.__module__, cls.__name__)
+
+
+def parse_fixtures(lines):
+    """Parse ``fixture = page`` lines
+
+    :param list lines: Lines of the sda_page_fixtures ini option
+    :return: Fixture name to page key
+    :rtype: dict
+    :raises ValueError: If a line is not ``fixture = page``
+    """
+
+    fixtures = {}
+
+    for line in lines:
+
+        name, separator, key = line.partition('=')
+
+        if not separator or not name.strip() or not key.strip():
+            raise ValueError('Expected "fixture = page" in sda_page_fixtures, got {!r}'.format(line))
+
+        fixtures[name.strip()] = key.strip()
+
+    return fixtures
+
+
+def target_of(item, fixtures=None):
+    """Returns the page key a test targets, from its sda_page marker or the first page fixture it uses
+
+    :param item: pytest test item
+    :param dict fixtures: Fixture name to page key
+    :return: Page key, or None if the test targets no known page
+    :rtype: str
+    """
+
+    target = marked_page(item)
+
+    if target is not None:
+        return page_key(target)
+
+    for name in getattr(item, 'fixturenames', ()):
+        if name in (fixtures or {}):
+            return fixtures[name]
+
+    return None
+
+
+def navigate(page, args=(), stats=None, base_url=None, fresh=False, key=None):
+    """Load a page unless the driver is already on its URL
+
+    Unlike :meth:`sda.page.Page.navigate_to`, a page already loaded is neither refreshed nor confused with another
+    page matching the same url_path template.
+
+    :param Page page: Page object
+    :param args: Values filling the page's url_path
+    :param NavigationStats stats: Stats to record the navigation, or its reuse, in
+    :param str base_url: Scheme and host to load the path from. Defaults to those of the current URL
+    :param bool fresh: True, to load the page even if the driver is on it
+    :param str key: Page key the stats are recorded under. Defaults to the page's class
+    :return: True, if the page was loaded
+    :rtype: bool
+    """
+
+    web_driver = page.driver
+    path = fill_path(page._url_path, args)
+    current = urlparse(web_driver.current_url)
+    base = urlparse(base_url) if base_url else current
+    key = key or page_key(page)
+
+    if not fresh and current.scheme in ('http', 'https') and (current.scheme, current.netloc, current.path) == \
+            (base.scheme, base.netloc, path):
+
+        if stats is not None:
+            stats.reused(key)
+
+        return False
+
+    start = time.time()
+
+    dom_cache(web_driver).invalidate()
+    limit_page_load(web_driver)
+    web_driver.get(urljoin(base_url or web_driver.current_url, path))
+
+    if stats is not None:
+        stats.navigated(key, time.time() - start)
+
+    return True
+
+
+def order(items, keys):
+    """Returns items with the tests of each page moved up to the first test of that page
+
+    The sort is stable: tests keep their relative order within a page, and tests without a page keep their place.
+
+    :param list items: Tests
+    :param list keys: Page key of each test, or None
+    :return: Reordered tests
+    :rtype: list
+    """
+
+    first = {}
+
+    for index, key in enumerate(keys):
+        if key is not None:
+            first.setdefault(key, index)
+
+    ranks = [(first[key] if key is not None else index, index) for index, key in enumerate(keys)]
+
+    return [items[index] for _, index in sorted(ranks)]
+
+
+def group_name(key, position, chunk=0):
+    """Returns the xdist group of a test, splitting large pages into chunks so they can spread over workers
+
+    :param str key: Page key
+    :param int position: Position of the test among the tests of its page
+    :param int chunk: Tests per group, or 0 to keep a page in one group
+    :return: Group name
+    :rtype: str
+    """
+
+    if chunk:
+        return 'sda:{}#{}'.format(key, position // chunk)
+
+    return 'sda:{}'.format(key)
+
+
+class NavigationStats(object):
+    """The NavigationStats implementation
+
+    Navigations made and reused per page. The time saved by a reused navigation is the mean time of the navigations
+    made to that page.
+    """
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._pages = defaultdict(lambda: {'navigations': 0, 'seconds': 0.0, 'reused': 0})
+
+    def as_dict(self):
+        """Returns the stats per page key, for merging across workers
+
+        :return: Page key to {'navigations', 'seconds', 'reused'}
+        :rtype: dict
+        """
+
+        with self._lock:
+            return dict((key, dict(value)) for key, value in self._pages.items())
+
+    def merge(self, pages):
+        """Add stats from another worker
+
+        :param dict pages: Result of :meth:`as_dict`
+        :return:
+        """
+
+        with self._lock:
+            for key, value in (pages or {}).items():
+                for name in ('navigations', 'seconds', 'reused'):
+                    self._pages[key][name] += value[name]
+
+    def navigated(self, key, seconds):
+        """Record a navigation
+
+        :param str key: Page key
+        :param float seconds: Navigation time
+        :return:
+        """
+
+        with self._lock:
+            self._pages[key]['navigations'] += 1
+            self._pages[key]['seconds'] += seconds
+
+    def reused(self, key):
+        """Record a test that found its page already loaded
+
+        :param str key: Page key
+        :return:
+        """
+
+        with self._lock:
+            self._pages[key]['reused'] += 1
+
+    def saved(self):
+        """Returns the navigation time saved, estimated from the mean navigation time of each page
+
+        :return: Seconds
+        :rtype: float
+        """
+
+        return sum(self._saved(value) for value in self.as_dict().values())
+
+    def report(self):
+        """Returns a text table of navigations per page
+
+        :return: Table
+        :rtype: str
+        """
+
+        pages = sorted(self.as_dict().items(), key=lambda item: (-self._saved(item[1]), item[0]))
+
+        if not pages:
+            return ''
+
+        width = max(len('page'), max(len(key) for key, _ in pages))
+        lines = ['{}  {:>11}  {:>6}  {:>9}  {:>9}'.format('page'.ljust(width), 'navigations', 'reused', 'mean s',
+                                                          'saved s')]
+
+        for key, value in pages:
+
+            mean = value['seconds'] / value['navigations'] if value['navigations'] else None
+            lines.append('{}  {:>11}  {:>6}  {:>9}  {:>9.2f}'.format(
+                key.ljust(width), value['navigations'], value['reused'],
+                '{:.2f}'.format(mean) if mean is not None else '-', self._saved(value)))
+
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _saved(value):
+        return value['reused'] * value['seconds'] / value['navigations'] if value['navigations'] else 0.0
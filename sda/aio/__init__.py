@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""sda.aio
+
+Asyncio variants of :class:`sda.Element`, the mixins, :mod:`sda.structures`, :class:`sda.Page` and :class:`sda.Site`,
+driving W3C WebDriver sessions over a pooled async HTTP client, so one event loop can run dozens of sessions at once.
+Requires Python 3.5 or later, and is not imported by ``import sda``.
+
+.. code-block:: python
+
+    import asyncio
+    from sda.aio import AsyncWebDriver, ConnectionPool, Page, structures
+
+    class HomePage(Page):
+
+        def __init__(self, web_driver):
+
+            super(HomePage, self).__init__(web_driver, '/')
+            self.header = structures.Text(web_driver, 'xpath', '//*[@data-qa-id="header"]')
+
+    async def journey(pool):
+
+        async with AsyncWebDriver(pool, {'browserName': 'chrome'}) as driver:
+
+            await driver.get('https://example.com/')
+            return await HomePage(driver).header.text()
+
+    async def main():
+
+        pool = ConnectionPool('http://grid:4444/wd/hub', maxsize=40)
+        return await asyncio.gather(*(journey(pool) for _ in range(40)))
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from sda.aio import mixins
+from sda.aio import structures
+from sda.aio.driver import AsyncWebDriver, AsyncWebElement
+from sda.aio.element import Element
+from sda.aio.http import ConnectionPool
+from sda.aio.page import Page
+from sda.aio.site import Site
+from sda.aio.waits import wait_all, wait_any
+
+__all__ = ['mixins', 'structures', 'AsyncWebDriver', 'AsyncWebElement', 'ConnectionPool', 'Element', 'Page', 'Site',
+           'wait_all', 'wait_any']
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.driver
+
+An asyncio W3C WebDriver client. Commands go over a :class:`sda.aio.http.ConnectionPool`, which several drivers can
+share:
+
+.. code-block:: python
+
+    import asyncio
+    from sda.aio import AsyncWebDriver, ConnectionPool
+
+    async def main():
+
+        pool = ConnectionPool('http://grid:4444/wd/hub', maxsize=50)
+        drivers = [AsyncWebDriver(pool, {'browserName': 'chrome'}) for _ in range(50)]
+
+        await asyncio.gather(*(driver.start() for driver in drivers))
+        ...
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import Counter
+import json
+from string import Template
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.utils import keys_to_typing
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+from sda.aio.http import ConnectionPool
+
+__all__ = ['AsyncWebDriver', 'AsyncWebElement']
+
+DEFAULT_URL = 'http://127.0.0.1:4444/wd/hub'
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+LEGACY_ELEMENT_KEY = 'ELEMENT'
+
+SESSION = '/session/$sessionId'
+ELEMENT = SESSION + '/element/$id'
+
+# (HTTP method, path) for every command sent
+COMMANDS = {
+    Command.NEW_SESSION: ('POST', '/session'),
+    Command.QUIT: ('DELETE', SESSION),
+    Command.SET_TIMEOUTS: ('POST', SESSION + '/timeouts'),
+    Command.GET: ('POST', SESSION + '/url'),
+    Command.GET_CURRENT_URL: ('GET', SESSION + '/url'),
+    Command.REFRESH: ('POST', SESSION + '/refresh'),
+    Command.GET_TITLE: ('GET', SESSION + '/title'),
+    Command.GET_PAGE_SOURCE: ('GET', SESSION + '/source'),
+    Command.W3C_EXECUTE_SCRIPT: ('POST', SESSION + '/execute/sync'),
+    Command.FIND_ELEMENTS: ('POST', SESSION + '/elements'),
+    Command.FIND_CHILD_ELEMENTS: ('POST', ELEMENT + '/elements'),
+    Command.GET_ELEMENT_PROPERTY: ('GET', ELEMENT + '/property/$name'),
+    Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY: ('GET', ELEMENT + '/css/$propertyName'),
+    Command.GET_ELEMENT_TEXT: ('GET', ELEMENT + '/text'),
+    Command.GET_ELEMENT_TAG_NAME: ('GET', ELEMENT + '/name'),
+    Command.IS_ELEMENT_SELECTED: ('GET', ELEMENT + '/selected'),
+    Command.CLICK_ELEMENT: ('POST', ELEMENT + '/click'),
+    Command.CLEAR_ELEMENT: ('POST', ELEMENT + '/clear'),
+    Command.SEND_KEYS_TO_ELEMENT: ('POST', ELEMENT + '/value'),
+    Command.W3C_ACTIONS: ('POST', SESSION + '/actions'),
+    Command.W3C_CLEAR_ACTIONS: ('DELETE', SESSION + '/actions'),
+}
+
+
+class AsyncWebElement(object):
+    """The AsyncWebElement implementation
+
+    A reference to an element in a session, the async counterpart of Selenium's WebElement.
+    """
+
+    def __init__(self, parent, id_):
+        """Element reference
+
+        :param AsyncWebDriver parent: Driver owning the element
+        :param str id_: Element id assigned by the remote end
+        """
+
+        self.parent = parent
+        self.id = id_
+
+    def __eq__(self, other):
+        return isinstance(other, AsyncWebElement) and self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return '<{} id={}>'.format(self.__class__.__name__, self.id)
+
+    async def clear(self):
+        """Clear a text input
+
+        :return:
+        """
+
+        await self._execute(Command.CLEAR_ELEMENT)
+
+    async def click(self):
+        """Click the element
+
+        :return:
+        """
+
+        await self._execute(Command.CLICK_ELEMENT)
+
+    async def find_elements(self, by=By.XPATH, value=None):
+        """Returns the descendants matching a locator
+
+        :param str by: Selector method
+        :param str value: Selector value
+        :return: Matching elements
+        :rtype: list
+        """
+
+        return await self._execute(Command.FIND_CHILD_ELEMENTS, {'using': by, 'value': value})
+
+    async def get_property(self, name):
+        """Returns a DOM property of the element
+
+        :param str name: Property name
+        :return: Property value
+        """
+
+        return await self._execute(Command.GET_ELEMENT_PROPERTY, {'name': name})
+
+    async def is_selected(self):
+        """Returns True if an option, checkbox or radio is selected
+
+        :rtype: bool
+        """
+
+        return await self._execute(Command.IS_ELEMENT_SELECTED)
+
+    async def send_keys(self, *value):
+        """Type into the element
+
+        :param value: Text or Selenium Keys to type
+        :return:
+        """
+
+        typing = keys_to_typing(value)
+        await self._execute(Command.SEND_KEYS_TO_ELEMENT, {'text': ''.join(typing), 'value': typing})
+
+    async def tag_name(self):
+        """Returns the element's tag name
+
+        :rtype: str
+        """
+
+        return await self._execute(Command.GET_ELEMENT_TAG_NAME)
+
+    async def text(self):
+        """Returns the element's rendered text
+
+        :rtype: str
+        """
+
+        return await self._execute(Command.GET_ELEMENT_TEXT)
+
+    async def value_of_css_property(self, name):
+        """Returns the computed value of a CSS property
+
+        :param str name: CSS property
+        :rtype: str
+        """
+
+        return await self._execute(Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY, {'propertyName': name})
+
+    async def _execute(self, command, params=None):
+
+        params = dict(params or {})
+        params['id'] = self.id
+
+        return await self.parent.execute(command, params)
+
+
+class AsyncWebDriver(object):
+    """The AsyncWebDriver implementation
+
+    One W3C WebDriver session driven from asyncio. Only the commands sda uses are supported.
+    """
+
+    def __init__(self, command_executor=DEFAULT_URL, desired_capabilities=None):
+        """Async web driver. The session starts with :meth:`start` or when entering ``async with``
+
+        :param command_executor: Remote end URL, or a ConnectionPool to share with other drivers
+        :param dict desired_capabilities: Capabilities, ex. {'browserName': 'chrome'}
+        :return:
+        """
+
+        self.command_executor = command_executor if isinstance(command_executor, ConnectionPool) \
+            else ConnectionPool(command_executor)
+        self.desired_capabilities = dict(desired_capabilities or {})
+        self.capabilities = {}
+        self.commands = Counter()
+        self.session_id = None
+
+        self._errors = ErrorHandler()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.quit()
+
+    async def current_url(self):
+        """Returns the URL of the current page
+
+        :rtype: str
+        """
+
+        return await self.execute(Command.GET_CURRENT_URL)
+
+    async def execute(self, command, params=None):
+        """Send a command and return its value
+
+        :param str command: Selenium command name, ex. Command.GET
+        :param dict params: Command parameters
+        :return: Response value, with element references turned into AsyncWebElement
+        :raises WebDriverException: If the remote end answers with an error
+        """
+
+        if command not in COMMANDS:
+            raise WebDriverException('Unsupported command: {}'.format(command))
+
+        method, path = COMMANDS[command]
+        params = dict(params or {})
+        params['sessionId'] = self.session_id
+        path = Template(path).substitute(params)
+        body = None
+
+        if method == 'POST':
+            body = json.dumps(dict((key, value) for key, value in params.items()
+                                   if key not in ('sessionId', 'id'))).encode('utf-8')
+
+        self.commands[command] += 1
+        status, _, data = await self.command_executor.request(method, path, body)
+        text = data.decode('utf-8') if data else ''
+
+        # Raised the same way Selenium's RemoteConnection reports errors
+        if status >= 400:
+            self._errors.check_response({'status': status, 'value': text})
+
+        response = json.loads(text) if text else {}
+
+        return self._unwrap(response.get('value') if isinstance(response, dict) else response)
+
+    async def execute_script(self, script, *args):
+        """Run a script in the page
+
+        :param str script: Script body
+        :param args: Arguments, AsyncWebElement arguments arrive as DOM nodes
+        :return: Script result
+        """
+
+        return await self.execute(Command.W3C_EXECUTE_SCRIPT, {'script': script, 'args': self._wrap(list(args))})
+
+    async def find_elements(self, by=By.XPATH, value=None):
+        """Returns the elements matching a locator
+
+        :param str by: Selector method
+        :param str value: Selector value
+        :return: Matching elements
+        :rtype: list
+        """
+
+        return await self.execute(Command.FIND_ELEMENTS, {'using': by, 'value': value})
+
+    async def get(self, url):
+        """Load a page
+
+        :param str url: URL
+        :return:
+        """
+
+        await self.execute(Command.GET, {'url': url})
+
+    async def page_source(self):
+        """Returns the source of the current page
+
+        :rtype: str
+        """
+
+        return await self.execute(Command.GET_PAGE_SOURCE)
+
+    async def perform(self, *sequences):
+        """Perform W3C input action sequences, then release every input
+
+        :param sequences: Action sequences, ex. {'type': 'pointer', 'id': 'mouse', 'actions': [...]}
+        :return:
+        """
+
+        await self.execute(Command.W3C_ACTIONS, {'actions': self._wrap(list(sequences))})
+        await self.execute(Command.W3C_CLEAR_ACTIONS)
+
+    async def quit(self):
+        """End the session
+
+        :return:
+        """
+
+        if self.session_id is not None:
+
+            try:
+                await self.execute(Command.QUIT)
+
+            finally:
+                self.session_id = None
+
+    async def refresh(self):
+        """Reload the current page
+
+        :return:
+        """
+
+        await self.execute(Command.REFRESH)
+
+    async def set_page_load_timeout(self, seconds):
+        """Set how long a navigation may take
+
+        :param float seconds: Timeout in seconds
+        :return:
+        """
+
+        await self.execute(Command.SET_TIMEOUTS, {'pageLoad': int(float(seconds) * 1000)})
+
+    async def start(self):
+        """Start the session
+
+        :return: self
+        :rtype: AsyncWebDriver
+        """
+
+        value = await self.execute(Command.NEW_SESSION, {'capabilities': {'alwaysMatch': self.desired_capabilities},
+                                                         'desiredCapabilities': self.desired_capabilities})
+
+        self.session_id = value.get('sessionId')
+        self.capabilities = value.get('capabilities', {})
+
+        return self
+
+    async def title(self):
+        """Returns the title of the current page
+
+        :rtype: str
+        """
+
+        return await self.execute(Command.GET_TITLE)
+
+    def _unwrap(self, value):
+
+        if isinstance(value, dict):
+
+            if ELEMENT_KEY in value or LEGACY_ELEMENT_KEY in value:
+                return AsyncWebElement(self, value.get(ELEMENT_KEY, value.get(LEGACY_ELEMENT_KEY)))
+
+            return dict((key, self._unwrap(item)) for key, item in value.items())
+
+        if isinstance(value, list):
+            return [self._unwrap(item) for item in value]
+
+        return value
+
+    def _wrap(self, value):
+
+        if isinstance(value, AsyncWebElement):
+            return {ELEMENT_KEY: value.id}
+
+        if isinstance(value, dict):
+            return dict((key, self._wrap(item)) for key, item in value.items())
+
+        if isinstance(value, (list, tuple)):
+            return [self._wrap(item) for item in value]
+
+        return value
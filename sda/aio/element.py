@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.element
+
+Async counterparts of :class:`sda.element.SeleniumObject` and :class:`sda.element.Element`. Methods that talk to the
+browser are coroutines, and attributes are read with :meth:`Element.get_attribute` instead of attribute access.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from six import string_types
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from sda import scripts
+from sda.aio.driver import AsyncWebDriver
+from sda.aio.waits import states, wait_until
+from sda.element import DEFAULT_NAME_ATTR, DEFAULT_TYPE_ATTR, join, normalize
+from sda.waits import DISPLAYED
+
+__all__ = ['Element', 'SeleniumObject']
+
+
+class SeleniumObject(object):
+    """The SeleniumObject implementation
+    """
+
+    def __init__(self, web_driver, **kwargs):
+
+        self.driver = web_driver if isinstance(web_driver, AsyncWebDriver) else None
+
+        if not self.driver:
+            raise TypeError("'web_driver' MUST be an sda.aio AsyncWebDriver")
+
+        self._name_attr = kwargs['name_attr'] if isinstance(kwargs.get('name_attr'), string_types) \
+            else DEFAULT_NAME_ATTR
+        self._type_attr = kwargs['type_attr'] if isinstance(kwargs.get('type_attr'), string_types) \
+            else DEFAULT_TYPE_ATTR
+
+    async def wait_until_present(self, _by, path, timeout=None):
+        """Wait until the element is available to the DOM
+
+        :param str _by: Selector method
+        :param str path: Selector path
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await Element(self.driver, _by, path).wait_until_present(timeout)
+
+    async def wait_until_appears(self, _by, path, timeout=None):
+        """Wait until the element appears
+
+        :param str _by: Selector method
+        :param str path: Selector path
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await Element(self.driver, _by, path).wait_until_appears(timeout)
+
+    async def wait_until_disappears(self, _by, path, timeout=None):
+        """Wait until the element disappears
+
+        :param str _by: Selector method
+        :param str path: Selector path
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await Element(self.driver, _by, path).wait_until_disappears(timeout)
+
+
+class Element(object):
+    """The Element implementation
+
+    .. code-block:: python
+
+        header = Text(driver, By.XPATH, '//*[@data-qa-id="header"]')
+
+        if await header.exists():
+            print(await header.text())
+    """
+
+    def __init__(self, web_driver, by=By.XPATH, path=None, **kwargs):
+        """Basic async element
+
+        :param AsyncWebDriver web_driver: Async web driver
+        :param str by: By selector
+        :param str path: selection value
+        :return:
+        :raises TypeError: If web_driver is not an AsyncWebDriver
+        """
+
+        self.driver = web_driver if isinstance(web_driver, AsyncWebDriver) else None
+
+        if not self.driver:
+            raise TypeError("'web_driver' MUST be an sda.aio AsyncWebDriver")
+
+        # Instantiate selector
+        self.search_term = normalize(_by=by, path=path)
+
+        # Add any additional attributes
+        for extra in kwargs:
+            self.__setattr__(extra, kwargs[extra])
+
+    def __repr__(self):
+        """Returns HTML representation of the element
+
+        :return: HTML representation of the element
+        :rtype: str
+        """
+
+        return '<{} by={} path={}>'.format(self.__class__.__name__, *self.search_term)
+
+    async def blur(self):
+        """Simulate moving the cursor out of focus of this element.
+
+        :return:
+        """
+
+        element = await self.element()
+
+        if element:
+            return await self.driver.execute_script('arguments[0].blur();', element)
+
+    async def css_property(self, prop):
+        """Return the computed value of a CSS property for the element
+
+        :param str prop: CSS Property
+        :return: Value of a CSS property, empty if the element does not exist
+        :rtype: str
+        """
+
+        return (await self.css_properties([prop])).get(str(prop), '')
+
+    async def css_properties(self, names):
+        """Return the computed values of several CSS properties in a single round trip
+
+        :param list names: CSS properties
+        :return: Computed value for each property, empty if the element does not exist
+        :rtype: dict
+        """
+
+        try:
+            styles = await self.driver.execute_script(scripts.COMPUTED_STYLES, [self.search_term[1]],
+                                                      [str(name) for name in names])
+
+        except WebDriverException:
+            return {}
+
+        return styles[0] or {}
+
+    async def drag(self, x_offset=0, y_offset=0):
+        """Drag element x,y pixels from its center
+
+        :param int x_offset: Pixels to move element to
+        :param int y_offset: Pixels to move element to
+        :return: True, if the element was dragged
+        :rtype: bool
+        """
+
+        element = await self.element() if isinstance(x_offset, int) and isinstance(y_offset, int) else None
+
+        if element:
+
+            await self.driver.perform(pointer([
+                {'type': 'pointerMove', 'duration': 0, 'origin': element, 'x': 0, 'y': 0},
+                {'type': 'pointerDown', 'button': 0},
+                {'type': 'pointerMove', 'duration': 250, 'origin': 'pointer', 'x': x_offset, 'y': y_offset},
+                {'type': 'pointerUp', 'button': 0}]))
+            return True
+
+        return False
+
+    async def element(self):
+        """Return the element reference
+
+        :return: Element reference, or None if nothing matches
+        :rtype: sda.aio.driver.AsyncWebElement
+        """
+
+        try:
+            elements = await self.driver.find_elements(*self.search_term)
+
+        except WebDriverException:
+            return None
+
+        return elements[0] if elements else None
+
+    async def exists(self):
+        """Returns True if the element is in the DOM, checked in the browser without waiting
+
+        :return: True, if the element can be located
+        :rtype: bool
+        """
+
+        try:
+            return bool(await self.driver.execute_script(scripts.XPATH_EXISTS, self.search_term[1]))
+
+        except WebDriverException:
+            return False
+
+    async def focus(self):
+        """Simulate element being in focus
+
+        :return:
+        """
+
+        element = await self.element()
+
+        if element:
+            return await self.driver.execute_script('arguments[0].focus();', element)
+
+    async def get_attribute(self, name):
+        """Returns the value of an attribute, as :meth:`sda.element.Element.__getattr__` would
+
+        :param str name: Attribute name
+        :return: Attribute value, empty if the element does not exist
+        :rtype: str
+        """
+
+        try:
+            _, values = await self.driver.execute_script(scripts.ATTRIBUTES, self.search_term[1], name)
+
+        except WebDriverException:
+            return ''
+
+        return values[name] if values is not None else ''
+
+    async def has_attribute(self, attribute):
+        """Returns True if element contains attribute, the async form of ``attribute in element``
+
+        :param str attribute: Element attribute
+        :return: True, if the element contains that attribute
+        :rtype: bool
+        """
+
+        if not isinstance(attribute, string_types):
+            return False
+
+        xpath = join(self.search_term, ('xpath', '/self::*[boolean(@{})]'.format(attribute)))
+
+        try:
+            return bool(await self.driver.execute_script(scripts.XPATH_EXISTS, xpath[1]))
+
+        except WebDriverException:
+            return False
+
+    async def html(self):
+        """Returns HTML representation of the element
+
+        :return: HTML representation of the element
+        :rtype: str
+        """
+
+        return await self.get_attribute('outerHTML') or ''
+
+    async def is_disabled(self):
+        """Returns True, if the element is disabled
+
+        :return: True, if the element is disabled
+        :rtype: bool
+        """
+
+        return await self.has_attribute('disabled')
+
+    async def is_displayed(self):
+        """Return True, if the element is visible
+
+        :return: True, if element is visible
+        :rtype: bool
+        """
+
+        return (await states(self.driver, [self]))[0] == DISPLAYED
+
+    def parent(self):
+        """Returns the parent of the element
+
+        :return: Parent element
+        :rtype: Element
+        """
+
+        xpath = join(self.search_term, ('xpath', '/parent::*'))
+        return Element(self.driver, xpath[0], xpath[1])
+
+    async def scroll_to(self):
+        """Scroll to the location of the element
+
+        :return:
+        """
+
+        element = await self.element()
+
+        if element:
+
+            script = "var vHeight = Math.max(document.documentElement.clientHeight, window.innerHeight || 0);" \
+                     "var eTop = arguments[0].getBoundingClientRect().top;" \
+                     "window.scrollBy(0, eTop-(vHeight/2));"
+
+            await self.driver.execute_script(script, element)
+
+    async def tag_name(self):
+        """Returns element tag name
+
+        :return: Element tag name
+        :rtype: str
+        """
+
+        element = await self.element()
+
+        return await element.tag_name() if element else ''
+
+    async def wait_until_present(self, timeout=None):
+        """Wait until the element is present
+
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await wait_until(self, 'present', timeout)
+
+    async def wait_until_appears(self, timeout=None):
+        """Wait until the element appears
+
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await wait_until(self, 'appears', timeout)
+
+    async def wait_until_disappears(self, timeout=None):
+        """Wait until the element disappears
+
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
+        :return: True, if the wait does not timeout
+        :rtype: bool
+        """
+
+        return await wait_until(self, 'disappears', timeout)
+
+
+def pointer(actions):
+    """Returns a W3C mouse action sequence
+
+    :param list actions: Pointer actions
+    :return: Action sequence
+    :rtype: dict
+    """
+
+    return {'type': 'pointer', 'id': 'mouse', 'parameters': {'pointerType': 'mouse'}, 'actions': actions}
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.http
+
+A small asyncio HTTP/1.1 client with a pool of keep-alive connections, sized for talking JSON to a WebDriver remote
+end. Many sessions can share one pool, so an event loop driving dozens of sessions against a grid holds at most
+``maxsize`` sockets open.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import asyncio
+import ssl
+from urllib.parse import urlparse
+import weakref
+
+__all__ = ['ConnectionPool']
+
+DEFAULT_MAXSIZE = 10
+USER_AGENT = 'sda-aio'
+
+
+class ConnectionPool(object):
+    """The ConnectionPool implementation
+
+    Keep-alive connections to one host. A request takes an idle connection, or opens a new one while fewer than
+    ``maxsize`` are in use, and waits otherwise. Streams and semaphores belong to an event loop, so a pool used from
+    several loops keeps connections and the ``maxsize`` limit per loop.
+    """
+
+    def __init__(self, url, maxsize=DEFAULT_MAXSIZE, timeout=None, ssl_context=None):
+        """Connection pool
+
+        :param str url: Remote end URL, ex. 'http://127.0.0.1:4444/wd/hub'. Request paths are joined to its path
+        :param int maxsize: Maximum number of connections in use at once
+        :param float timeout: Seconds before a request is abandoned, or None to wait forever
+        :param ssl.SSLContext ssl_context: Context for https URLs. Defaults to the system's trusted certificates
+        :return:
+        """
+
+        parsed = urlparse(url)
+
+        self.scheme = parsed.scheme or 'http'
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or (443 if self.scheme == 'https' else 80)
+        self.prefix = parsed.path.rstrip('/')
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.opened = 0
+        self.requests = 0
+
+        self._ssl = (ssl_context or ssl.create_default_context()) if self.scheme == 'https' else None
+        self._loops = weakref.WeakKeyDictionary()
+
+    @property
+    def idle(self):
+        """Returns the number of open connections waiting for a request
+
+        :rtype: int
+        """
+
+        return sum(len(idle) for _, idle in self._loops.values())
+
+    async def request(self, method, path, body=None):
+        """Send a request and read the whole response
+
+        A request sent on a reused connection the server already closed is retried once on a new connection.
+
+        :param str method: HTTP method
+        :param str path: Path, appended to the pool URL's path
+        :param bytes body: Request body, or None
+        :return: Status code, lower-cased headers and body
+        :rtype: tuple
+        :raises ConnectionError: If the server cannot be reached or hangs up
+        :raises asyncio.TimeoutError: If the response takes longer than the pool's timeout
+        """
+
+        slots, idle = self._state()
+
+        async with slots:
+
+            self.requests += 1
+            reused = bool(idle)
+            connection = idle.pop() if reused else await self._open()
+
+            try:
+                status, headers, data, keep_alive = await self._exchange(connection, method, path, body)
+
+            except (ConnectionError, asyncio.IncompleteReadError):
+
+                if not reused:
+                    raise
+
+                connection = await self._open()
+                status, headers, data, keep_alive = await self._exchange(connection, method, path, body)
+
+            if keep_alive:
+                idle.append(connection)
+
+            else:
+                self._close(connection)
+
+            return status, headers, data
+
+    def close(self):
+        """Close every idle connection
+
+        :return:
+        """
+
+        for loop, (_, idle) in list(self._loops.items()):
+
+            # Connections of a closed loop went with it
+            while idle and not loop.is_closed():
+                self._close(idle.pop())
+
+            del self._loops[loop]
+
+    async def _exchange(self, connection, method, path, body):
+
+        try:
+
+            if self.timeout is None:
+                return await self._send(connection, method, path, body)
+
+            return await asyncio.wait_for(self._send(connection, method, path, body), self.timeout)
+
+        except BaseException:
+
+            # A connection left mid-response cannot be reused
+            self._close(connection)
+            raise
+
+    async def _open(self):
+
+        self.opened += 1
+
+        if self.timeout is None:
+            return await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+
+        return await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self._ssl), self.timeout)
+
+    async def _send(self, connection, method, path, body):
+
+        reader, writer = connection
+        default_port = 443 if self.scheme == 'https' else 80
+        lines = ['{} {} HTTP/1.1'.format(method, self.prefix + path),
+                 'Host: {}'.format(self.host if self.port == default_port else '{}:{}'.format(self.host, self.port)),
+                 'Accept: application/json', 'Connection: keep-alive', 'User-Agent: {}'.format(USER_AGENT)]
+
+        if body is not None:
+            lines += ['Content-Type: application/json;charset=UTF-8', 'Content-Length: {}'.format(len(body))]
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await writer.drain()
+
+        status_line = await reader.readline()
+
+        if not status_line:
+            raise ConnectionError('Connection closed by {}:{}'.format(self.host, self.port))
+
+        version, status = status_line.decode('latin-1').split(None, 2)[:2]
+        headers = {}
+
+        while True:
+
+            line = await reader.readline()
+
+            if line in (b'\r\n', b'\n', b''):
+                break
+
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+        if method == 'HEAD' or status in ('204', '304'):
+            data = b''
+
+        elif 'chunked' in headers.get('transfer-encoding', '').lower():
+            data = await self._read_chunked(reader)
+
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+
+        else:
+            data = await reader.read()
+            keep_alive = False
+
+        return int(status), headers, data, keep_alive
+
+    def _state(self):
+
+        # Semaphore and idle connections of the running loop, created on its first request
+        loop = asyncio.get_event_loop()
+
+        for closed in [item for item in self._loops if item.is_closed()]:
+            del self._loops[closed]
+
+        if loop not in self._loops:
+            self._loops[loop] = (asyncio.Semaphore(self.maxsize), [])
+
+        return self._loops[loop]
+
+    @staticmethod
+    async def _read_chunked(reader):
+
+        chunks = []
+
+        while True:
+
+            size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+
+            if not size:
+                break
+
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+        # Trailers, up to the blank line ending the message
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+
+        return b''.join(chunks)
+
+    @staticmethod
+    def _close(connection):
+        connection[1].close()
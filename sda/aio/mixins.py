@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.mixins
+
+Async counterparts of :mod:`sda.mixins`. Option and text reads return str rather than bytes.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from six import string_types
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from sda import scripts
+from sda.aio.element import pointer
+from sda.element import join
+from sda.mixins import to_int
+
+__all__ = ['ClickMixin', 'InputMixin', 'SelectMixin', 'SelectiveMixin', 'TextMixin']
+
+
+class ClickMixin(object):
+    """The ClickMixin Implementation
+
+    W3C clicks scroll the element into view themselves, so nothing is scrolled beforehand.
+    """
+
+    async def click(self):
+        """Click element
+
+        :return: True, if the element was clicked
+        :rtype: bool
+        """
+
+        element = await self.element()
+
+        if element:
+
+            try:
+
+                await element.click()
+                return True
+
+            except WebDriverException:
+                pass
+
+        return False
+
+    async def double_click(self):
+        """Double-click element
+
+        :return: True, if the element was double-clicked
+        :rtype: bool
+        """
+
+        return await self._pointer([{'type': 'pointerDown', 'button': 0}, {'type': 'pointerUp', 'button': 0},
+                                    {'type': 'pointerDown', 'button': 0}, {'type': 'pointerUp', 'button': 0}])
+
+    async def hover(self):
+        """Simulate hovering over element
+
+        :return: True, if the pointer moved over the element
+        :rtype: bool
+        """
+
+        return await self._pointer([])
+
+    async def _pointer(self, actions):
+
+        element = await self.element()
+
+        if element:
+
+            try:
+
+                await self.driver.perform(pointer(
+                    [{'type': 'pointerMove', 'duration': 0, 'origin': element, 'x': 0, 'y': 0}] + actions))
+                return True
+
+            except WebDriverException:
+                pass
+
+        return False
+
+
+class InputMixin(object):
+    """The InputMixin implementation
+    """
+
+    async def input(self, *args, clear=False):
+        """Type text into the field
+
+        :param args: Text to send to the input field
+        :param bool clear: True, to clear the field before typing
+        :return: True, if text is assigned
+        :rtype: bool
+        """
+
+        element = await self.element()
+
+        if element:
+
+            if clear:
+                await element.clear()
+
+            await element.send_keys(*args)
+            return True
+
+        return False
+
+    async def set_value(self, value):
+        """Set the value of the field without typing
+
+        :param value: New value
+        :return: True, if the value was set
+        :rtype: bool
+        """
+
+        element = await self.element()
+
+        if element:
+
+            await self.driver.execute_script(scripts.SET_VALUE, element, str(value))
+            return True
+
+        return False
+
+    async def value(self):
+        """Return value of input
+
+        :return: Input value
+        :rtype: str
+        """
+
+        return await self.get_attribute('value') or ''
+
+
+class SelectMixin(object):
+    """The SelectMixin implementation
+
+    Options are clicked like a user would, as Selenium's Select does.
+    """
+
+    async def deselect_all(self):
+        """Deselect all selected options of a multiple select
+
+        :return: True, if all options are deselected
+        :rtype: bool
+        """
+
+        options = await self._options()
+
+        if options is None or not await self.has_attribute('multiple'):
+            return False
+
+        for index, (_, selected) in enumerate(options):
+            if selected:
+                await self._choose('/descendant::option[{}]'.format(index + 1), False)
+
+        return True
+
+    async def deselect_by_index(self, option):
+        """Deselect option by index [i]
+
+        :param option: Select option index
+        :return: True, if option is deselected
+        :rtype: bool
+        """
+
+        option = to_int(option)
+
+        if not isinstance(option, int):
+            return False
+
+        return await self._choose('/descendant::option[{}]'.format(option + 1), False)
+
+    async def deselect_by_text(self, option):
+        """Deselect option by display text
+
+        :param option: Select option
+        :return: True, if option is deselected
+        :rtype: bool
+        """
+
+        if not isinstance(option, string_types):
+            return False
+
+        return await self._choose('/descendant::option[normalize-space(.)={}]'.format(literal(option)), False)
+
+    async def deselect_by_value(self, option):
+        """Deselect option by option value
+
+        :param option: Select option value
+        :return: True, if option is deselected
+        :rtype: bool
+        """
+
+        if not isinstance(option, string_types):
+            return False
+
+        return await self._choose('/descendant::option[@value={}]'.format(literal(option)), False)
+
+    async def options(self):
+        """Returns all Select options
+
+        :return: List of options
+        :rtype: list
+        """
+
+        return [text for text, _ in await self._options() or []]
+
+    async def selected_first(self):
+        """Returns the first selected option
+
+        :return: First selected option text
+        :rtype: str
+        """
+
+        selected = await self.selected_options()
+
+        return selected[0] if selected else None
+
+    async def selected_options(self):
+        """Returns a list of selected options
+
+        :return: List of options
+        :rtype: list
+        """
+
+        return [text for text, selected in await self._options() or [] if selected]
+
+    async def select_by_index(self, option):
+        """Select option at index [i]
+
+        :param str option: Select index
+        :return: True, if the option is selected
+        :rtype: bool
+        """
+
+        option = to_int(option)
+
+        if not isinstance(option, int):
+            return False
+
+        return await self._choose('/descendant::option[{}]'.format(option + 1), True)
+
+    async def select_by_text(self, option):
+        """Select option by display text
+
+        :param str option: Select option
+        :return: True, if the option is selected
+        :rtype: bool
+        """
+
+        if not isinstance(option, string_types):
+            return False
+
+        return await self._choose('/descendant::option[normalize-space(.)={}]'.format(literal(option)), True)
+
+    async def select_by_value(self, option):
+        """Select option by option value
+
+        :param str option: Select option value
+        :return: True, if the option is selected
+        :rtype: bool
+        """
+
+        if not isinstance(option, string_types):
+            return False
+
+        return await self._choose('/descendant::option[@value={}]'.format(literal(option)), True)
+
+    async def _choose(self, xpath, select):
+        """Click the options under the select matching an xpath until they have the wanted state
+
+        :param str xpath: Option path, relative to the select
+        :param bool select: True to select, False to deselect
+        :return: True, if at least one option matched
+        :rtype: bool
+        """
+
+        try:
+            options = await self.driver.find_elements(*join(self.search_term, (By.XPATH, '/self::select' + xpath)))
+
+        except WebDriverException:
+            return False
+
+        # A single select takes the first match only, and cannot deselect
+        if len(options) > 1 or not select:
+
+            if not await self.has_attribute('multiple'):
+
+                if not select:
+                    return False
+
+                options = options[:1]
+
+        for option in options:
+            if await option.is_selected() != select:
+                await option.click()
+
+        return bool(options)
+
+    async def _options(self):
+
+        try:
+            _, options = await self.driver.execute_script(scripts.OPTIONS, self.search_term[1])
+
+        except WebDriverException:
+            return None
+
+        return options
+
+
+class SelectiveMixin(ClickMixin):
+    """The SelectiveMixin implementation
+    """
+
+    async def deselect(self):
+        """Deselect this element
+
+        :return:
+        """
+
+        return await self.click() if await self.selected() else False
+
+    async def select(self):
+        """Select this element
+
+        :return:
+        """
+
+        return await self.click() if not await self.selected() else False
+
+    async def selected(self):
+        """Return True if element is selected
+
+        :return: True, if the element is selected
+        :rtype: bool
+        """
+
+        element = await self.element()
+
+        return await element.is_selected() if element else False
+
+
+class TextMixin(object):
+    """The TextMixin implementation
+    """
+
+    async def text(self):
+        """Returns the text within an element
+
+        :return: Element text
+        :rtype: str
+        """
+
+        try:
+            _, text = await self.driver.execute_script(scripts.TEXT_CONTENT, self.search_term[1])
+
+        except WebDriverException:
+            return ''
+
+        return str(text).strip() if text is not None else ''
+
+    async def visible_text(self):
+        """Returns the visible text within an element
+
+        :return: Element text
+        :rtype: str
+        """
+
+        element = await self.element()
+
+        return str(await element.text()).strip() if element else ''
+
+
+def literal(value):
+    """Returns an XPath string literal for any text, including text holding both kinds of quote
+
+    :param str value: Text
+    :return: XPath expression
+    :rtype: str
+    """
+
+    if '"' not in value:
+        return '"{}"'.format(value)
+
+    if "'" not in value:
+        return "'{}'".format(value)
+
+    return 'concat({})'.format(', \'"\', '.join('"{}"'.format(part) for part in value.split('"')))
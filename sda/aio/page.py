@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.page
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import inspect
+import re
+from urllib.parse import urljoin, urlparse
+from selenium.common.exceptions import WebDriverException
+from sda import scripts
+from sda.aio.element import Element, SeleniumObject
+from sda.page import url_pattern
+
+__all__ = ['Page']
+
+
+class Page(SeleniumObject):
+    """The Page Implementation, see :class:`sda.page.Page`
+    """
+
+    def __init__(self, web_driver, url_path="/"):
+        """Web page
+
+        :param AsyncWebDriver web_driver: Async web driver
+        :param str url_path: URL path after net location. Use Open API spec
+        :return:
+        :raises TypeError: If web_driver is not an AsyncWebDriver
+        """
+
+        super(Page, self).__init__(web_driver)
+
+        # Instantiate page-level URL validation
+        self._url_path = url_path if isinstance(url_path, str) else "/"
+
+    async def computed_styles(self, names):
+        """Returns the computed values of CSS properties for every element on the page in a single round trip
+
+        :param list names: CSS properties
+        :return: Dictionary of element name to property values. Elements that do not exist map to an empty dict
+        :rtype: dict
+        """
+
+        elements = self.elements()
+        keys = sorted(elements)
+
+        try:
+            styles = await self.driver.execute_script(scripts.COMPUTED_STYLES,
+                                                      [elements[key].search_term[1] for key in keys],
+                                                      [str(name) for name in names])
+
+        except WebDriverException:
+            styles = [None] * len(keys)
+
+        return {key: style or {} for key, style in zip(keys, styles)}
+
+    def elements(self):
+        """Returns all testable elements on a page
+
+        :return: Dictionary of elements
+        :rtype: dict
+        """
+
+        return dict(inspect.getmembers(self, self.is_element))
+
+    async def in_view(self):
+        """Returns True if the driver is currently within the scope of this page
+
+        :return: True, if driver on page
+        :rtype: bool
+        """
+
+        return bool(re.match(url_pattern(self._url_path), urlparse(await self.url()).path))
+
+    @staticmethod
+    def is_element(attrib=None):
+        """Returns True if the class attribute is an sda.aio element
+
+        :param attrib: Class attribute
+        :return: True, if the class attribute is an element
+        :rtype: bool
+        """
+
+        return not(inspect.isroutine(attrib)) and isinstance(attrib, Element)
+
+    async def navigate_to(self, *args):
+        """Navigate to path
+
+        :return:
+        :raises IndexError: If args do not fill the URL path
+        """
+
+        try:
+            path = re.sub(r'(:\w+)', '{}', self._url_path).format(*args)
+
+        except IndexError:
+            raise IndexError('URL path does not contain the correct number of args')
+
+        current_url = urlparse(await self.url())
+
+        if not re.match(url_pattern(self._url_path), current_url.path):
+            return await self.driver.get(urljoin('{}://{}'.format(current_url.scheme, current_url.netloc), path))
+
+        await self.driver.refresh()
+
+    async def title(self):
+        """Return page title
+
+        :return: Page title
+        :rtype: str
+        """
+
+        return await self.driver.title()
+
+    async def url(self):
+        """Current page URL
+
+        :return: Page URL
+        :rtype: str
+        """
+
+        return await self.driver.current_url()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.site
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from urllib.parse import urlparse
+from sda.aio.element import SeleniumObject
+
+__all__ = ['Site']
+
+
+class Site(SeleniumObject):
+    """The Site Implementation, see :class:`sda.site.Site`
+
+    .. code-block:: python
+
+        class ExampleSite(Site):
+
+            def __init__(self, web_driver):
+
+                super(ExampleSite, self).__init__(web_driver)
+                self.page_1 = Page1(web_driver)
+    """
+
+    async def domain(self):
+        """Returns the domain for a website
+
+        :return: domain
+        :rtype: str
+        """
+
+        return urlparse(await self.url()).netloc
+
+    async def path(self):
+        """Returns the website path
+
+        :return: path
+        :rtype: str
+        """
+
+        return urlparse(await self.url()).path
+
+    async def url(self):
+        """Current page URL
+
+        :return: Page URL
+        :rtype: str
+        """
+
+        return await self.driver.current_url()
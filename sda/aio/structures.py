@@ -0,0 +1,442 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.structures
+
+Async counterparts of :mod:`sda.structures`, built from the same locators.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import inspect
+import sys
+import warnings
+from six import string_types
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from sda.aio.element import Element
+from sda.aio.mixins import ClickMixin, InputMixin, SelectMixin, SelectiveMixin, TextMixin
+from sda.element import join
+from sda.mixins import to_int
+from sda.structures import Dropdown as _Dropdown
+
+__all__ = ['Button', 'Div', 'Dropdown', 'Field', 'Form', 'Image', 'InputCheckbox', 'InputRadio', 'InputText', 'Link',
+           'MultiSelect', 'Select', 'Text']
+
+
+class Button(Element, ClickMixin, TextMixin):
+    """The Button implementation, see :class:`sda.structures.Button`
+    """
+
+    pass
+
+
+class Div(Element):
+    """The Div implementation, see :class:`sda.structures.Div`
+    """
+
+    pass
+
+
+class Dropdown(Element, ClickMixin, TextMixin):
+    """The Dropdown implementation, see :class:`sda.structures.Dropdown`
+
+    .. note:: This structure is specifically for a Bootstrap dropdown
+    """
+
+    _toggle_xpath = _Dropdown._toggle_xpath
+
+    @property
+    def container(self):
+        """Dropdown container
+
+        :return:
+        """
+
+        xpath = '/following-sibling::*[(contains(@class, "dropdown-menu") or contains(@class, "tree") or @ng-show) ' \
+                'and (self::div or self::ul)]'
+        child = '/descendant-or-self::*[(contains(@class, "dropdown-menu") or contains(@class, "tree") or @ng-show) ' \
+                'and (self::div or self::ul)]'
+
+        xpath_term = join(self.search_term, (By.XPATH, xpath))
+        child_term = join(self.search_term, (By.XPATH, child))
+
+        return Div(self.driver, By.XPATH, '|'.join([xpath_term[1], child_term[1]]))
+
+    @property
+    def toggle(self):
+        """Show/hide toggle button
+
+        :return:
+        """
+
+        return Button(self.driver, *join(self.search_term, self._toggle_xpath))
+
+    async def expand(self, hover=False):
+        """Show dropdown
+
+        :param bool hover: True, to hover over the toggle instead of clicking it
+        :return: True, if the dropdown appeared
+        :rtype: bool
+        """
+
+        container = self.container
+
+        if not await container.is_displayed():
+
+            await (self.toggle.hover() if hover else self.toggle.click())
+            return await container.wait_until_appears()
+
+        return False
+
+    async def collapse(self, hover=False):
+        """Hide dropdown
+
+        :param bool hover: True, to hover over the toggle instead of clicking it
+        :return: True, if the dropdown disappeared
+        :rtype: bool
+        """
+
+        container = self.container
+
+        if await container.is_displayed():
+
+            await (self.toggle.hover() if hover else self.toggle.click())
+            return await container.wait_until_disappears()
+
+        return False
+
+
+class Field(Element):
+    """Field implementation
+    """
+
+    async def label(self):
+        """Returns the label for the input item
+
+        :return: Field label
+        :rtype: str
+        """
+
+        field_id = await self.get_attribute('id')
+
+        if field_id:
+            return await Text(self.driver, By.XPATH, '//label[@for="{0}"]'.format(field_id)).visible_text()
+
+        return ''
+
+
+class Form(Element):
+    """The Form implementation, see :class:`sda.structures.Form`
+    """
+
+    async def get_field(self, field_name):
+        """Returns field with name `field_name`
+
+        :param str field_name: Form field to get
+        :return: InputText or Select, or None if the form has no such field
+        :raises TypeError: If field_name is not a string
+        """
+
+        if not isinstance(field_name, string_types):
+            raise TypeError
+
+        types = {
+            'input': InputText,
+            'textarea': InputText,
+            'select': Select
+        }
+
+        paths = {
+            'input': '/descendant-or-self::*[((self::input and @type="text") or self::textarea) and @name="{}"]',
+            'textarea': '/descendant-or-self::*[((self::input and @type="text") or self::textarea) and @name="{}"]',
+            'select': '/descendant-or-self::*[self::select and @name="{}"]'
+        }
+
+        xpath = '/descendant-or-self::*[((self::input and @type="text") or ' \
+                'self::textarea or self::select) and @name="{}"]'
+
+        try:
+            fields = await self.driver.find_elements(*join(self.search_term, (By.XPATH, xpath.format(field_name))))
+
+        except WebDriverException:
+            return None
+
+        if not fields:
+            return None
+
+        tag_name = await fields[0].tag_name()
+        field_type = types.get(tag_name)
+
+        if field_type:
+            return field_type(self.driver, *join(self.search_term, (By.XPATH, paths[tag_name].format(field_name))))
+
+        warnings.warn('{} type not currently supported within form'.format(str(tag_name)))
+
+
+class Image(Element):
+    """The Image implementation, see :class:`sda.structures.Image`
+    """
+
+    async def source(self):
+        """Returns image source URL
+
+        :return: Image source URL
+        :rtype: str
+        """
+
+        return await self.get_attribute('src')
+
+
+class InputCheckbox(Field, SelectiveMixin):
+    """The InputCheckbox implementation, see :class:`sda.structures.InputCheckbox`
+    """
+
+    pass
+
+
+class InputRadio(InputCheckbox, SelectiveMixin):
+    """The InputRadio implementation, see :class:`sda.structures.InputRadio`
+    """
+
+    pass
+
+
+class InputText(Field, InputMixin, ClickMixin):
+    """The InputText implementation, see :class:`sda.structures.InputText`
+    """
+
+    pass
+
+
+class Link(Button, ClickMixin, TextMixin):
+    """The Link implementation, see :class:`sda.structures.Link`
+    """
+
+    pass
+
+
+class MultiSelect(Element):
+    """The MultiSelect implementation, see :class:`sda.structures.MultiSelect`
+    """
+
+    def _button(self, xpath):
+        return Button(self.driver, *join(self.search_term, (By.XPATH, xpath)))
+
+    @property
+    def _container(self):
+
+        xpath = '/descendant-or-self::div[contains(@class, "checkboxLayer")]'
+
+        return Div(self.driver, *join(self.search_term, (By.XPATH, xpath)))
+
+    @property
+    def _toggle(self):
+        return self._button('/descendant-or-self::button[contains(@ng-click, "toggle")]')
+
+    @property
+    def _filter(self):
+
+        xpath = '/descendant-or-self::input[contains(@ng-click, "filter")]'
+
+        return InputText(self.driver, *join(self.search_term, (By.XPATH, xpath)))
+
+    async def _get_index(self, idx):
+
+        idx = to_int(idx)
+        xpath = '/descendant-or-self::div[contains(@ng-repeat, "filteredModel")][{}]'
+
+        if isinstance(idx, int) and idx in range(0, len(await self.options())):
+            return self._button(xpath.format(idx))
+
+    def _get_text(self, text):
+
+        xpath = '/descendant-or-self::label[contains(., "{}")]/ancestor::div[contains(@ng-repeat, "filteredModel")]'
+
+        if isinstance(text, string_types):
+            return self._button(xpath.format(text))
+
+    async def _labels(self, xpath):
+
+        try:
+            labels = await self.driver.find_elements(*join(self.search_term, (By.XPATH, xpath)))
+
+        except WebDriverException:
+            return []
+
+        return [await label.get_property('textContent') for label in labels]
+
+    async def _set(self, option, selected):
+
+        if option is None or not await option.exists():
+            return False
+
+        if ('selected' in (await option.get_attribute('class')).split()) != selected:
+            return await option.click()
+
+        return False
+
+    async def expand(self):
+        """Show iSteven dropdown
+
+        :return: True, if the dropdown appeared
+        :rtype: bool
+        """
+
+        if not await self._container.is_displayed():
+
+            await self._toggle.click()
+            return await self._container.wait_until_appears()
+
+        return False
+
+    async def collapse(self):
+        """Hide iSteven dropdown
+
+        :return: True, if the dropdown disappeared
+        :rtype: bool
+        """
+
+        if await self._container.is_displayed():
+
+            await self._toggle.click()
+            return await self._container.wait_until_disappears()
+
+        return False
+
+    async def select_all(self):
+        """Select all possible selections
+
+        :return:
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._button('/descendant-or-self::button[contains(@ng-click, "all")]').click()
+
+    async def select_none(self):
+        """Deselect all selections
+
+        :return:
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._button('/descendant-or-self::button[contains(@ng-click, "none")]').click()
+
+    async def reset(self):
+        """Reset selection to default state
+
+        :return:
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._button('/descendant-or-self::button[contains(@ng-click, "reset")]').click()
+
+    async def search(self, value, clear=True):
+        """Filter selections to those matching search criteria
+
+        :param str value: Search criteria
+        :param bool clear: Clear previous search criteria
+        :return:
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._filter.input(value, clear=clear)
+
+    async def clear_search(self):
+        """Click clear search button
+
+        :return:
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._button('/descendant-or-self::button[contains(@ng-click, "clear")]').click()
+
+    async def select_by_index(self, index):
+        """Select option at index 'i'
+
+        :param str index: Index
+        :return: True, if the option was clicked
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._set(await self._get_index(index), True)
+
+    async def select_by_text(self, text):
+        """Select option that matches text criteria
+
+        :param str text: Text criteria
+        :return: True, if the option was clicked
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._set(self._get_text(text), True)
+
+    async def deselect_by_index(self, index):
+        """Deselect option at index 'i'
+
+        :param str index: Index
+        :return: True, if the option was clicked
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._set(await self._get_index(index), False)
+
+    async def deselect_by_text(self, text):
+        """Deselect option that matches text criteria
+
+        :param str text: Text criteria
+        :return: True, if the option was clicked
+        :rtype: bool
+        """
+
+        await self.expand()
+        return await self._set(self._get_text(text), False)
+
+    async def options(self, include_group=True):
+        """Return all available options
+
+        :param bool include_group: True, to include groupings
+        :return: List of options
+        :rtype: list
+        """
+
+        if include_group:
+            return await self._labels('/descendant-or-self::div[contains(@ng-repeat, "filteredModel")]//label')
+
+        return await self._labels('/descendant-or-self::div[contains(@ng-repeat, "filteredModel") and '
+                                  'not(contains(@class, "multiSelectGroup"))]//label')
+
+    async def selected_options(self):
+        """Return all selected options
+
+        :return: List of selected options
+        :rtype: list
+        """
+
+        return await self._labels('/descendant-or-self::div[contains(@ng-repeat, "filteredModel") and '
+                                  'contains(@class, "selected")]//label')
+
+
+class Select(Element, SelectMixin):
+    """The Select implementation, see :class:`sda.structures.Select`
+    """
+
+    pass
+
+
+class Text(Element, TextMixin, ClickMixin):
+    """The Text implementation, see :class:`sda.structures.Text`
+    """
+
+    pass
+
+
+MEMBERS = inspect.getmembers(sys.modules[__name__], predicate=lambda o: inspect.isclass(o) and issubclass(o, Element))
+TYPES = {_type[0].lower(): _type[1] for _type in MEMBERS}
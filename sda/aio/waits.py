@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""sda.aio.waits
+
+Async waits. Like :func:`sda.wait_all`, every poll checks all waited elements in one script, and the loop sleeps with
+``asyncio.sleep`` so other sessions keep running. Timeouts come from the timeout profile (see :mod:`sda.waits`) and
+waits are reported to running wait recorders.
+
+.. note:: :func:`sda.deadline` is per thread, and every task on an event loop shares one thread, so it is not
+    applied here.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import asyncio
+import time
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.wait import POLL_FREQUENCY
+from sda import scripts
+from sda.waits import DEFAULT_TIMEOUT, KINDS, MISSING, STATES, Wait, _PROFILE, _record, _is_number
+
+__all__ = ['states', 'timeout_for', 'wait_all', 'wait_any', 'wait_until']
+
+
+def timeout_for(locator, kind, timeout=None):
+    """Returns the timeout a wait uses: explicit, then the timeout profile, then 30 seconds
+
+    :param str locator: Locator path
+    :param str kind: 'present', 'appears' or 'disappears'
+    :param timeout: Timeout given by the caller, or None
+    :return: Timeout in seconds
+    :rtype: float
+    """
+
+    if _is_number(timeout):
+        return timeout
+
+    profiled = _PROFILE.get('timeouts', {}).get(locator, {}).get(kind)
+
+    return profiled if profiled is not None else _PROFILE.get('default', DEFAULT_TIMEOUT)
+
+
+async def states(web_driver, elements):
+    """Returns whether each element is missing, hidden or displayed, in one round trip
+
+    :param AsyncWebDriver web_driver: Async web driver
+    :param list elements: sda.aio elements
+    :return: One of sda.waits.MISSING, HIDDEN or DISPLAYED per element
+    :rtype: list
+    """
+
+    try:
+        return await web_driver.execute_script(scripts.ELEMENT_STATES, [element.search_term[1] for element in elements])
+
+    except WebDriverException:
+        return [MISSING] * len(elements)
+
+
+async def _wait_many(elements, condition, timeout, any_met):
+
+    keys = sorted(elements) if isinstance(elements, dict) else None
+    items = [elements[key] for key in keys] if keys is not None else list(elements)
+    kind = condition if condition in STATES else KINDS.get(condition)
+
+    if kind is None:
+        raise ValueError('Cannot wait for {!r} on several elements. Use {}'.format(
+            condition, ', '.join(sorted(STATES))))
+
+    if not items:
+        return {} if keys is not None else []
+
+    web_driver = items[0].driver
+    locators = [element.search_term[1] for element in items]
+    timeouts = [timeout_for(locator, kind, timeout) for locator in locators]
+    met_at = [None] * len(items)
+    start = time.time()
+
+    while True:
+
+        current = await states(web_driver, items)
+        elapsed = time.time() - start
+
+        for index, state in enumerate(current):
+            if met_at[index] is None and state in STATES[kind]:
+                met_at[index] = elapsed
+
+        # Elements still worth polling for: not met yet and within their own timeout
+        pending = [seconds - elapsed for seconds, at in zip(timeouts, met_at) if at is None and elapsed < seconds]
+
+        if not pending or (any_met and any(at is not None for at in met_at)):
+            break
+
+        await asyncio.sleep(min(POLL_FREQUENCY, max(pending)))
+
+    end = time.time() - start
+    results = []
+
+    for locator, seconds, at in zip(locators, timeouts, met_at):
+
+        entry = Wait(locator, kind, seconds, start, at if at is not None else min(end, seconds), at is not None)
+        results.append(entry)
+        _record(entry)
+
+    return dict(zip(keys, results)) if keys is not None else results
+
+
+async def wait_all(elements, condition='appears', timeout=None):
+    """Wait until every element meets a condition, see :func:`sda.waits.wait_all`
+
+    :param elements: List of elements, or dictionary of name to element. Elements must share a driver
+    :param condition: 'present', 'appears', 'disappears', or the matching Selenium expected condition factory
+    :param timeout: Timeout in seconds, or None to use the profile per element
+    :return: One :class:`sda.waits.Wait` per element, in the same list order or under the same names
+    :rtype: list or dict
+    :raises ValueError: If the condition cannot be checked in the browser
+    """
+
+    return await _wait_many(elements, condition, timeout, False)
+
+
+async def wait_any(elements, condition='appears', timeout=None):
+    """Wait until at least one element meets a condition, see :func:`sda.waits.wait_any`
+
+    :param elements: List of elements, or dictionary of name to element. Elements must share a driver
+    :param condition: 'present', 'appears', 'disappears', or the matching Selenium expected condition factory
+    :param timeout: Timeout in seconds, or None to use the profile per element
+    :return: One :class:`sda.waits.Wait` per element, in the same list order or under the same names
+    :rtype: list or dict
+    :raises ValueError: If the condition cannot be checked in the browser
+    """
+
+    return await _wait_many(elements, condition, timeout, True)
+
+
+async def wait_until(element, condition, timeout=None):
+    """Wait for one element to meet a condition
+
+    :param element: sda.aio element
+    :param condition: 'present', 'appears' or 'disappears'
+    :param timeout: Timeout in seconds, or None to use the profile
+    :return: True, if the condition was met before the timeout
+    :rtype: bool
+    """
+
+    return (await _wait_many([element], condition, timeout, False))[0].met
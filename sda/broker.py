@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+"""sda.broker
+
+A session broker for suites sharing one Selenium Grid. Session requests queue locally instead of piling up on the
+grid, each suite is capped, and free capacity goes to the waiting suite holding the fewest sessions, so a large suite
+cannot starve a small one. Session creation is retried with exponential backoff, and queue depth, active sessions and
+queue wait times are exported in the Prometheus text format.
+
+.. code-block:: python
+
+    from selenium import webdriver
+    from sda.broker import SessionBroker
+
+    def chrome():
+        return webdriver.Remote(GRID_URL, desired_capabilities={'browserName': 'chrome'})
+
+    broker = SessionBroker(chrome, grid_url=GRID_URL, caps={'checkout': 4}, per_suite=8)
+
+    with broker.session('checkout', timeout=600) as driver:
+        ExampleSite(driver).checkout.navigate_to()
+
+    print(broker.render())
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import itertools
+import json
+import random
+import threading
+import time
+import urllib3
+from selenium.common.exceptions import WebDriverException
+from sda.metrics import PERCENTILES, Latency, escape_label, format_sample, percentile
+from sda.pool import PoolTimeout
+
+__all__ = ['SessionBroker', 'grid_slots']
+
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_RETRIES = 3
+DEFAULT_SUITE = 'default'
+DEFAULT_WINDOW = 1000
+
+# Errors worth retrying: the grid refusing or timing out a session, or being unreachable for a moment
+RETRY_ERRORS = (WebDriverException, urllib3.exceptions.HTTPError, EnvironmentError)
+
+
+def grid_slots(url, timeout=5.0):
+    """Returns the session slots of a Selenium Grid 4, read from its /status endpoint
+
+    :param str url: Grid URL, ex. 'http://grid:4444' or 'http://grid:4444/wd/hub'
+    :param float timeout: Seconds to wait for the grid
+    :return: Counts of 'total' and 'free' slots on nodes that are up, or None if the grid does not list its slots
+    :rtype: dict
+    """
+
+    response = urllib3.PoolManager().request('GET', url.rstrip('/') + '/status', timeout=timeout, retries=False)
+    nodes = (json.loads(response.data.decode('utf-8')).get('value') or {}).get('nodes')
+
+    if nodes is None:
+        return None
+
+    slots = [slot for node in nodes if node.get('availability', 'UP') == 'UP' for slot in node.get('slots', [])]
+
+    return {'total': len(slots), 'free': sum(1 for slot in slots if not slot.get('session'))}
+
+
+class _Ticket(object):
+
+    __slots__ = ('suite', 'order', 'enqueued', 'granted')
+
+    def __init__(self, suite, order):
+
+        self.suite = suite
+        self.order = order
+        self.enqueued = time.time()
+        self.granted = False
+
+
+class SessionBroker(object):
+    """The SessionBroker implementation
+
+    Hands out at most ``capacity`` sessions at once. Sessions are created when granted and quit on release, so every
+    session the broker holds is one grid slot.
+    """
+
+    def __init__(self, factory, capacity=None, grid_url=None, caps=None, per_suite=None, retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF, window=DEFAULT_WINDOW):
+        """Session broker
+
+        :param factory: Callable returning a new Selenium web driver, ex. a webdriver.Remote on the grid
+        :param int capacity: Sessions at once. Defaults to the slots of the grid at ``grid_url``
+        :param str grid_url: Grid to read the capacity from, see :func:`grid_slots`
+        :param dict caps: Suite name to the most sessions that suite may hold at once
+        :param int per_suite: Cap for suites not in ``caps``, or None for no cap
+        :param int retries: Times a failed session creation is retried
+        :param float backoff: Seconds before the first retry, doubled on each retry after
+        :param float max_backoff: Longest wait between retries
+        :param int window: Recent queue waits per suite that quantiles are computed over
+        :raises ValueError: If there is neither a capacity nor a grid listing its slots
+        """
+
+        if capacity is None and grid_url is not None:
+            capacity = (grid_slots(grid_url) or {}).get('total')
+
+        if not capacity:
+            raise ValueError('SessionBroker needs a capacity, or a grid_url of a grid listing its slots')
+
+        self.factory = factory
+        self.capacity = capacity
+        self.grid_url = grid_url
+        self.caps = dict(caps or {})
+        self.per_suite = per_suite
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._order = itertools.count()
+        self._active = Counter()
+        self._owners = {}
+        self._created = Counter()
+        self._retried = Counter()
+        self._failed = Counter()
+        self._timeouts = Counter()
+        self._waits = defaultdict(lambda: Latency(window))
+
+    @property
+    def active(self):
+        """Returns the sessions held per suite, including those being created
+
+        :rtype: dict
+        """
+
+        with self._condition:
+            return dict((suite, count) for suite, count in self._active.items() if count)
+
+    @property
+    def depth(self):
+        """Returns the requests waiting per suite
+
+        :rtype: dict
+        """
+
+        with self._condition:
+            return dict(Counter(ticket.suite for ticket in self._queue))
+
+    def acquire(self, suite=DEFAULT_SUITE, timeout=None):
+        """Wait for a slot, then create a session in it
+
+        :param str suite: Suite requesting the session
+        :param float timeout: Seconds to wait in the queue, or None to wait forever. Creation retries are not counted
+        :return: Selenium web driver
+        :rtype: WebDriver
+        :raises PoolTimeout: If no slot was granted before the timeout
+        :raises Exception: The factory's last error, once every retry failed
+        """
+
+        end = time.time() + timeout if timeout is not None else None
+
+        with self._condition:
+
+            ticket = _Ticket(suite, next(self._order))
+            self._queue.append(ticket)
+            self._dispatch()
+
+            while not ticket.granted:
+
+                left = end - time.time() if end is not None else None
+
+                if left is not None and left <= 0:
+
+                    self._queue.remove(ticket)
+                    self._timeouts[suite] += 1
+                    raise PoolTimeout('No session slot for {!r} within {} seconds'.format(suite, timeout))
+
+                self._condition.wait(left)
+
+            self._waits[suite].add(time.time() - ticket.enqueued)
+
+        try:
+            web_driver = self._create(suite)
+
+        except Exception:
+
+            self._free(suite)
+            raise
+
+        with self._condition:
+            self._owners[id(web_driver)] = suite
+
+        return web_driver
+
+    def refresh_capacity(self):
+        """Read the capacity from the grid again, ex. after nodes joined or left
+
+        :return: Capacity, unchanged if the grid does not list its slots
+        :rtype: int
+        """
+
+        slots = grid_slots(self.grid_url) if self.grid_url else None
+
+        with self._condition:
+
+            if slots and slots['total']:
+                self.capacity = slots['total']
+                self._dispatch()
+
+            return self.capacity
+
+    def release(self, web_driver):
+        """Quit a session and give its slot to the next request
+
+        :param WebDriver web_driver: Session from :meth:`acquire`
+        :return:
+        :raises ValueError: If the session did not come from this broker
+        """
+
+        with self._condition:
+
+            suite = self._owners.pop(id(web_driver), None)
+
+            if suite is None:
+                raise ValueError('{!r} was not acquired from this broker'.format(web_driver))
+
+        # The grid frees the slot once the session is gone, whether or not quitting succeeds
+        try:
+            web_driver.quit()
+
+        except Exception:
+            pass
+
+        self._free(suite)
+
+    def render(self):
+        """Returns the broker's metrics in the Prometheus text exposition format
+
+        :return: Metrics
+        :rtype: str
+        """
+
+        with self._condition:
+
+            depth = Counter(ticket.suite for ticket in self._queue)
+            suites = sorted(set(depth) | set(self._active) | set(self._created) | set(self._failed) |
+                            set(self._timeouts))
+            lines = []
+
+            def metric(name, kind, description, samples):
+
+                lines.extend(['# HELP {} {}'.format(name, description), '# TYPE {} {}'.format(name, kind)])
+                lines.extend('{}{} {}'.format(sample, '{' + ','.join('{}="{}"'.format(key, escape_label(value))
+                                                                     for key, value in labels) + '}' if labels else '',
+                                              format_sample(value))
+                             for sample, labels, value in samples)
+
+            def per_suite(name, counts):
+                return [(name, [('suite', suite)], counts[suite]) for suite in suites]
+
+            def waited(suite):
+
+                name, latency = 'sda_broker_queue_wait_seconds', self._waits[suite]
+                samples = [(name, [('suite', suite), ('quantile', str(rank / 100.0))],
+                            percentile(list(latency.window), rank)) for rank in PERCENTILES]
+
+                return samples + [(name + '_sum', [('suite', suite)], latency.total),
+                                  (name + '_count', [('suite', suite)], latency.count)]
+
+            metric('sda_broker_capacity', 'gauge', 'Sessions the broker allows at once.',
+                   [('sda_broker_capacity', [], self.capacity)])
+            metric('sda_broker_queue_depth', 'gauge', 'Session requests waiting for a slot.',
+                   per_suite('sda_broker_queue_depth', depth))
+            metric('sda_broker_active_sessions', 'gauge', 'Sessions held, including those being created.',
+                   per_suite('sda_broker_active_sessions', self._active))
+            metric('sda_broker_sessions_created_total', 'counter', 'Sessions created.',
+                   per_suite('sda_broker_sessions_created_total', self._created))
+            metric('sda_broker_session_retries_total', 'counter', 'Session creations retried.',
+                   per_suite('sda_broker_session_retries_total', self._retried))
+            metric('sda_broker_session_failures_total', 'counter', 'Session creations that failed every retry.',
+                   per_suite('sda_broker_session_failures_total', self._failed))
+            metric('sda_broker_queue_timeouts_total', 'counter', 'Requests that gave up waiting for a slot.',
+                   per_suite('sda_broker_queue_timeouts_total', self._timeouts))
+            metric('sda_broker_queue_wait_seconds', 'summary', 'Time requests waited for a slot, over recent requests.',
+                   [sample for suite in suites if suite in self._waits for sample in waited(suite)])
+
+        return '\n'.join(lines) + '\n'
+
+    @contextmanager
+    def session(self, suite=DEFAULT_SUITE, timeout=None):
+        """Hold a session for the block and release it afterwards
+
+        :param str suite: Suite requesting the session
+        :param float timeout: Seconds to wait in the queue, or None to wait forever
+        :return: Selenium web driver
+        :rtype: WebDriver
+        """
+
+        web_driver = self.acquire(suite, timeout)
+
+        try:
+            yield web_driver
+
+        finally:
+            self.release(web_driver)
+
+    def _cap(self, suite):
+        return self.caps.get(suite, self.per_suite)
+
+    def _create(self, suite):
+
+        for attempt in itertools.count():
+
+            try:
+                web_driver = self.factory()
+
+            except RETRY_ERRORS:
+
+                if attempt >= self.retries:
+
+                    with self._condition:
+                        self._failed[suite] += 1
+
+                    raise
+
+                with self._condition:
+                    self._retried[suite] += 1
+
+                # Full jitter keeps suites that failed together from retrying together
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+                continue
+
+            with self._condition:
+                self._created[suite] += 1
+
+            return web_driver
+
+    def _dispatch(self):
+
+        # Callers hold the condition
+        granted = False
+
+        while sum(self._active.values()) < self.capacity:
+
+            eligible = [ticket for ticket in self._queue
+                        if self._cap(ticket.suite) is None or self._active[ticket.suite] < self._cap(ticket.suite)]
+
+            if not eligible:
+                break
+
+            # Fewest sessions held first, then first come
+            ticket = min(eligible, key=lambda item: (self._active[item.suite], item.order))
+            ticket.granted = True
+            self._queue.remove(ticket)
+            self._active[ticket.suite] += 1
+            granted = True
+
+        if granted:
+            self._condition.notify_all()
+
+    def _free(self, suite):
+
+        with self._condition:
+
+            self._active[suite] -= 1
+            self._dispatch()
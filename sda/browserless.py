@@ -0,0 +1,1014 @@
+# -*- coding: utf-8 -*-
+"""sda.browserless
+
+A WebDriver for server-rendered pages. Pages are fetched over plain HTTP with pooled keep-alive connections, redirects
+are followed and locators are evaluated with lxml in-process. No JavaScript runs, so only checks that read the HTML
+the server sends belong here.
+
+.. code-block:: python
+
+    from sda.browserless import BrowserlessDriver
+
+    driver = BrowserlessDriver()
+    driver.get('https://www.example.com/')
+
+    ExamplePage(driver).header.text()  # 'Example Domain'
+
+Visibility is approximated from markup (``hidden``, ``type="hidden"`` and inline ``display``/``visibility``/
+``opacity`` styles); stylesheets are not evaluated.
+
+Windows opened through ``scripts.OPEN_WINDOW`` keep their own page and history, and load at once since nothing runs
+in the background.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from __future__ import unicode_literals
+from collections import OrderedDict
+import itertools
+import pkgutil
+import re
+import time
+import urllib3
+from lxml import html
+from lxml.cssselect import CSSSelector
+from lxml.etree import ParserError, XPathError
+from selenium.common.exceptions import InvalidSelectorException, JavascriptException, NoSuchElementException, \
+    NoSuchWindowException, StaleElementReferenceException, WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.errorhandler import ErrorCode
+from selenium.webdriver.remote.webdriver import WebDriver
+from sda import scripts
+from sda.waits import DEFAULT_PAGE_LOAD_TIMEOUT, GET_TIMEOUTS
+
+try:
+    from Cookie import SimpleCookie
+    from urllib import urlencode
+    from urlparse import urljoin, urlparse
+except (ImportError, ModuleNotFoundError):
+    from http.cookies import SimpleCookie
+    from urllib.parse import urlencode, urljoin, urlparse
+
+__all__ = ['BrowserlessDriver', 'BrowserlessExecutor', 'Document', 'OfflineExecutor']
+
+BLANK = '<html><head><title></title></head><body></body></html>'
+DEFAULT_HEADERS = {'User-Agent': 'sda-browserless', 'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'}
+MAIN_WINDOW = 'main'
+MAX_REDIRECTS = 10
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+ELEMENT_KEYS = ('ELEMENT', 'element-6066-11e4-a52e-4f735466cecf')
+BOOLEAN_ATTRIBUTES = ('allowfullscreen async autofocus autoplay checked compact controls declare default '
+                      'defaultchecked defaultselected defer disabled formnovalidate hidden indeterminate ismap '
+                      'itemscope loop multiple muted nohref noresize noshade novalidate nowrap open readonly required '
+                      'reversed scoped seamless selected').split()
+BLOCK_TAGS = ('p', 'div', 'li', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'ul', 'ol', 'form', 'option', 'table',
+              'section', 'article', 'header', 'footer', 'nav')
+INVISIBLE_TAGS = ('head', 'script', 'style', 'title', 'meta', 'link', 'template', 'noscript')
+
+# Commands answered after the current window was closed
+WINDOWLESS_COMMANDS = (Command.NEW_SESSION, Command.QUIT, Command.SWITCH_TO_WINDOW, Command.GET_WINDOW_HANDLES,
+                       Command.W3C_GET_WINDOW_HANDLES)
+
+# Scripts sda and Selenium send that are not in sda.scripts
+FOCUS = 'arguments[0].focus();'
+BLUR = 'arguments[0].blur();'
+SCROLL = 'var vHeight = Math.max(document.documentElement.clientHeight, window.innerHeight || 0);' \
+         'var eTop = arguments[0].getBoundingClientRect().top;' \
+         'window.scrollBy(0, eTop-(vHeight/2));'
+
+# Atoms W3C clients send for get_attribute and is_displayed
+GET_ATTRIBUTE_ATOM = 'return (%s).apply(null, arguments);' % pkgutil.get_data(
+    'selenium.webdriver.remote', 'getAttribute.js').decode('utf8')
+IS_DISPLAYED_ATOM = 'return (%s).apply(null, arguments);' % pkgutil.get_data(
+    'selenium.webdriver.remote', 'isDisplayed.js').decode('utf8')
+
+
+def charset(headers):
+    """Returns the charset of a Content-Type header
+
+    :param headers: Response headers
+    :return: Charset, or None if the header does not name one
+    :rtype: str
+    """
+
+    match = re.search(r'charset=["\']?([\w.:-]+)', headers.get('Content-Type') or '', re.IGNORECASE)
+
+    return match.group(1) if match else None
+
+
+def collapse(text):
+    """Collapse runs of whitespace the way rendered text does
+
+    :param str text: Text
+    :return: Collapsed text
+    :rtype: str
+    """
+
+    return ' '.join(text.split())
+
+
+class Document(object):
+    """The Document implementation
+
+    An lxml document standing in for a browser window. Element references handed out to the client stay valid until
+    the next navigation.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url, source, encoding=None):
+        """Parsed page
+
+        :param str url: Page URL
+        :param source: HTML source, as text or bytes
+        :param str encoding: Charset of bytes source, ex. from the Content-Type header. Without one, lxml looks for
+            a <meta charset> in the page
+        """
+
+        self.url = url
+        parser = None
+
+        if encoding and isinstance(source, bytes):
+
+            try:
+                parser = html.HTMLParser(encoding=encoding)
+
+            # A charset lxml does not know is ignored, as browsers do
+            except LookupError:
+                pass
+
+        try:
+            self.root = html.fromstring(source or BLANK, parser=parser)
+
+        except (ParserError, ValueError):
+            self.root = html.fromstring(BLANK)
+
+        self.tree = self.root.getroottree()
+        self.load_id = 'doc{}'.format(next(self._ids))
+        self.mutations = 0
+
+        self._nodes = {}
+        self._refs = {}
+
+    @property
+    def generation(self):
+        """Page generation, see :mod:`sda.cache`"""
+
+        return '{}:{}'.format(self.load_id, self.mutations)
+
+    @property
+    def title(self):
+        """Document title"""
+
+        title = self.tree.find('.//title')
+
+        return collapse(title.text_content()) if title is not None else ''
+
+    def ref(self, node):
+        """Returns a JSON element reference for a node"""
+
+        element_id = self._refs.get(node)
+
+        if element_id is None:
+            element_id = self._refs[node] = 'node-{}'.format(next(self._ids))
+            self._nodes[element_id] = node
+
+        return dict((key, element_id) for key in ELEMENT_KEYS)
+
+    def node(self, reference):
+        """Returns the node for an element id or reference"""
+
+        if isinstance(reference, dict):
+            reference = next((reference[key] for key in ELEMENT_KEYS if key in reference), None)
+
+        if reference not in self._nodes:
+            raise StaleElementReferenceException('Element {} is not attached to the page document'.format(reference))
+
+        return self._nodes[reference]
+
+    def find(self, using, value, context=None):
+        """Returns all nodes matching a Selenium locator
+
+        :param str using: Selenium By locator
+        :param str value: Locator value
+        :param context: Node to search within, or None for the whole document
+        :return: Matching nodes
+        :rtype: list
+        """
+
+        scope = self.tree if context is None else context
+        prefix = '' if context is None else '.'
+
+        try:
+
+            if using == 'xpath':
+                nodes = scope.xpath(value)
+
+            elif using == 'css selector':
+                nodes = scope.xpath(CSSSelector(value).path)
+
+            elif using == 'tag name':
+                nodes = scope.xpath('{}//{}'.format(prefix, value))
+
+            elif using == 'id':
+                nodes = scope.xpath('{}//*[@id=$value]'.format(prefix), value=value)
+
+            elif using == 'name':
+                nodes = scope.xpath('{}//*[@name=$value]'.format(prefix), value=value)
+
+            elif using == 'class name':
+                nodes = scope.xpath('{}//*[contains(concat(" ", normalize-space(@class), " "), $value)]'
+                                    .format(prefix), value=' {} '.format(value))
+
+            elif using in ('link text', 'partial link text'):
+                nodes = [node for node in scope.xpath('{}//a'.format(prefix))
+                         if (collapse(node.text_content()) == value if using == 'link text'
+                             else value in collapse(node.text_content()))]
+
+            else:
+                raise InvalidSelectorException('Unsupported locator strategy: {}'.format(using))
+
+        except (XPathError, ValueError) as error:
+            raise InvalidSelectorException('Invalid selector {}: {}'.format(value, error))
+
+        return [node for node in nodes if isinstance(getattr(node, 'tag', None), str)] \
+            if isinstance(nodes, list) else []
+
+    def first(self, xpath):
+        """Returns the first node matching an xpath, or None"""
+
+        nodes = self.find('xpath', xpath)
+
+        return nodes[0] if nodes else None
+
+    def attribute(self, node, name):
+        """Returns what WebElement.get_attribute returns for a name"""
+
+        lower = name.lower()
+        tag = node.tag.lower()
+
+        if lower == 'style':
+            return node.get('style', '')
+
+        if lower in ('selected', 'checked') and (tag == 'option' or node.get('type') in ('checkbox', 'radio')):
+            return 'true' if self.selected(node) else None
+
+        if (tag == 'img' and lower == 'src') or (tag == 'a' and lower == 'href'):
+            return urljoin(self.url, node.get(lower)) if node.get(lower) is not None else None
+
+        if lower in BOOLEAN_ATTRIBUTES:
+            return 'true' if node.get(lower) is not None else None
+
+        properties = {
+            'textcontent': lambda: node.text_content(),
+            'innertext': lambda: self.text(node),
+            'outerhtml': lambda: html.tostring(node, encoding='unicode', with_tail=False),
+            'innerhtml': lambda: (node.text or '') + ''.join(html.tostring(child, encoding='unicode')
+                                                             for child in node),
+            'tagname': lambda: node.tag.upper(),
+            'classname': lambda: node.get('class', ''),
+            'class': lambda: node.get('class', ''),
+            'id': lambda: node.get('id', ''),
+            'index': lambda: str(node.xpath('ancestor::select[1]//option')[0:].index(node))
+            if tag == 'option' and node.xpath('ancestor::select') else None,
+            'value': lambda: (collapse(node.text_content()) if tag == 'option' else '') if node.get('value') is None
+            else node.get('value')
+        }
+
+        if lower in properties:
+
+            value = properties[lower]()
+
+            if value is not None:
+                return value
+
+        return node.get(name)
+
+    def attributes(self, node, name):
+        """Returns every attribute set on a node plus the requested name, see sda.scripts.ATTRIBUTES"""
+
+        values = dict((key, self.attribute(node, key)) for key in node.attrib)
+        values[name] = self.attribute(node, name)
+
+        return values
+
+    def displayed(self, node):
+        """Approximates Selenium's isDisplayed from markup alone: hidden attributes, inline styles and tag names"""
+
+        if node.tag == 'input' and (node.get('type') or '').lower() == 'hidden':
+            return False
+
+        if node.tag in ('option', 'optgroup'):
+
+            select = node.xpath('ancestor::select[1]')
+
+            if select:
+                return self.displayed(select[0])
+
+        for current in itertools.chain([node], node.iterancestors()):
+
+            style = re.sub(r'\s+', '', (current.get('style') or '').lower())
+
+            if current.tag in INVISIBLE_TAGS or current.get('hidden') is not None or 'display:none' in style \
+                    or 'visibility:hidden' in style or 'opacity:0;' in style + ';':
+                return False
+
+        return True
+
+    def selected(self, node):
+        """Returns True if an option, checkbox or radio is selected"""
+
+        return node.get('selected' if node.tag == 'option' else 'checked') is not None
+
+    def style(self, node, name):
+        """Returns the inline value of a CSS property. Stylesheets are not evaluated"""
+
+        for declaration in (node.get('style') or '').split(';'):
+
+            key, _, value = declaration.partition(':')
+
+            if key.strip().lower() == name.lower():
+                return value.strip()
+
+        return 'none' if name == 'display' and not self.displayed(node) else ''
+
+    def text(self, node):
+        """Returns the visible text of a node"""
+
+        if not self.displayed(node):
+            return ''
+
+        parts = [node.text or '']
+
+        for child in node:
+
+            if isinstance(child.tag, str) and self.displayed(child):
+                parts.append(self.text(child))
+
+                if child.tag in BLOCK_TAGS:
+                    parts.append('\n')
+
+            parts.append(child.tail or '')
+
+        return '\n'.join(collapse(line) for line in ''.join(parts).split('\n') if collapse(line))
+
+    def click(self, node):
+        """Simulate a click on server-rendered markup
+
+        Toggles options, checkboxes and radios. Links and submit buttons return the request the browser would send.
+
+        :param node: Clicked node
+        :return: (method, url, fields) to load, or None
+        :rtype: tuple
+        """
+
+        self.mutations += 1
+
+        if node.tag == 'option':
+
+            select = node.xpath('ancestor::select[1]')
+
+            if select and select[0].get('multiple') is None:
+
+                for option in select[0].iter('option'):
+                    option.attrib.pop('selected', None)
+
+                node.set('selected', '')
+
+            elif self.selected(node):
+                del node.attrib['selected']
+
+            else:
+                node.set('selected', '')
+
+        elif node.tag == 'input' and node.get('type') == 'checkbox':
+
+            if self.selected(node):
+                del node.attrib['checked']
+
+            else:
+                node.set('checked', '')
+
+        elif node.tag == 'input' and node.get('type') == 'radio':
+
+            for radio in self.tree.xpath('//input[@type="radio" and @name=$name]', name=node.get('name', '')):
+                radio.attrib.pop('checked', None)
+
+            node.set('checked', '')
+
+        elif node.tag == 'a' and node.get('href') and not node.get('href').startswith('#'):
+            return 'GET', urljoin(self.url, node.get('href')), None
+
+        elif (node.tag == 'button' and (node.get('type') or 'submit').lower() == 'submit') or \
+                (node.tag == 'input' and (node.get('type') or '').lower() in ('submit', 'image')):
+
+            form = node.xpath('ancestor::form[1]')
+
+            if form:
+                return self.submit(form[0], node)
+
+        return None
+
+    def submit(self, form, submitter=None):
+        """Returns the request submitting a form would send
+
+        :param form: Form node
+        :param submitter: Button used to submit the form
+        :return: (method, url, fields)
+        :rtype: tuple
+        """
+
+        fields = []
+
+        for field in form.xpath('.//input | .//select | .//textarea'):
+
+            name = field.get('name')
+            kind = (field.get('type') or '').lower()
+
+            if not name or field.get('disabled') is not None or kind in ('submit', 'image', 'button', 'reset', 'file'):
+                continue
+
+            if kind in ('checkbox', 'radio'):
+
+                if self.selected(field):
+                    fields.append((name, field.get('value', 'on')))
+
+            elif field.tag == 'select':
+                fields.extend((name, self.attribute(option, 'value')) for option in field.iter('option')
+                              if self.selected(option))
+
+            elif field.tag == 'textarea':
+                fields.append((name, field.text or ''))
+
+            else:
+                fields.append((name, field.get('value', '')))
+
+        if submitter is not None and submitter.get('name'):
+            fields.append((submitter.get('name'), submitter.get('value', '')))
+
+        method = (form.get('method') or 'get').upper()
+        action = urljoin(self.url, form.get('action') or self.url)
+
+        if method == 'GET':
+            return 'GET', '{}?{}'.format(action.split('?')[0], urlencode(fields)), None
+
+        return 'POST', action, fields
+
+
+class BrowserlessExecutor(object):
+    """The BrowserlessExecutor implementation
+
+    Stands in for selenium's RemoteConnection, answering every command from the current :class:`Document`. Pages are
+    loaded by :meth:`fetch`, which subclasses can replace to serve pages from elsewhere. Handlers can be replaced per
+    command name with :meth:`script`, and sda-style scripts can be answered with :meth:`on_script`.
+    """
+
+    document_class = Document
+
+    def __init__(self, headers=None, timeout=30.0, max_redirects=MAX_REDIRECTS, maxsize=10, retries=2):
+        """Browserless command executor
+
+        :param dict headers: Extra request headers
+        :param float timeout: Seconds to wait for a response
+        :param int max_redirects: Redirects to follow before giving up
+        :param int maxsize: Keep-alive connections kept per host
+        :param int retries: Times to retry a failed connection
+        """
+
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.max_redirects = max_redirects
+        self.cookies = {}
+        self.history = []
+        self.position = -1
+        self.implicit_wait = 0
+        self.page_load_timeout = DEFAULT_PAGE_LOAD_TIMEOUT
+        self.status = None
+        self.started = time.time() * 1000
+        self.w3c = False
+
+        # Window handle to name, in the order the windows were opened, and the state of every window but the current
+        self.window = MAIN_WINDOW
+        self.window_names = OrderedDict([(MAIN_WINDOW, '')])
+        self.windows = {}
+
+        self._window_ids = itertools.count(1)
+
+        self._http = None
+        self._http_options = {'timeout': timeout, 'maxsize': maxsize,
+                              'retries': urllib3.Retry(total=retries, redirect=False, raise_on_status=False)}
+
+        self.document = self.document_class('about:blank', BLANK)
+        self.handlers = {
+            Command.NEW_SESSION: lambda params: {'browserName': 'browserless', 'javascriptEnabled': False},
+            Command.QUIT: lambda params: self.close(),
+            Command.GET: lambda params: self.navigate(params['url']),
+            Command.REFRESH: lambda params: self.load('GET', self.document.url),
+            Command.GO_BACK: lambda params: self._travel(-1),
+            Command.GO_FORWARD: lambda params: self._travel(1),
+            Command.GET_CURRENT_URL: lambda params: self.document.url,
+            Command.GET_TITLE: lambda params: self.document.title,
+            Command.GET_PAGE_SOURCE: lambda params: html.tostring(self.document.root, encoding='unicode'),
+            Command.GET_CURRENT_WINDOW_HANDLE: lambda params: self.window,
+            Command.W3C_GET_CURRENT_WINDOW_HANDLE: lambda params: self.window,
+            Command.GET_WINDOW_HANDLES: lambda params: list(self.window_names),
+            Command.W3C_GET_WINDOW_HANDLES: lambda params: list(self.window_names),
+            Command.SWITCH_TO_WINDOW: self._switch_to_window,
+            Command.CLOSE: lambda params: self._close_window(),
+            Command.GET_ALL_COOKIES: lambda params: list(self.cookies.values()),
+            Command.ADD_COOKIE: lambda params: self._add_cookie(params['cookie']),
+            Command.DELETE_COOKIE: lambda params: self._delete_cookie(params['name']),
+            Command.DELETE_ALL_COOKIES: lambda params: self.cookies.clear(),
+            Command.IMPLICIT_WAIT: self._set_timeouts,
+            Command.SET_TIMEOUTS: self._set_timeouts,
+            GET_TIMEOUTS: lambda params: {'implicit': int(self.implicit_wait * 1000), 'script': 30000,
+                                          'pageLoad': int(self.page_load_timeout * 1000)},
+            Command.FIND_ELEMENT: lambda params: self._find(params, single=True),
+            Command.FIND_ELEMENTS: self._find,
+            Command.FIND_CHILD_ELEMENT: lambda params: self._find(params, single=True),
+            Command.FIND_CHILD_ELEMENTS: self._find,
+            Command.GET_ELEMENT_ATTRIBUTE: lambda params: self.document.attribute(self._node(params), params['name']),
+            Command.GET_ELEMENT_PROPERTY: lambda params: self.document.attribute(self._node(params), params['name']),
+            Command.GET_ELEMENT_TEXT: lambda params: self.document.text(self._node(params)),
+            Command.GET_ELEMENT_TAG_NAME: lambda params: self._node(params).tag,
+            Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY: lambda params: self.document.style(self._node(params),
+                                                                                          params['propertyName']),
+            Command.IS_ELEMENT_DISPLAYED: lambda params: self.document.displayed(self._node(params)),
+            Command.IS_ELEMENT_SELECTED: lambda params: self.document.selected(self._node(params)),
+            Command.IS_ELEMENT_ENABLED: lambda params: self._node(params).get('disabled') is None,
+            Command.CLICK_ELEMENT: self._click,
+            Command.SUBMIT_ELEMENT: self._submit,
+            Command.CLEAR_ELEMENT: lambda params: self._type(params, None),
+            Command.SEND_KEYS_TO_ELEMENT: lambda params: self._type(params, ''.join(params['value'])),
+            Command.MOVE_TO: lambda params: None,
+            Command.CLICK: lambda params: None,
+            Command.DOUBLE_CLICK: lambda params: None,
+            Command.MOUSE_DOWN: lambda params: None,
+            Command.MOUSE_UP: lambda params: None,
+            Command.EXECUTE_SCRIPT: self._execute_script,
+            Command.W3C_EXECUTE_SCRIPT: self._execute_script,
+            Command.W3C_ACTIONS: lambda params: None,
+            Command.W3C_CLEAR_ACTIONS: lambda params: None,
+        }
+        self.scripts = {
+            scripts.GENERATION: lambda doc: doc.generation,
+            scripts.XPATH_EXISTS: lambda doc, xpath: doc.first(xpath) is not None,
+            scripts.TEXT_CONTENT: lambda doc, xpath: [doc.generation, self._with(doc.first(xpath),
+                                                                                 lambda node: node.text_content())],
+            scripts.OPTIONS: lambda doc, xpath: [doc.generation, self._with(
+                doc.first(xpath), lambda node: [[collapse(option.text_content()), doc.selected(option)]
+                                                for option in node.iter('option')] if node.tag == 'select' else None)],
+            scripts.ATTRIBUTES: lambda doc, xpath, name: [doc.generation, self._with(
+                doc.first(xpath), lambda node: doc.attributes(node, name))],
+            scripts.COMPUTED_STYLES: lambda doc, xpaths, names: [self._with(
+                doc.first(xpath), lambda node: dict((name, doc.style(node, name)) for name in names))
+                                                                 for xpath in xpaths],
+            scripts.LAYOUT: lambda doc, xpaths: [self._with(doc.first(xpath), lambda node: {
+                'x': 0, 'y': 0, 'width': 0, 'height': 0, 'displayed': doc.displayed(node),
+                'in_viewport': doc.displayed(node), 'covered': False}) for xpath in xpaths],
+            scripts.CLEAR_STORAGE: lambda doc: None,
+            scripts.ELEMENT_STATES: lambda doc, xpaths: [0 if node is None else 2 if doc.displayed(node) else 1
+                                                         for node in map(doc.first, xpaths)],
+            scripts.NAME_WINDOW: self._name_window,
+            scripts.OPEN_WINDOW: self._open_window,
+            scripts.READY: lambda doc, requested: not requested or self.started >= requested,
+            scripts.RESTORE_STORAGE: lambda doc, local, session: None,
+            scripts.SET_VALUE: self._set_value,
+            scripts.STORAGE: lambda doc: {'local': {}, 'session': {}},
+            FOCUS: lambda doc, node: None,
+            BLUR: lambda doc, node: None,
+            SCROLL: lambda doc, node: None,
+            GET_ATTRIBUTE_ATOM: lambda doc, node, name: doc.attribute(node, name),
+            IS_DISPLAYED_ATOM: lambda doc, node: doc.displayed(node),
+        }
+
+    @property
+    def http(self):
+        """Pooled HTTP client, created on first use"""
+
+        if self._http is None:
+            self._http = urllib3.PoolManager(**self._http_options)
+
+        return self._http
+
+    @staticmethod
+    def _with(node, func):
+        return func(node) if node is not None else None
+
+    def close(self):
+        """Close every pooled connection
+
+        :return:
+        """
+
+        if self._http is not None:
+            self._http.clear()
+
+    def execute(self, command, params):
+        """Execute a command, returning a JSON wire protocol response
+
+        :param str command: Selenium command name
+        :param dict params: Command parameters
+        :return: Response
+        :rtype: dict
+        """
+
+        handler = self.handlers.get(command)
+
+        if handler is None:
+            return {'status': ErrorCode.UNKNOWN_COMMAND[0], 'value': {'message': 'Unsupported command: ' + command}}
+
+        if self.window is None and command not in WINDOWLESS_COMMANDS:
+            return {'status': ErrorCode.NO_SUCH_WINDOW[0], 'value': {'message': 'The current window was closed'}}
+
+        try:
+            value = handler(params or {})
+
+        except InvalidSelectorException as error:
+            return {'status': ErrorCode.INVALID_SELECTOR[0], 'value': {'message': error.msg}}
+
+        except NoSuchElementException as error:
+            return {'status': ErrorCode.NO_SUCH_ELEMENT[0], 'value': {'message': error.msg}}
+
+        except NoSuchWindowException as error:
+            return {'status': ErrorCode.NO_SUCH_WINDOW[0], 'value': {'message': error.msg}}
+
+        except StaleElementReferenceException as error:
+            return {'status': ErrorCode.STALE_ELEMENT_REFERENCE[0], 'value': {'message': error.msg}}
+
+        except JavascriptException as error:
+            return {'status': ErrorCode.JAVASCRIPT_ERROR[0], 'value': {'message': error.msg}}
+
+        except WebDriverException as error:
+            return {'status': ErrorCode.UNKNOWN_ERROR[0], 'value': {'message': error.msg}}
+
+        if command == Command.NEW_SESSION:
+            return {'status': 0, 'sessionId': 'browserless', 'value': value}
+
+        return {'status': 0, 'value': value}
+
+    def fetch(self, method, url, fields=None):
+        """Send one request without following redirects
+
+        :param str method: HTTP method
+        :param str url: Absolute URL
+        :param list fields: Form fields to send url-encoded
+        :return: HTTP status, response headers, body
+        :rtype: tuple
+        """
+
+        headers = dict(self.headers)
+        cookie = self._cookie_header(url)
+        body = None
+
+        if cookie:
+            headers['Cookie'] = cookie
+
+        if fields is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            body = urlencode(fields)
+
+        try:
+            response = self.http.request(method, url, body=body, headers=headers, redirect=False)
+
+        except urllib3.exceptions.HTTPError as error:
+            raise WebDriverException('Unable to load {}: {}'.format(url, error))
+
+        return response.status, response.headers, response.data
+
+    def load(self, method, url, fields=None, remember=True):
+        """Load a page, following redirects, and make it the current document
+
+        :param str method: HTTP method
+        :param str url: Absolute URL
+        :param list fields: Form fields to send url-encoded
+        :param bool remember: Add the final URL to the history
+        :return:
+        """
+
+        self.started = time.time() * 1000
+
+        for _ in range(self.max_redirects + 1):
+
+            status, headers, body = self.fetch(method, url, fields)
+            self._store_cookies(url, headers)
+
+            if status not in REDIRECT_CODES or not headers.get('Location'):
+                break
+
+            url = urljoin(url, headers['Location'])
+
+            if status == 303 or (status in (301, 302) and method == 'POST'):
+                method, fields = 'GET', None
+
+        else:
+            raise WebDriverException('Too many redirects loading {}'.format(url))
+
+        self.status = status
+        self.document = self.document_class(url, body, charset(headers))
+
+        if remember:
+            del self.history[self.position + 1:]
+            self.history.append(url)
+            self.position = len(self.history) - 1
+
+    def navigate(self, url):
+        """Load a URL the way WebDriver.get does
+
+        :param str url: Absolute URL
+        :return:
+        """
+
+        self.load('GET', url)
+
+    def on_script(self, source, handler):
+        """Answer a script with handler(document, *args)
+
+        :param str source: Script source
+        :param handler: Callable returning the script result
+        :return:
+        """
+
+        self.scripts[source] = handler
+
+    def script(self, command, handler):
+        """Answer a command with handler(params)
+
+        :param str command: Selenium command name
+        :param handler: Callable returning the response value
+        :return:
+        """
+
+        self.handlers[command] = handler
+
+    def _add_cookie(self, cookie):
+
+        cookie = dict(cookie)
+        cookie.setdefault('domain', urlparse(self.document.url).hostname or '')
+        cookie.setdefault('path', '/')
+        self.cookies[(cookie['domain'].lstrip('.'), cookie['path'], cookie['name'])] = cookie
+
+    def _click(self, params):
+
+        request = self.document.click(self._node(params))
+
+        if request:
+            self.load(*request)
+
+    def _close_window(self):
+
+        del self.window_names[self.window]
+        self.window = None
+        self.document, self.history, self.position = self.document_class('about:blank', BLANK), [], -1
+
+        return list(self.window_names)
+
+    def _cookie_header(self, url):
+
+        parsed = urlparse(url)
+        host = parsed.hostname or ''
+        path = parsed.path or '/'
+
+        return '; '.join('{}={}'.format(cookie['name'], cookie['value'])
+                         for (domain, prefix, _), cookie in sorted(self.cookies.items())
+                         if (host == domain or host.endswith('.' + domain)) and path.startswith(prefix)
+                         and (parsed.scheme == 'https' or not cookie.get('secure')))
+
+    def _delete_cookie(self, name):
+
+        for key in [key for key in self.cookies if key[2] == name]:
+            del self.cookies[key]
+
+    def _execute_script(self, params):
+
+        source = params['script']
+        handler = self.scripts.get(source)
+
+        if handler is None:
+            raise JavascriptException('Unsupported script: {}'.format(source[:80]))
+
+        args = [self.document.node(arg) if isinstance(arg, dict) and any(key in arg for key in ELEMENT_KEYS)
+                else arg for arg in params.get('args', [])]
+
+        try:
+            result = handler(self.document, *args)
+
+        except WebDriverException:
+            raise
+
+        except Exception as error:
+            raise JavascriptException(str(error))
+
+        return self._wrap(result)
+
+    def _find(self, params, single=False):
+
+        context = self._node(params) if 'id' in params else None
+        nodes = self.document.find(params['using'], params['value'], context)
+
+        if single:
+
+            if not nodes:
+                raise NoSuchElementException('Unable to locate element: {}'.format(params['value']))
+
+            return self.document.ref(nodes[0])
+
+        return [self.document.ref(node) for node in nodes]
+
+    def _set_timeouts(self, params):
+
+        # JSON wire sends {'ms': ...}, optionally with a timeout type, W3C sends {'implicit': ...} or {'pageLoad': ...}
+        if 'implicit' in params:
+            self.implicit_wait = params['implicit'] / 1000.0
+
+        if 'pageLoad' in params:
+            self.page_load_timeout = params['pageLoad'] / 1000.0
+
+        if 'ms' in params and params.get('type', 'implicit') == 'implicit':
+            self.implicit_wait = params['ms'] / 1000.0
+
+        elif 'ms' in params and params['type'] == 'page load':
+            self.page_load_timeout = params['ms'] / 1000.0
+
+    def _name_window(self, doc, name):
+
+        previous = self.window_names[self.window]
+        self.window_names[self.window] = name
+
+        return previous
+
+    def _node(self, params):
+        return self.document.node(params['id'])
+
+    def _open_window(self, doc, url, name):
+
+        requested = time.time() * 1000
+        url = urljoin(doc.url, url) if url else 'about:blank'
+        handle = self.window if name == '_self' else next(
+            (key for key, value in self.window_names.items() if value and value == name), None)
+
+        if handle is None:
+
+            handle = 'window-{}'.format(next(self._window_ids))
+            self.window_names[handle] = '' if name in (None, '_blank') else name
+            self.windows[handle] = {'document': self.document_class('about:blank', BLANK), 'history': [],
+                                    'position': -1, 'status': None, 'started': requested}
+
+        if url == 'about:blank':
+            return requested
+
+        # Loaded right away: without a browser there is nothing to overlap
+        current = self.window
+        self._swap(handle)
+
+        try:
+            self.load('GET', url)
+
+        finally:
+            self._swap(current)
+
+        return requested
+
+    def _set_value(self, doc, node, value):
+
+        node.set('value', value)
+        doc.mutations += 1
+
+    def _store_cookies(self, url, headers):
+
+        host = urlparse(url).hostname or ''
+        values = headers.getlist('Set-Cookie') if hasattr(headers, 'getlist') else []
+
+        for value in values:
+
+            for name, morsel in SimpleCookie(str(value)).items():
+
+                key = ((morsel['domain'] or host).lstrip('.'), morsel['path'] or '/', name)
+
+                if morsel['max-age'] and morsel['max-age'].lstrip('-').isdigit() and int(morsel['max-age']) <= 0:
+                    self.cookies.pop(key, None)
+                    continue
+
+                self.cookies[key] = {'name': name, 'value': morsel.value, 'domain': key[0], 'path': key[1],
+                                     'secure': bool(morsel['secure']), 'httpOnly': bool(morsel['httponly'])}
+
+    def _swap(self, handle):
+
+        if handle == self.window:
+            return
+
+        # A closed window keeps no state
+        if self.window is not None:
+            self.windows[self.window] = {'document': self.document, 'history': self.history,
+                                         'position': self.position, 'status': self.status, 'started': self.started}
+
+        state = self.windows.pop(handle)
+
+        self.document, self.history, self.position = state['document'], state['history'], state['position']
+        self.status, self.started = state['status'], state['started']
+        self.window = handle
+
+    def _submit(self, params):
+
+        node = self._node(params)
+        form = node if node.tag == 'form' else next(iter(node.xpath('ancestor::form[1]')), None)
+
+        if form is None:
+            raise NoSuchElementException('Element is not in a form')
+
+        self.load(*self.document.submit(form))
+
+    def _switch_to_window(self, params):
+
+        # W3C switches by handle, the JSON wire protocol by handle or window name
+        target = params.get('handle', params.get('name'))
+
+        if target not in self.window_names:
+            target = next((key for key, value in self.window_names.items() if value and value == target), None)
+
+        if target is None:
+            raise NoSuchWindowException('No window {!r}'.format(params.get('handle', params.get('name'))))
+
+        self._swap(target)
+
+    def _travel(self, step):
+
+        position = self.position + step
+
+        if 0 <= position < len(self.history):
+
+            self.position = position
+            self.load('GET', self.history[position], remember=False)
+
+    def _type(self, params, text):
+
+        node = self._node(params)
+        self.document.mutations += 1
+
+        if node.tag == 'textarea':
+            node.text = (node.text or '') + text if text is not None else ''
+
+        else:
+            node.set('value', node.get('value', '') + text if text is not None else '')
+
+    def _wrap(self, value):
+
+        if isinstance(value, html.HtmlElement):
+            return self.document.ref(value)
+
+        if isinstance(value, (list, tuple)):
+            return [self._wrap(item) for item in value]
+
+        if isinstance(value, dict):
+            return dict((key, self._wrap(item)) for key, item in value.items())
+
+        return value
+
+
+class OfflineExecutor(BrowserlessExecutor):
+    """The OfflineExecutor implementation
+
+    A browserless executor that never loads a page, for building page objects without a browser or network, as
+    :func:`sda.warm.precompile` and :meth:`sda.definition.PageDef.of` do.
+    """
+
+    def fetch(self, method, url, fields=None):
+        """Refuse to load a page
+
+        :raises WebDriverException: Always
+        """
+
+        raise WebDriverException('Pages are not loaded offline: {}'.format(url))
+
+
+class BrowserlessDriver(WebDriver):
+    """The BrowserlessDriver implementation
+
+    A selenium WebDriver bound to a :class:`BrowserlessExecutor`. sda's Site, Page, Element and structures work
+    against it unchanged, as long as the checks only need the HTML the server renders.
+    """
+
+    def __init__(self, headers=None, timeout=30.0, max_redirects=MAX_REDIRECTS, maxsize=10, retries=2):
+        """Browserless web driver
+
+        :param dict headers: Extra request headers
+        :param float timeout: Seconds to wait for a response
+        :param int max_redirects: Redirects to follow before giving up
+        :param int maxsize: Keep-alive connections kept per host
+        :param int retries: Times to retry a failed connection
+        """
+
+        super(BrowserlessDriver, self).__init__(
+            command_executor=BrowserlessExecutor(headers, timeout, max_redirects, maxsize, retries),
+            desired_capabilities={})
+
+    @property
+    def status_code(self):
+        """HTTP status of the current page
+
+        :return: HTTP status
+        :rtype: int
+        """
+
+        return self.command_executor.status
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""sda.cache
+
+Per-driver cache for values read from the page. Every entry belongs to a DOM generation: a counter the page bumps on
+any mutation, form input or history navigation, and which starts over under a new random id on every page load. Once
+the generation moves on, every cached value is dropped.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import weakref
+from sda import scripts
+
+__all__ = ['DomCache', 'dom_cache']
+
+DEFAULT_MAX_SIZE = 512
+MISSING = object()
+
+# Cached elements refer back to their driver, so a cache kept in a mapping keyed by the driver would keep it alive
+_ATTRIBUTE = '_sda_dom_cache'
+
+
+class DomCache(object):
+    """The DomCache implementation
+
+    Outside of :meth:`hold` a cache hit still costs one round trip to read the page generation. Inside :meth:`hold`
+    the generation is read once and trusted until sda itself acts on the page (click, input, navigation, ...), so
+    repeated reads cost no round trips at all. Changes the page makes on its own (timers, XHR) while a hold is active
+    are only picked up on the next action.
+
+    .. code-block:: python
+
+        with page.cache.hold():
+            assert page.header.text() == 'Example Domain'
+            assert page.languages.options() == ['English', 'French']
+    """
+
+    def __init__(self, web_driver, max_size=DEFAULT_MAX_SIZE):
+        """DOM generation cache
+
+        :param WebDriver web_driver: Selenium web driver
+        :param int max_size: Maximum number of cached entries
+        """
+
+        self.max_size = max_size
+
+        self._driver = weakref.ref(web_driver)
+        self._entries = OrderedDict()
+        self._generation = None
+        self._held = 0
+        self._verified = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def driver(self):
+        """Returns the web driver, or None once it has been garbage collected
+
+        :rtype: WebDriver
+        """
+
+        return self._driver()
+
+    @property
+    def generation(self):
+        """Returns the last observed page generation
+
+        :return: Page generation
+        :rtype: str
+        """
+
+        return self._generation
+
+    @property
+    def held(self):
+        """Returns True if the cache is being held
+
+        :return: True, if inside :meth:`hold`
+        :rtype: bool
+        """
+
+        return self._held > 0
+
+    def current(self):
+        """Returns the page generation, reading it from the browser unless it is held and verified
+
+        :return: Page generation
+        :rtype: str
+        """
+
+        if not (self._held and self._verified):
+            self.observe(self.driver.execute_script(scripts.GENERATION))
+
+        return self._generation
+
+    def get(self, key, default=None):
+        """Returns a cached value if the page has not changed since it was stored
+
+        :param key: Cache key
+        :param default: Value to return on a miss
+        :return: Cached value
+        """
+
+        if key in self._entries:
+
+            # Reading the generation drops the entry if the page has changed
+            self.current()
+
+            if key in self._entries:
+
+                self._entries[key] = self._entries.pop(key)
+                return self._entries[key]
+
+        return default
+
+    @contextmanager
+    def hold(self):
+        """Trust the page generation until sda acts on the page
+
+        :return:
+        """
+
+        # Whatever was verified before the hold may be stale already
+        if not self._held:
+            self._verified = False
+
+        self._held += 1
+
+        try:
+            yield self
+
+        finally:
+            self._held -= 1
+
+    def invalidate(self):
+        """Mark the page as possibly changed. The next read checks the generation again
+
+        :return:
+        """
+
+        self._verified = False
+
+    def observe(self, generation):
+        """Record a page generation, dropping every entry from older generations
+
+        :param str generation: Page generation as returned by a script
+        :return:
+        """
+
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+        self._verified = True
+
+    def set(self, key, value, generation=None):
+        """Store a value for the current page generation
+
+        :param key: Cache key
+        :param value: Value to cache
+        :param str generation: Generation the value was read at, if the script returned one
+        :return:
+        """
+
+        if generation is None:
+            self.current()
+
+        else:
+            self.observe(generation)
+
+        self._entries.pop(key, None)
+        self._entries[key] = value
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def dom_cache(web_driver):
+    """Returns the DOM cache for a web driver
+
+    :param WebDriver web_driver: Selenium web driver
+    :return: DOM cache
+    :rtype: DomCache
+    """
+
+    # Read from the instance itself, so drivers that forward unknown attributes keep their own cache
+    cache = vars(web_driver).get(_ATTRIBUTE)
+
+    if cache is None:
+
+        cache = DomCache(web_driver)
+        setattr(web_driver, _ATTRIBUTE, cache)
+
+    return cache
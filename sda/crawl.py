@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""sda.crawl
+
+Visits every routed page of a Site across a pool of drivers and checks, in one round trip per page, that the page's
+elements exist. Results are written as JSON Lines while the crawl runs, and only a bounded number of visits are in
+flight, so memory stays flat however many pages are crawled. See :meth:`sda.site.Site.crawl`.
+
+.. code-block:: python
+
+    from selenium import webdriver
+
+    routes = {
+        'home': None,
+        'user': ({'id': user_id} for user_id in user_ids),
+    }
+
+    summary = ExampleSite(driver).crawl(routes, workers=8, pool=webdriver.Chrome, output='sweep.jsonl')
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+import json
+import sys
+import time
+from six import string_types
+from sda import scripts
+from sda.page import Page, fill_path
+from sda.pool import DriverPool
+from sda.waits import HIDDEN, MISSING
+
+try:
+    from urlparse import urljoin
+except (ImportError, ModuleNotFoundError):
+    from urllib.parse import urljoin
+
+__all__ = ['crawl', 'page_xpaths']
+
+DEFAULT_WORKERS = 4
+IN_FLIGHT_PER_WORKER = 2
+
+
+@contextmanager
+def _borrow(web_driver):
+    yield web_driver
+
+
+def page_xpaths(page):
+    """Returns the xpath of every element on a page that can be checked in the browser
+
+    :param Page page: Page object
+    :return: Element name to xpath
+    :rtype: dict
+    """
+
+    return {name: element.search_term[1] for name, element in page.elements().items()
+            if element.search_term[0] != 'element'}
+
+
+def crawl(site, routes, workers=DEFAULT_WORKERS, pool=None, output=None, base_url=None, timeout=None):
+    """Visit every route and check that each page's elements exist
+
+    Every visit writes one JSON line: the page name, its parameters, the URL, ``status`` ('ok', 'missing' or
+    'error'), the names of ``missing`` and ``hidden`` elements, the ``seconds`` taken and any ``error``.
+
+    :param Site site: Site whose pages are crawled. Element locators are read from it once, before the crawl
+    :param dict routes: Page attribute name to parameter sets, each a single value, a sequence or a dictionary
+        filling the page's url_path. None visits the page once without parameters. Parameter sets may be generators
+    :param int workers: Visits run in parallel
+    :param pool: DriverPool, or a factory for a pool of ``workers`` sessions closed after the crawl. Defaults to the
+        site's own driver, one visit at a time
+    :param output: File path or writable file for the JSON lines. Defaults to stdout
+    :param str base_url: Scheme and host the paths are joined to. Defaults to those of the site's current URL
+    :param float timeout: Seconds each visit waits for a driver, or None to wait forever
+    :return: Counts of 'pages' visited, 'ok', 'missing' and 'error', and the crawl's wall 'seconds'
+    :rtype: dict
+    :raises ValueError: If a route does not name a page of the site
+    """
+
+    base_url = base_url or site.url
+    targets = {}
+
+    for name in routes:
+
+        page = getattr(site, name, None)
+
+        if not isinstance(page, Page):
+            raise ValueError('{!r} is not a page of {}'.format(name, type(site).__name__))
+
+        xpaths = page_xpaths(page)
+        keys = sorted(xpaths)
+        targets[name] = (page._url_path, keys, [xpaths[key] for key in keys])
+
+    owned = pool is not None and not isinstance(pool, DriverPool)
+
+    if owned:
+        pool = DriverPool(pool, size=workers).start()
+
+    # The site's own driver is borrowed as is, never reset or quit
+    lease = pool.lease if pool is not None else lambda _: _borrow(site.driver)
+    workers = workers if pool is not None else 1
+
+    writer = open(output, 'w') if isinstance(output, string_types) else output or sys.stdout
+    summary = {'pages': 0, 'ok': 0, 'missing': 0, 'error': 0}
+    start = time.time()
+
+    def visit(name, params):
+
+        url_path, keys, xpaths = targets[name]
+        params = params if isinstance(params, (dict, list, tuple)) else (params,)
+        result = {'page': name, 'params': params if isinstance(params, dict) else list(params), 'url': None,
+                  'status': 'error', 'missing': [], 'hidden': [], 'seconds': None, 'error': None}
+        began = time.time()
+
+        try:
+
+            result['url'] = urljoin(base_url, fill_path(url_path, params))
+
+            with lease(timeout) as web_driver:
+
+                web_driver.get(result['url'])
+                states = web_driver.execute_script(scripts.ELEMENT_STATES, xpaths) if xpaths else []
+
+            result['missing'] = [key for key, state in zip(keys, states) if state == MISSING]
+            result['hidden'] = [key for key, state in zip(keys, states) if state == HIDDEN]
+            result['status'] = 'missing' if result['missing'] else 'ok'
+
+        except Exception as error:
+
+            # A visit that fails, or gets no driver in time, is recorded and the crawl goes on
+            result['error'] = '{}: {}'.format(type(error).__name__, error)
+
+        result['seconds'] = round(time.time() - began, 3)
+
+        return result
+
+    def record(futures):
+
+        for future in futures:
+
+            result = future.result()
+            summary['pages'] += 1
+            summary[result['status']] += 1
+            writer.write(json.dumps(result, sort_keys=True, default=repr) + '\n')
+
+        writer.flush()
+
+    try:
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+
+            pending = set()
+
+            for name in routes:
+                for params in routes[name] if routes[name] is not None else [()]:
+
+                    # Bounded so parameter sets are read no faster than pages are visited
+                    if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        record(done)
+
+                    pending.add(executor.submit(visit, name, params))
+
+            record(wait(pending).done)
+
+    finally:
+
+        if writer is not output and writer is not sys.stdout:
+            writer.close()
+
+        if owned:
+            pool.close()
+
+    summary['seconds'] = round(time.time() - start, 3)
+
+    return summary
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""sda.definition
+
+Driver-independent definitions of elements, pages and sites. An :class:`Element` or :class:`Page` holds a live web
+driver and cannot be pickled. Its definition holds only the class, the locator, the other attributes and the
+definitions of its children. Definitions pickle cheaply, so they can be sent to a ``ProcessPoolExecutor`` or an xdist
+worker and bound to that worker's driver there.
+
+.. code-block:: python
+
+    from concurrent.futures import ProcessPoolExecutor
+    from sda.definition import PageDef
+
+    definition = PageDef.of(ExampleSite)
+
+    def sweep(site_definition, url):
+
+        driver = webdriver.Chrome()
+        site = site_definition.bind(driver)
+        ...
+
+    with ProcessPoolExecutor() as executor:
+        executor.map(sweep, [definition] * len(urls), urls)
+
+Classes are pickled by reference, so page and element classes must be importable in the worker. Binding does not run
+their constructors: the bound object gets the attributes its definition recorded.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from sda.browserless import OfflineExecutor
+from sda.element import Element, SeleniumObject, normalize
+
+__all__ = ['ElementDef', 'PageDef', 'define']
+
+
+def _check_driver(web_driver):
+
+    if not isinstance(web_driver, WebDriver):
+        raise TypeError("'web_driver' MUST be a selenium WebDriver element")
+
+
+def _split(obj, skip):
+    """Returns an object's plain attributes and the definitions of its child elements, pages and sites"""
+
+    attributes = {}
+    children = {}
+
+    for name, value in vars(obj).items():
+
+        if name in skip:
+            continue
+
+        if isinstance(value, (Element, SeleniumObject)):
+            children[name] = define(value)
+
+        elif isinstance(value, (WebDriver, WebElement)):
+            raise TypeError('{}.{} holds a live {} and cannot be defined'.format(
+                type(obj).__name__, name, type(value).__name__))
+
+        else:
+            attributes[name] = value
+
+    return attributes, children
+
+
+def define(obj):
+    """Returns the definition of an element, page or site
+
+    :param obj: Element, Page or Site object
+    :return: Definition
+    :rtype: ElementDef or PageDef
+    :raises TypeError: If the object, or an attribute of it, holds a live driver or web element other than its own
+    """
+
+    if isinstance(obj, Element):
+
+        if obj.search_term is None:
+            raise TypeError('{!r} wraps a live web element and cannot be defined'.format(obj))
+
+        attributes, children = _split(obj, ('driver', 'search_term'))
+        definition = ElementDef(type(obj), children=children, attributes=attributes)
+        definition.search_term = obj.search_term
+
+        return definition
+
+    if isinstance(obj, SeleniumObject):
+
+        attributes, children = _split(obj, ('driver',))
+
+        return PageDef(type(obj), attributes, children)
+
+    raise TypeError('{!r} is not an sda element, page or site'.format(obj))
+
+
+class ElementDef(object):
+    """The ElementDef implementation
+
+    The class, normalized locator, extra attributes and children of an element.
+    """
+
+    __slots__ = ('cls', 'search_term', 'attributes', 'children')
+
+    def __init__(self, cls, by=By.XPATH, path=None, children=None, attributes=None):
+        """Element definition
+
+        :param type cls: Element class, ex. structures.Button
+        :param str by: By selector
+        :param str path: Selection value
+        :param dict children: Attribute name to ElementDef, for elements holding other elements
+        :param dict attributes: Attribute name to value, for the element's other attributes
+        """
+
+        self.cls = cls
+        self.search_term = normalize(by, path)
+        self.attributes = dict(attributes or {})
+        self.children = dict(children or {})
+
+    def __getstate__(self):
+        return self.cls, self.search_term, self.attributes, self.children
+
+    def __setstate__(self, state):
+        self.cls, self.search_term, self.attributes, self.children = state
+
+    def __repr__(self):
+        return '<ElementDef {} path={}>'.format(self.cls.__name__, self.search_term[1] if self.search_term else None)
+
+    def bind(self, web_driver):
+        """Returns the element, bound to a web driver
+
+        :param WebDriver web_driver: Selenium web driver
+        :return: Element
+        :rtype: Element
+        :raises TypeError: If web_driver is not a Selenium WebDriver
+        """
+
+        _check_driver(web_driver)
+
+        element = self.cls.__new__(self.cls)
+        element.__dict__.update(self.attributes)
+        element.driver = web_driver
+        element.search_term = self.search_term
+
+        for name, child in self.children.items():
+            setattr(element, name, child.bind(web_driver))
+
+        return element
+
+
+class PageDef(object):
+    """The PageDef implementation
+
+    The class, attributes and child definitions of a page or site.
+    """
+
+    __slots__ = ('cls', 'attributes', 'children')
+
+    def __init__(self, cls, attributes=None, children=None):
+        """Page or site definition
+
+        :param type cls: Page or Site class
+        :param dict attributes: Attribute name to value, ex. {'_url_path': '/users/:id'}
+        :param dict children: Attribute name to ElementDef, or PageDef for the pages of a site
+        """
+
+        self.cls = cls
+        self.attributes = dict(attributes or {})
+        self.children = dict(children or {})
+
+    def __getstate__(self):
+        return self.cls, self.attributes, self.children
+
+    def __setstate__(self, state):
+        self.cls, self.attributes, self.children = state
+
+    def __repr__(self):
+        return '<PageDef {} url_path={}>'.format(self.cls.__name__, self.url_path)
+
+    @classmethod
+    def of(cls, page_class):
+        """Returns the definition of a page or site class, built without a browser
+
+        The class is built once with a driver that never loads a page, as :func:`sda.warm.precompile` does.
+
+        :param type page_class: Page or Site class whose constructor takes only a web driver
+        :return: Definition
+        :rtype: PageDef
+        """
+
+        return define(page_class(WebDriver(command_executor=OfflineExecutor(), desired_capabilities={})))
+
+    @property
+    def url_path(self):
+        """Returns the page's url_path
+
+        :return: URL path, or None for a site
+        :rtype: str
+        """
+
+        return self.attributes.get('_url_path')
+
+    def bind(self, web_driver):
+        """Returns the page or site, with every child bound to a web driver
+
+        :param WebDriver web_driver: Selenium web driver
+        :return: Page or Site object
+        :rtype: SeleniumObject
+        :raises TypeError: If web_driver is not a Selenium WebDriver
+        """
+
+        _check_driver(web_driver)
+
+        page = self.cls.__new__(self.cls)
+        page.__dict__.update(self.attributes)
+        page.driver = web_driver
+
+        for name, child in self.children.items():
+            setattr(page, name, child.bind(web_driver))
+
+        return page
+
+    def elements(self):
+        """Returns the element definitions of the page, without binding it
+
+        :return: Element name to definition
+        :rtype: dict
+        """
+
+        return dict((name, child) for name, child in self.children.items() if isinstance(child, ElementDef))
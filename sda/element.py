@@ -7,21 +7,32 @@
 
 from __future__ import unicode_literals
 import keyword
+import weakref
 from six import string_types
 from lxml.cssselect import CSSSelector, SelectorError
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
-from selenium.common.exceptions import InvalidSelectorException, TimeoutException, NoSuchElementException
+from selenium.common.exceptions import InvalidSelectorException, WebDriverException
+from sda import scripts
+from sda.cache import MISSING, dom_cache
+from sda.instrument import instrumented
+from sda.waits import wait_until
 
-__all__ = ['Element', 'normalize', 'join']
+__all__ = ['Element', 'implicit_wait', 'is_present', 'normalize', 'join']
 
 DEFAULT_NAME_ATTR = 'data-qa-id'
 DEFAULT_TYPE_ATTR = 'data-qa-model'
 
+# CSS selectors converted to xpath. Conversion through lxml is the slowest part of building an element
+MAX_CSS_XPATHS = 4096
+_CSS_XPATHS = {}
+
+# Implicit wait (seconds) last set through sda, per web driver
+_IMPLICIT_WAITS = weakref.WeakKeyDictionary()
+
 
 def normalize(_by, path, *args, **kwargs):
     """Convert all paths into a xpath selector
@@ -52,11 +63,21 @@ def normalize(_by, path, *args, **kwargs):
 
     if _by == 'css selector':
 
-        try:
-            return By.XPATH, '/%s' % CSSSelector(str(path)).path
+        path = str(path)
+        xpath = _CSS_XPATHS.get(path)
+
+        if xpath is None:
+
+            try:
+                xpath = '/%s' % CSSSelector(path).path
 
-        except SelectorError:
-            return By.XPATH, ''
+            except SelectorError:
+                xpath = ''
+
+            if len(_CSS_XPATHS) < MAX_CSS_XPATHS:
+                _CSS_XPATHS[path] = xpath
+
+        return By.XPATH, xpath
 
     elif _by == 'element':
         if isinstance(path, Element):
@@ -66,6 +87,45 @@ def normalize(_by, path, *args, **kwargs):
         return By.XPATH, normalizers.get(_by, lambda x: '')(str(path))
 
 
+def implicit_wait(web_driver):
+    """Returns the implicit wait last set on the web driver through sda
+
+    :param WebDriver web_driver: Selenium web driver
+    :return: Implicit wait in seconds
+    :rtype: int
+    """
+
+    return _IMPLICIT_WAITS.get(web_driver, 0)
+
+
+def is_present(web_driver, search_term, wait=False):
+    """Returns True if at least one element matches the search term
+
+    .. note:: Unless wait is True, the lookup is evaluated in the browser so it does not block for the driver's
+        implicit wait when nothing matches.
+
+    :param WebDriver web_driver: Selenium web driver
+    :param tuple search_term: Locator path tuple (by, path)
+    :param bool wait: True, to honor the driver's implicit wait
+    :return: True, if an element matches
+    :rtype: bool
+    """
+
+    if wait or not implicit_wait(web_driver) or search_term[0] != By.XPATH:
+
+        try:
+            return bool(web_driver.find_elements(*search_term))
+
+        except InvalidSelectorException:
+            return False
+
+    try:
+        return bool(web_driver.execute_script(scripts.XPATH_EXISTS, search_term[1]))
+
+    except WebDriverException:
+        return False
+
+
 def join(*args):
     """Join 'x' locator paths into a single path
 
@@ -102,67 +162,75 @@ class SeleniumObject(object):
         else:
             self._type_attr = DEFAULT_TYPE_ATTR
 
-    def _wait_until(self, expected_condition, _by, path, timeout=30):
+    @property
+    def cache(self):
+        """Returns the DOM cache shared by every sda object bound to this driver
+
+        :return: DOM cache
+        :rtype: sda.cache.DomCache
+        """
+
+        return dom_cache(self.driver)
+
+    def _wait_until(self, expected_condition, _by, path, timeout=None):
         """Wait until expected condition is fulfilled
 
         :param func expected_condition: Selenium expected condition
         :param str _by: Selector method
         :param str path: Selector path
-        :param timeout: Wait timeout in seconds
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile (see :mod:`sda.waits`), or 30
         :return:
         :rtype: bool
         """
 
-        wait = WebDriverWait(self.driver, timeout) if isinstance(timeout, int) else WebDriverWait(self.driver, 30)
-
-        try:
+        # Waiting implies the page is expected to change
+        dom_cache(self.driver).invalidate()
 
-            if _by != 'element':
-
-                wait.until(expected_condition((_by, path)))
-                return True
-
-        except TimeoutException:
-            pass
+        if _by != 'element':
+            return wait_until(self.driver, expected_condition, (_by, path), timeout)
 
         return False
 
-    def wait_until_present(self, _by, path, timeout=30):
+    @instrumented
+    def wait_until_present(self, _by, path, timeout=None):
         """Wait until the element is available to the DOM
 
         :param str _by: Selector method
         :param str path: Selector path
-        :param timeout: Wait timeout in seconds
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return:
         :rtype: bool
         """
 
         return self._wait_until(ec.presence_of_element_located, _by, path, timeout)
 
-    def wait_until_appears(self, _by, path, timeout=30):
+    @instrumented
+    def wait_until_appears(self, _by, path, timeout=None):
         """Wait until the element appears
 
         :param str _by: Selector method
         :param str path: Selector path
-        :param int timeout: Wait timeout in seconds
+        :param int timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return: True, if the wait does not timeout
         :rtype: bool
         """
 
         return self._wait_until(ec.visibility_of_element_located, _by, path, timeout)
 
-    def wait_until_disappears(self, _by, path, timeout=30):
+    @instrumented
+    def wait_until_disappears(self, _by, path, timeout=None):
         """Wait until the element disappears
 
         :param str _by: Selector method
         :param str path: Selector path
-        :param int timeout: Wait timeout in seconds
+        :param int timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return: True, if the wait does not timeout
         :rtype: bool
         """
 
         return self._wait_until(ec.invisibility_of_element_located, _by, path, timeout)
 
+    @instrumented
     def wait_implicitly(self, seconds):
         """Wait a set amount of time in seconds
 
@@ -173,6 +241,7 @@ class SeleniumObject(object):
 
         if isinstance(seconds, int):
             self.driver.implicitly_wait(seconds)
+            _IMPLICIT_WAITS[self.driver] = seconds
             return True
 
         return False
@@ -278,6 +347,7 @@ class Element(object):
         for extra in kwargs:
             self.__setattr__(extra, kwargs[extra])
 
+    @instrumented
     def __contains__(self, attribute):
         """Returns True if element contains attribute
 
@@ -286,14 +356,10 @@ class Element(object):
         :rtype: bool
         """
 
-        if self.exists() and isinstance(attribute, string_types):
-
-            try:
-                self.driver.find_element(*join(self.search_term, ('xpath', '/self::*[boolean(@{})]'.format(attribute))))
-                return True
+        if isinstance(attribute, string_types):
 
-            except NoSuchElementException:
-                pass
+            xpath = '/self::*[boolean(@{})]'.format(attribute)
+            return is_present(self.driver, join(self.search_term, ('xpath', xpath)))
 
         return False
 
@@ -302,17 +368,16 @@ class Element(object):
 
         .. note:: class and for are both reserved keywords. Prepend/post-pend '_' to reference both.
 
+        .. note:: Reads are served from the DOM cache (see :mod:`sda.cache`) until the page changes.
+
         :param str attribute: Element attribute
         :return: Returns the string value
         :rtype: str
         """
 
-        if self.exists():
-
-            replacement = '' if keyword.iskeyword(attribute.replace('_', '')) else '-'
-            return self.element().get_attribute(attribute.replace('_', replacement))
+        replacement = '' if keyword.iskeyword(attribute.replace('_', '')) else '-'
 
-        return ''
+        return self._get_attribute(attribute.replace('_', replacement))
 
     def __repr__(self):
         """Returns HTML representation of the element
@@ -323,14 +388,19 @@ class Element(object):
 
         return '<{} by={} path={}>'.format(self.__class__.__name__, *self.search_term)
 
+    @instrumented
     def blur(self):
         """Simulate moving the cursor out of focus of this element.
 
         :return:
         """
 
-        return self.driver.execute_script('arguments[0].blur();', self.element()) if self.is_displayed() else None
+        if self.is_displayed():
 
+            dom_cache(self.driver).invalidate()
+            return self.driver.execute_script('arguments[0].blur();', self.element())
+
+    @instrumented
     def css_property(self, prop):
         """Return the value of a CSS property for the element
 
@@ -341,6 +411,26 @@ class Element(object):
 
         return self.element().value_of_css_property(str(prop)) if self.exists() else ''
 
+    @instrumented
+    def css_properties(self, names):
+        """Return the computed values of several CSS properties in a single round trip
+
+        :param list names: CSS properties
+        :return: Computed value for each property, empty if the element does not exist
+        :rtype: dict
+        """
+
+        names = [str(name) for name in names]
+
+        try:
+            styles = self.driver.execute_script(scripts.COMPUTED_STYLES, [self.search_term[1]], names)[0]
+
+        except WebDriverException:
+            styles = None
+
+        return styles or {}
+
+    @instrumented
     def drag(self, x_offset=0, y_offset=0):
         """Drag element x,y pixels from its center
 
@@ -351,12 +441,15 @@ class Element(object):
 
         if self.exists() and isinstance(x_offset, int) and isinstance(y_offset, int):
 
+            dom_cache(self.driver).invalidate()
+
             action = ActionChains(self.driver)
             action.click_and_hold(self.element()).move_by_offset(x_offset, y_offset).release().perform()
             return True
 
         return False
 
+    @instrumented
     def element(self):
         """Return the selenium web element object
 
@@ -372,34 +465,61 @@ class Element(object):
         elif self.search_term[0] in ('class name', 'css selector', 'id', 'link text',
                                      'name', 'partial link text', 'tag name', 'xpath'):
 
+            cache = dom_cache(self.driver)
+
+            # While the cache is held, handles stay valid until the page changes
+            if cache.held:
+
+                element = cache.get(('element', self.search_term))
+
+                if element:
+                    return element
+
             try:
 
                 # Locate element
                 element = self.driver.find_elements(*self.search_term)
-                return element[0] if element else None
 
             except InvalidSelectorException:
-                pass
+                return None
+
+            if element and cache.held:
+                cache.set(('element', self.search_term), element[0])
+
+            return element[0] if element else None
 
         return None
 
-    def exists(self):
+    @instrumented
+    def exists(self, wait=False):
         """Returns True if element can be located by selenium
 
+        .. note:: A missing element returns False right away, even after an implicit wait was set through
+            :meth:`SeleniumObject.wait_implicitly`. Pass wait=True to block for the implicit wait instead.
+
+        :param bool wait: True, to honor the driver's implicit wait
         :return: Returns True, if the element can be located
         :rtype: bool
         """
 
+        if self.search_term[0] == By.XPATH:
+            return is_present(self.driver, self.search_term, wait)
+
         return True if self.element() else False
 
+    @instrumented
     def focus(self):
         """Simulate element being in focus
 
         :return:
         """
 
-        return self.driver.execute_script('arguments[0].focus();', self.element()) if self.is_displayed() else None
+        if self.is_displayed():
+
+            dom_cache(self.driver).invalidate()
+            return self.driver.execute_script('arguments[0].focus();', self.element())
 
+    @instrumented
     def html(self):
         """Returns HTML representation of the element
 
@@ -409,6 +529,7 @@ class Element(object):
 
         return self.outerHTML if self.exists() else ''
 
+    @instrumented
     def is_displayed(self):
         """Return True, if the element is visible
 
@@ -418,6 +539,7 @@ class Element(object):
 
         return self.element().is_displayed() if self.exists() else False
 
+    @instrumented
     def parent(self):
         """Returns the Selenium element for the current element
 
@@ -427,6 +549,7 @@ class Element(object):
         xpath = join(self.search_term, ('xpath', '/parent::*'))
         return Element(self.driver, xpath[0], xpath[1])
 
+    @instrumented
     def scroll_to(self):
         """Scroll to the location of the element
 
@@ -442,9 +565,11 @@ class Element(object):
                      "window.scrollBy(0, eTop-(vHeight/2));"
 
             # Scroll to Element
+            dom_cache(self.driver).invalidate()
             self.driver.execute_script(script, element)
 
     @property
+    @instrumented
     def tag_name(self):
         """Returns element tag name
 
@@ -454,49 +579,102 @@ class Element(object):
 
         return self.element().tag_name if self.exists() else ''
 
-    def _wait_until(self, expected_condition, timeout=30):
+    @instrumented
+    def _get_attribute(self, name):
+        """Returns the value of an attribute, fetching every attribute set on the element together on the first miss
+
+        :param str name: Attribute name
+        :return: Attribute value
+        :rtype: str
+        """
+
+        cache = dom_cache(self.driver)
+        key = ('attributes', self.search_term)
+        values = cache.get(key, MISSING)
+
+        if values is MISSING or (values is not None and name not in values):
+
+            try:
+                generation, fetched = self.driver.execute_script(scripts.ATTRIBUTES, self.search_term[1], name)
+
+            except WebDriverException:
+                return ''
+
+            # Keep properties read earlier in the same generation
+            if values not in (MISSING, None) and fetched is not None and generation == cache.generation:
+                values.update(fetched)
+                fetched = values
+
+            cache.set(key, fetched, generation)
+            values = fetched
+
+        return values[name] if values is not None else ''
+
+    def _read(self, name, script):
+        """Returns a value read by an sda script, served from the DOM cache while the page is unchanged
+
+        :param str name: Cache key for the value
+        :param str script: Script from sda.scripts returning [generation, value]
+        :return: Value read from the page
+        """
+
+        cache = dom_cache(self.driver)
+        key = (name, self.search_term)
+        value = cache.get(key, MISSING)
+
+        if value is MISSING:
+
+            try:
+                generation, value = self.driver.execute_script(script, self.search_term[1])
+
+            except WebDriverException:
+                return None
+
+            cache.set(key, value, generation)
+
+        return value
+
+    def _wait_until(self, expected_condition, timeout=None):
         """Base function for wait functions
 
         :param expected_condition: Expected condition, callable must return boolean
-        :param int timeout: Seconds before timeout
+        :param int timeout: Seconds before timeout. Defaults to the timeout profile (see :mod:`sda.waits`), or 30
         :return:
         """
 
-        wait = WebDriverWait(self.driver, timeout) if isinstance(timeout, int) else WebDriverWait(self.driver, 30)
-
-        try:
+        # Waiting implies the page is expected to change
+        dom_cache(self.driver).invalidate()
 
-            if self.search_term[0] != 'element' and callable(expected_condition):
-                wait.until(expected_condition(self.search_term))
-                return True
-
-        except TimeoutException:
-            return False
+        if self.search_term[0] != 'element' and callable(expected_condition):
+            return wait_until(self.driver, expected_condition, self.search_term, timeout)
 
-    def wait_until_present(self, timeout=30):
+    @instrumented
+    def wait_until_present(self, timeout=None):
         """Wait until the element is present
 
-        :param timeout: Wait timeout in seconds
+        :param timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return: True, if the wait does not timeout
         :rtype: bool
         """
 
         return self._wait_until(ec.presence_of_element_located, timeout)
 
-    def wait_until_appears(self, timeout=30):
+    @instrumented
+    def wait_until_appears(self, timeout=None):
         """Wait until the element appears
 
-        :param int timeout: Wait timeout in seconds
+        :param int timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return: True, if the wait does not timeout
         :rtype: bool
         """
 
         return self._wait_until(ec.visibility_of_element_located, timeout)
 
-    def wait_until_disappears(self, timeout=30):
+    @instrumented
+    def wait_until_disappears(self, timeout=None):
         """Wait until the element disappears
 
-        :param int timeout: Wait timeout in seconds
+        :param int timeout: Wait timeout in seconds. Defaults to the timeout profile, or 30
         :return: True, if the wait does not timeout
         :rtype: bool
         """
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""sda.instrument
+
+Hooks for observing what sda does. Public sda methods are decorated with :func:`instrumented`, and every WebDriver
+command sent while a listener is registered is reported with the stack of sda calls that caused it. Nothing is
+recorded, and the decorator costs a single check, until a listener is added.
+
+A listener implements any of ``enter(call)``, ``exit(call, error)`` and ``command(stack, command, params, response,
+start, elapsed)``.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from contextlib import contextmanager
+import functools
+import inspect
+import threading
+import time
+
+__all__ = ['Call', 'InstrumentedExecutor', 'add_listener', 'attach', 'current_stack', 'instrumented',
+           'remove_listener', 'scope']
+
+_LISTENERS = []
+_LOCAL = threading.local()
+
+
+class Call(object):
+    """The Call implementation
+
+    One running sda method call, or a named :func:`scope`.
+    """
+
+    __slots__ = ('name', 'locator', 'instance', 'func', 'args', 'kwargs', 'start', 'end', 'parent', 'result',
+                 'attributes')
+
+    def __init__(self, name, locator=None, instance=None, parent=None, func=None, args=(), kwargs=None):
+        """sda method call
+
+        :param str name: Qualified method name, ex. 'ClickMixin.click'
+        :param str locator: Locator or URL path of the object the method was called on
+        :param instance: Object the method was called on
+        :param Call parent: Enclosing call
+        :param func: Called function
+        :param tuple args: Positional arguments, without self
+        :param dict kwargs: Keyword arguments
+        """
+
+        self.name = name
+        self.locator = locator
+        self.instance = instance
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.start = time.time()
+        self.end = None
+        self.parent = parent
+        self.result = None
+        self.attributes = {}
+
+    @property
+    def arguments(self):
+        """Returns the call's arguments by parameter name, defaults included
+
+        :return: Arguments
+        :rtype: dict
+        """
+
+        if self.func is None:
+            return dict(self.kwargs)
+
+        try:
+            arguments = inspect.getcallargs(self.func, self.instance, *self.args, **self.kwargs)
+
+        except TypeError:
+            return dict(self.kwargs)
+
+        # Drop self, whatever it is called
+        arguments.pop(self.func.__code__.co_varnames[0], None)
+
+        return arguments
+
+
+def add_listener(listener):
+    """Start reporting calls and commands to a listener
+
+    :param listener: Listener
+    :return:
+    """
+
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
+
+def remove_listener(listener):
+    """Stop reporting to a listener
+
+    :param listener: Listener
+    :return:
+    """
+
+    if listener in _LISTENERS:
+        _LISTENERS.remove(listener)
+
+
+def current_stack():
+    """Returns the sda calls running on this thread, outermost first
+
+    :return: Calls
+    :rtype: list
+    """
+
+    stack = getattr(_LOCAL, 'stack', None)
+
+    if stack is None:
+        stack = _LOCAL.stack = []
+
+    return stack
+
+
+def locator_of(instance):
+    """Returns the locator of an Element, or the URL path of a Page
+
+    :param instance: sda object
+    :return: Locator
+    :rtype: str
+    """
+
+    search_term = getattr(instance, 'search_term', None)
+
+    if search_term:
+        return search_term[1]
+
+    return getattr(instance, 'url_path', None)
+
+
+def _notify(event, *args):
+
+    for listener in list(_LISTENERS):
+
+        handler = getattr(listener, event, None)
+
+        if handler:
+            handler(*args)
+
+
+def _enter(call):
+
+    current_stack().append(call)
+    _notify('enter', call)
+
+
+def _exit(call, error=None):
+
+    call.end = time.time()
+    current_stack().pop()
+    _notify('exit', call, error)
+
+
+def _qualified_name(cls, method):
+
+    name = method.__name__
+
+    for base in cls.__mro__:
+
+        # Methods wrapped in a property are found through the property's getter
+        value = vars(base).get(name)
+
+        if getattr(value, 'fget', value) is method:
+            return '{}.{}'.format(base.__name__, name)
+
+    return name
+
+
+def instrumented(func):
+    """Report calls to a method to the registered listeners
+
+    :param func: sda method
+    :return: Wrapped method
+    """
+
+    # Python 2 functions have no __qualname__, so the class defining the method is looked up on the first call
+    names = [getattr(func, '__qualname__', None)]
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+
+        if not _LISTENERS:
+            return func(self, *args, **kwargs)
+
+        attach(getattr(self, 'driver', None))
+
+        if names[0] is None:
+            names[0] = _qualified_name(type(self), wrapper)
+
+        stack = current_stack()
+        call = Call(names[0], locator_of(self), self, stack[-1] if stack else None, func, args, kwargs)
+        _enter(call)
+
+        try:
+            call.result = func(self, *args, **kwargs)
+
+        except Exception as error:
+            _exit(call, error)
+            raise
+
+        _exit(call)
+
+        return call.result
+
+    return wrapper
+
+
+@contextmanager
+def scope(name, locator=None, **attributes):
+    """Group everything sda does inside the block under a named call, ex. a test or a user journey
+
+    :param str name: Scope name
+    :param str locator: Optional locator or URL the scope is about
+    :param attributes: Extra attributes for listeners
+    :return: Call, or None when nothing is listening
+    :rtype: Call
+    """
+
+    if not _LISTENERS:
+        yield None
+        return
+
+    stack = current_stack()
+    call = Call(name, locator, parent=stack[-1] if stack else None)
+    call.attributes.update(attributes)
+    _enter(call)
+
+    try:
+        yield call
+
+    except Exception as error:
+        _exit(call, error)
+        raise
+
+    _exit(call)
+
+
+class InstrumentedExecutor(object):
+    """The InstrumentedExecutor implementation
+
+    Wraps a driver's command executor and reports every command to the listeners. sda installs it on first use of a
+    driver while a listener is registered; :func:`attach` installs it up front so commands sent directly through the
+    driver are seen too.
+    """
+
+    def __init__(self, executor):
+        """Instrumented command executor
+
+        :param executor: Command executor to wrap
+        """
+
+        self.executor = executor
+
+    def __getattr__(self, item):
+        return getattr(self.__dict__['executor'], item)
+
+    def execute(self, command, params):
+        """Execute a command and report it
+
+        :param str command: Selenium command name
+        :param dict params: Command parameters
+        :return: Response
+        :rtype: dict
+        """
+
+        if not _LISTENERS:
+            return self.executor.execute(command, params)
+
+        start = time.time()
+        response = self.executor.execute(command, params)
+        _notify('command', list(current_stack()), command, params, response, start, time.time() - start)
+
+        return response
+
+
+def attach(web_driver):
+    """Report every command a driver sends, including ones sent outside sda methods
+
+    :param WebDriver web_driver: Selenium web driver
+    :return:
+    """
+
+    executor = getattr(web_driver, 'command_executor', None)
+
+    if executor is not None and not isinstance(executor, InstrumentedExecutor):
+        web_driver.command_executor = InstrumentedExecutor(executor)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""sda.metrics
+
+Opt-in WebDriver command counters and timers, tagged with the sda method that caused each command.
+
+.. code-block:: python
+
+    from sda import metrics
+
+    with metrics.collect() as stats:
+        page.dropdown.expand()
+
+    stats.methods['Dropdown.expand']['commands']  # 8
+    print(stats.report())
+
+A command counts towards every sda method running when it was sent, so ``Dropdown.expand`` includes the commands
+of the ``ClickMixin.click`` it calls. Per locator, commands count towards the innermost element that sent them.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+import json
+import math
+import threading
+from sda import instrument
+
+__all__ = ['Latency', 'Metrics', 'collect', 'escape_label', 'format_sample', 'percentile']
+
+PERCENTILES = (50, 90, 99)
+UNTAGGED = '<driver>'
+
+
+def escape_label(value):
+    """Returns a value escaped for a Prometheus label
+
+    :param value: Label value
+    :return: Escaped value, without the quotes
+    :rtype: str
+    """
+
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_sample(value):
+    """Returns a sample value in the Prometheus text format
+
+    :param value: Number, or None for a quantile without samples
+    :return: Sample value, 'NaN' for None
+    :rtype: str
+    """
+
+    if value is None:
+        return 'NaN'
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def percentile(samples, rank):
+    """Returns the nearest-rank percentile of a list of samples
+
+    :param list samples: Samples
+    :param int rank: Percentile, 0-100
+    :return: Percentile value, or None without samples
+    :rtype: float
+    """
+
+    if not samples:
+        return None
+
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered), int(math.ceil(rank / 100.0 * len(ordered)))) - 1)
+
+    return ordered[index]
+
+
+def _size(value):
+
+    try:
+        return len(json.dumps(value))
+
+    except (TypeError, ValueError):
+        return 0
+
+
+class _Bucket(object):
+
+    __slots__ = ('calls', 'commands', 'by_command', 'bytes_sent', 'bytes_received', 'latencies')
+
+    def __init__(self):
+
+        self.calls = 0
+        self.commands = 0
+        self.by_command = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latencies = []
+
+    def as_dict(self, latency_name):
+
+        summary = {'calls': self.calls, 'commands': self.commands, 'by_command': dict(self.by_command),
+                   'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received}
+
+        for rank in PERCENTILES:
+            summary['{}_p{}'.format(latency_name, rank)] = percentile(self.latencies, rank)
+
+        return summary
+
+
+class Latency(object):
+    """The Latency implementation
+
+    Durations for a Prometheus summary: the recent ones quantiles are computed over, and the running sum and count.
+    """
+
+    __slots__ = ('window', 'total', 'count')
+
+    def __init__(self, window):
+        """Latency summary
+
+        :param int window: Recent durations kept for quantiles
+        """
+
+        self.window = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        """Add a duration
+
+        :param float seconds: Duration in seconds
+        :return:
+        """
+
+        self.window.append(seconds)
+        self.total += seconds
+        self.count += 1
+
+
+class Metrics(object):
+    """The Metrics implementation
+
+    An :mod:`sda.instrument` listener aggregating, per sda method, calls, commands, bytes and call duration
+    percentiles, and, per locator, commands, bytes and command latency percentiles.
+    """
+
+    def __init__(self):
+
+        self._lock = threading.Lock()
+        self._methods = defaultdict(_Bucket)
+        self._locators = defaultdict(_Bucket)
+
+    @property
+    def locators(self):
+        """Returns the aggregates per locator
+
+        :return: Locator to {'commands', 'by_command', 'bytes_sent', 'bytes_received', 'latency_p50', ...}
+        :rtype: dict
+        """
+
+        with self._lock:
+            return dict((key, bucket.as_dict('latency')) for key, bucket in self._locators.items())
+
+    @property
+    def methods(self):
+        """Returns the aggregates per sda method
+
+        :return: Method to {'calls', 'commands', 'by_command', 'bytes_sent', 'bytes_received', 'duration_p50', ...}
+        :rtype: dict
+        """
+
+        with self._lock:
+            return dict((key, bucket.as_dict('duration')) for key, bucket in self._methods.items())
+
+    def command(self, stack, command, params, response, start, elapsed):
+        """Count a command towards the methods on the stack and the innermost locator
+
+        :return:
+        """
+
+        sent = _size(params)
+        received = _size(response)
+        names = set(call.name for call in stack if call.func is not None) or {UNTAGGED}
+        locator = next((call.locator for call in reversed(stack) if call.locator), None)
+
+        with self._lock:
+
+            buckets = [self._methods[name] for name in names]
+
+            if locator:
+                buckets.append(self._locators[locator])
+
+            for bucket in buckets:
+
+                bucket.commands += 1
+                bucket.by_command[command] += 1
+                bucket.bytes_sent += sent
+                bucket.bytes_received += received
+
+            if locator:
+                self._locators[locator].latencies.append(elapsed)
+
+    def exit(self, call, error):
+        """Record a finished sda method call. Recursive calls to the same method count once, scopes not at all
+
+        :return:
+        """
+
+        if call.func is None:
+            return
+
+        parent = call.parent
+
+        while parent is not None:
+
+            if parent.name == call.name:
+                return
+
+            parent = parent.parent
+
+        with self._lock:
+
+            bucket = self._methods[call.name]
+            bucket.calls += 1
+            bucket.latencies.append(call.end - call.start)
+
+    def report(self, limit=None):
+        """Returns a text table of the methods sending the most commands
+
+        :param int limit: Maximum number of rows
+        :return: Table
+        :rtype: str
+        """
+
+        methods = sorted(self.methods.items(), key=lambda item: (-item[1]['commands'], item[0]))[:limit]
+
+        if not methods:
+            return ''
+
+        width = max(len('method'), max(len(name) for name, _ in methods))
+        lines = ['{}  {:>6}  {:>8}  {:>10}  {:>10}  {:>9}  {:>9}'.format(
+            'method'.ljust(width), 'calls', 'commands', 'sent', 'received', 'p50 ms', 'p99 ms')]
+
+        for name, summary in methods:
+
+            lines.append('{}  {:>6}  {:>8}  {:>10}  {:>10}  {:>9}  {:>9}'.format(
+                name.ljust(width), summary['calls'], summary['commands'], summary['bytes_sent'],
+                summary['bytes_received'], *[('{:.1f}'.format(summary[key] * 1000) if summary[key] is not None else '-')
+                                             for key in ('duration_p50', 'duration_p99')]))
+
+        return '\n'.join(lines)
+
+    def reset(self):
+        """Drop everything collected so far
+
+        :return:
+        """
+
+        with self._lock:
+            self._methods.clear()
+            self._locators.clear()
+
+    def start(self):
+        """Start collecting
+
+        :return: self
+        :rtype: Metrics
+        """
+
+        instrument.add_listener(self)
+        return self
+
+    def stop(self):
+        """Stop collecting. Aggregates are kept
+
+        :return:
+        """
+
+        instrument.remove_listener(self)
+
+
+@contextmanager
+def collect(*web_drivers):
+    """Collect metrics until the block exits
+
+    :param web_drivers: Drivers to watch from the start, so commands sent outside sda methods are counted too
+    :return: Metrics
+    :rtype: Metrics
+    """
+
+    metrics = Metrics()
+
+    for web_driver in web_drivers:
+        instrument.attach(web_driver)
+
+    metrics.start()
+
+    try:
+        yield metrics
+
+    finally:
+        metrics.stop()
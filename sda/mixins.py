@@ -11,6 +11,9 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.support.ui import Select as SeleniumSelect
 from selenium.common.exceptions import ElementNotVisibleException, WebDriverException, NoSuchElementException
 from selenium.webdriver.common.action_chains import ActionChains
+from sda import scripts
+from sda.cache import dom_cache
+from sda.instrument import instrumented
 
 __all__ = ['ClickMixin', 'InputMixin', 'SelectMixin', 'SelectiveMixin', 'TextMixin']
 
@@ -40,6 +43,18 @@ class ElementMixin(object):
     def __getattr__(self, item):
         return item
 
+    # This function will be overridden by the base class this extends
+    def _read(self, name, script):
+        """Returns a value read by an sda script
+
+        :param str name: Cache key for the value
+        :param str script: Script from sda.scripts
+        :return:
+        """
+
+        if self:
+            pass
+
     # This function will be overridden by the base class this extends
     def blur(self):
         """Simulate moving out of focus
@@ -93,6 +108,7 @@ class ClickMixin(ElementMixin):
     """The ClickMixin Implementation
     """
 
+    @instrumented
     def click(self):
         """Click element
 
@@ -108,6 +124,7 @@ class ClickMixin(ElementMixin):
                 if not element.is_displayed():
                     self.scroll_to()
 
+                dom_cache(self.driver).invalidate()
                 element.click()
                 return True
 
@@ -116,6 +133,7 @@ class ClickMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def double_click(self):
         """Double-click element
 
@@ -131,11 +149,13 @@ class ClickMixin(ElementMixin):
                 if not element.is_displayed():
                     self.scroll_to()
 
+                dom_cache(self.driver).invalidate()
                 return ActionChains(self.driver).double_click(element).perform()
 
             except (ElementNotVisibleException, WebDriverException):
                 pass
 
+    @instrumented
     def hover(self):
         """Simulate hovering over element
 
@@ -151,6 +171,7 @@ class ClickMixin(ElementMixin):
                 if not element.is_displayed():
                     self.scroll_to()
 
+                dom_cache(self.driver).invalidate()
                 return ActionChains(self.driver).move_to_element(element).perform()
 
             except (ElementNotVisibleException, WebDriverException):
@@ -164,6 +185,7 @@ class InputMixin(ElementMixin):
     def __str__(self):
         return self.value
 
+    @instrumented
     def input(self, *args, **kwargs):
         """
 
@@ -177,6 +199,8 @@ class InputMixin(ElementMixin):
 
         if element:
 
+            dom_cache(self.driver).invalidate()
+
             if 'clear' in kwargs:
                 element.clear()
 
@@ -187,6 +211,7 @@ class InputMixin(ElementMixin):
         return False
 
     @property
+    @instrumented
     def value(self):
         """Return value of input
 
@@ -197,10 +222,12 @@ class InputMixin(ElementMixin):
         return self.element().get_attribute('value') if self.exists() else ''
 
     @value.setter
+    @instrumented
     def value(self, value):
 
         if self.exists():
-            self.driver.execute_script('arguments[0].value = arguments[1]', self.element(), str(value))
+            dom_cache(self.driver).invalidate()
+            self.driver.execute_script(scripts.SET_VALUE, self.element(), str(value))
 
 
 class SelectMixin(ElementMixin):
@@ -219,8 +246,12 @@ class SelectMixin(ElementMixin):
             element = self.element()
 
             if element.tag_name == u'select':
+
+                # Every caller goes on to change the selection
+                dom_cache(self.driver).invalidate()
                 return SeleniumSelect(element)
 
+    @instrumented
     def deselect_all(self):
         """Deselect all selected options
 
@@ -237,6 +268,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def deselect_by_index(self, option):
         """Deselect option by index [i]
 
@@ -260,6 +292,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def deselect_by_text(self, option):
         """Deselect option by display text
 
@@ -282,6 +315,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def deselect_by_value(self, option):
         """Deselect option by option value
 
@@ -304,6 +338,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def options(self):
         """Returns all Select options
 
@@ -311,16 +346,11 @@ class SelectMixin(ElementMixin):
         :rtype: list
         """
 
-        select = self._get_selenium_select()
-        options = []
-
-        if select:
-
-            for option in select.options:
-                options.append(option.text.encode('ascii', 'ignore'))
+        options = self._read('options', scripts.OPTIONS) or []
 
-        return options
+        return [text.encode('ascii', 'ignore') for text, _ in options]
 
+    @instrumented
     def selected_first(self):
         """Select first option
 
@@ -332,6 +362,7 @@ class SelectMixin(ElementMixin):
 
         return selected[0] if selected else None
 
+    @instrumented
     def selected_options(self):
         """Returns a list of selected options
 
@@ -339,14 +370,11 @@ class SelectMixin(ElementMixin):
         :rtype: list
         """
 
-        select = self._get_selenium_select()
-        options = []
-
-        if select:
-            options = [option.text.encode('ascii', 'ignore') for option in select.all_selected_options]
+        options = self._read('options', scripts.OPTIONS) or []
 
-        return options
+        return [text.encode('ascii', 'ignore') for text, selected in options if selected]
 
+    @instrumented
     def select_by_index(self, option):
         """Select option at index [i]
 
@@ -370,6 +398,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def select_by_text(self, option):
         """Select option by display text
 
@@ -392,6 +421,7 @@ class SelectMixin(ElementMixin):
 
         return False
 
+    @instrumented
     def select_by_value(self, option):
         """Select option by option value
 
@@ -419,6 +449,7 @@ class SelectiveMixin(ClickMixin):
     """The SelectiveMixin implementation
     """
 
+    @instrumented
     def deselect(self):
         """Deselect this element
 
@@ -427,6 +458,7 @@ class SelectiveMixin(ClickMixin):
 
         return self.click() if self.selected() else False
 
+    @instrumented
     def select(self):
         """Select this element
 
@@ -435,6 +467,7 @@ class SelectiveMixin(ClickMixin):
 
         return self.click() if not self.selected() else False
 
+    @instrumented
     def selected(self):
         """Return True if element is selected
 
@@ -452,6 +485,7 @@ class TextMixin(ElementMixin):
     def __str__(self):
         return self.text()
 
+    @instrumented
     def text(self):
         """Returns the text within an element
 
@@ -459,8 +493,11 @@ class TextMixin(ElementMixin):
         :rtype: str
         """
 
-        return str(self.element().get_attribute('textContent')).strip() if self.exists() else ''
+        text = self._read('text', scripts.TEXT_CONTENT)
+
+        return str(text).strip() if text is not None else ''
 
+    @instrumented
     def visible_text(self):
         """Returns the visible text within an element
 
@@ -0,0 +1,524 @@
+# -*- coding: utf-8 -*-
+"""sda.monitor
+
+Synthetic monitoring: journeys run on fixed intervals with jitter, each on pooled sessions and under its own
+:func:`sda.deadline`. Success counts and journey and step latencies are exported in the Prometheus text format, to a
+textfile for the node exporter or over HTTP.
+
+.. code-block:: python
+
+    from selenium import webdriver
+    from sda.monitor import Monitor, step
+
+    monitor = Monitor(webdriver.Chrome, size=3, site=ExampleSite, textfile='/var/lib/node_exporter/sda.prom')
+
+    @monitor.journey('login', every=60, deadline=30)
+    def login(site):
+
+        with step('open'):
+            site.login.navigate_to()
+
+        with step('submit'):
+            site.login.submit('monitor', password)
+
+    monitor.serve(9109)
+    monitor.run()
+
+Every journey runs on a thread of its own, at most once at a time, so it never holds more than one session. A run
+still going when the next one is due makes that one count as 'skipped', and a run going on past its deadline plus
+:data:`GRACE` counts as a 'timeout' straight away. A slow journey therefore delays only itself, provided the pool has
+a session per journey; a pool the monitor creates is grown to one.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+import heapq
+import os
+import random
+import tempfile
+import threading
+import time
+from selenium.common.exceptions import TimeoutException
+from sda import instrument
+from sda.metrics import PERCENTILES, Latency, escape_label, format_sample, percentile
+from sda.pool import DriverPool, PoolTimeout
+from sda.waits import deadline as _deadline
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except (ImportError, ModuleNotFoundError):
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+__all__ = ['Journey', 'Monitor', 'step']
+
+DEFAULT_JITTER = 0.1
+DEFAULT_SIZE = 4
+DEFAULT_WINDOW = 100
+# Seconds past its deadline before a run is given up on
+GRACE = 5.0
+RESULTS = ('success', 'failure', 'timeout', 'skipped')
+
+_RUN = threading.local()
+
+
+@contextmanager
+def step(name):
+    """Time part of a journey. Outside a monitored run the block just runs
+
+    :param str name: Step name
+    :return:
+    """
+
+    steps = getattr(_RUN, 'steps', None)
+    start = time.time()
+
+    try:
+
+        with instrument.scope(name):
+            yield
+
+    finally:
+        if steps is not None:
+            steps.append((name, time.time() - start))
+
+
+class Journey(object):
+    """The Journey implementation
+
+    A registered journey, its schedule and its results.
+    """
+
+    def __init__(self, name, func, every, deadline=None, jitter=DEFAULT_JITTER, window=DEFAULT_WINDOW):
+        """Monitored journey
+
+        :param str name: Journey name, exported as the 'journey' label
+        :param func: Callable taking the Site (or the driver, without a site)
+        :param float every: Seconds between runs
+        :param float deadline: Time budget of a run in seconds. Defaults to the interval
+        :param float jitter: Fraction of the interval each run may start late by, spreading journeys out
+        :param int window: Recent runs latency quantiles are computed over
+        """
+
+        self.name = name
+        self.func = func
+        self.every = every
+        self.deadline = deadline if deadline is not None else every
+        self.jitter = jitter
+        self.results = Counter(dict((result, 0) for result in RESULTS))
+        self.duration = Latency(window)
+        self.steps = {}
+        self.last_error = None
+        self.last_success = None
+        self.up = None
+
+        self._window = window
+        self._started = None
+        self._abandoned = False
+
+    def __repr__(self):
+        return '<Journey {} every={}s deadline={}s>'.format(self.name, self.every, self.deadline)
+
+    @property
+    def running(self):
+        """Returns True while a run is in progress, including one already counted as a timeout
+
+        :rtype: bool
+        """
+
+        return self._started is not None
+
+
+class Monitor(object):
+    """The Monitor implementation
+    """
+
+    def __init__(self, pool, size=DEFAULT_SIZE, site=None, textfile=None, checkout_timeout=None):
+        """Synthetic monitor. Nothing runs before :meth:`start` or :meth:`run`
+
+        :param pool: DriverPool, or a factory for a pool of ``size`` sessions the monitor closes when stopped
+        :param int size: Sessions, when the monitor creates the pool. At least one per journey
+        :param site: Site factory, ex. a Site subclass, called with the leased driver for every run
+        :param str textfile: File the metrics are written to after every run, for the node exporter textfile collector
+        :param float checkout_timeout: Seconds a run waits for a session. Defaults to the journey's deadline
+        """
+
+        self.owned = not isinstance(pool, DriverPool)
+        self.pool = DriverPool(pool, size=size) if self.owned else pool
+        self.site = site
+        self.textfile = textfile
+        self.checkout_timeout = checkout_timeout
+        self.journeys = {}
+
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._scheduler = None
+        self._servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def add(self, name, func, every, deadline=None, jitter=DEFAULT_JITTER, window=DEFAULT_WINDOW):
+        """Register a journey
+
+        :param str name: Journey name
+        :param func: Callable taking the Site (or the driver, without a site)
+        :param float every: Seconds between runs
+        :param float deadline: Time budget of a run in seconds. Defaults to the interval
+        :param float jitter: Fraction of the interval each run may start late by
+        :param int window: Recent runs latency quantiles are computed over
+        :return: Journey
+        :rtype: Journey
+        :raises ValueError: If a journey has that name already
+        """
+
+        with self._lock:
+
+            if name in self.journeys:
+                raise ValueError('A journey named {!r} is already registered'.format(name))
+
+            self.journeys[name] = Journey(name, func, every, deadline, jitter, window)
+
+        return self.journeys[name]
+
+    def journey(self, name, every, deadline=None, jitter=DEFAULT_JITTER, window=DEFAULT_WINDOW):
+        """Decorator registering a journey, see :meth:`add`
+
+        :return: Decorator
+        """
+
+        def register(func):
+
+            self.add(name, func, every, deadline, jitter, window)
+            return func
+
+        return register
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format
+
+        :return: Metrics
+        :rtype: str
+        """
+
+        lines = []
+
+        def metric(name, kind, description, samples):
+
+            lines.extend(['# HELP {} {}'.format(name, description), '# TYPE {} {}'.format(name, kind)])
+
+            for suffix, labels, value in samples:
+
+                label_text = ','.join('{}="{}"'.format(key, escape_label(label)) for key, label in labels)
+                lines.append('{}{{{}}} {}'.format(suffix, label_text, format_sample(value)))
+
+        def summary(name, labels, latency):
+
+            samples = [(name, labels + [('quantile', str(rank / 100.0))], percentile(list(latency.window), rank))
+                       for rank in PERCENTILES]
+
+            return samples + [(name + '_sum', labels, latency.total), (name + '_count', labels, latency.count)]
+
+        with self._lock:
+
+            journeys = [self.journeys[name] for name in sorted(self.journeys)]
+
+            metric('sda_journey_runs_total', 'counter', 'Journey runs by result.',
+                   [('sda_journey_runs_total', [('journey', journey.name), ('result', result)],
+                     journey.results[result]) for journey in journeys for result in RESULTS])
+            metric('sda_journey_up', 'gauge', '1 if the last run succeeded, 0 if it did not.',
+                   [('sda_journey_up', [('journey', journey.name)], int(journey.up))
+                    for journey in journeys if journey.up is not None])
+            metric('sda_journey_last_success_timestamp_seconds', 'gauge', 'When the journey last succeeded.',
+                   [('sda_journey_last_success_timestamp_seconds', [('journey', journey.name)], journey.last_success)
+                    for journey in journeys if journey.last_success is not None])
+            metric('sda_journey_duration_seconds', 'summary', 'Journey duration over recent runs.',
+                   [sample for journey in journeys
+                    for sample in summary('sda_journey_duration_seconds', [('journey', journey.name)],
+                                          journey.duration)])
+            metric('sda_journey_step_duration_seconds', 'summary', 'Journey step duration over recent runs.',
+                   [sample for journey in journeys for name in sorted(journey.steps)
+                    for sample in summary('sda_journey_step_duration_seconds',
+                                          [('journey', journey.name), ('step', name)], journey.steps[name])])
+
+        return '\n'.join(lines) + '\n'
+
+    def run(self):
+        """Run journeys until :meth:`stop` is called or the process is interrupted
+
+        :return:
+        """
+
+        self.start()
+
+        try:
+            while not self._stopped.wait(1):
+                pass
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            self.stop()
+
+    def run_once(self, name):
+        """Run a journey now, on the calling thread
+
+        :param str name: Journey name
+        :return: Result: 'success', 'failure' or 'timeout'
+        :rtype: str
+        """
+
+        journey = self.journeys[name]
+
+        with self._lock:
+
+            if journey.running:
+                raise RuntimeError('Journey {!r} is already running'.format(name))
+
+            journey._started = time.time()
+
+        return self._execute(journey)
+
+    def serve(self, port, host=''):
+        """Serve the metrics over HTTP at /metrics on a background thread, until :meth:`stop`
+
+        :param int port: Port, or 0 for any free port
+        :param str host: Interface to listen on. Defaults to all
+        :return: Server address (host, port)
+        :rtype: tuple
+        """
+
+        monitor = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                if self.path.split('?')[0] != '/metrics':
+                    return self.send_error(404)
+
+                body = monitor.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = _MetricsServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, name='sda-monitor-http')
+        thread.daemon = True
+        thread.start()
+        self._servers.append(server)
+
+        return server.server_address
+
+    def start(self):
+        """Start the pool, when the monitor owns it, and the scheduler
+
+        :return: self
+        :rtype: Monitor
+        """
+
+        if self.owned:
+
+            self.pool.size = max(self.pool.size, len(self.journeys))
+            self.pool.start()
+
+        self._stopped.clear()
+        self._scheduler = threading.Thread(target=self._schedule, name='sda-monitor')
+        self._scheduler.daemon = True
+        self._scheduler.start()
+
+        return self
+
+    def stop(self):
+        """Stop scheduling and serving. Runs in progress finish on their own threads
+
+        :return:
+        """
+
+        self._stopped.set()
+
+        if self._scheduler is not None and self._scheduler is not threading.current_thread():
+            self._scheduler.join()
+
+        for server in self._servers:
+
+            server.shutdown()
+            server.server_close()
+
+        self._servers = []
+
+        if self.owned:
+            self.pool.close()
+
+    def write_textfile(self, path=None):
+        """Write the metrics to a file, replacing it whole so the node exporter never reads half of it
+
+        :param str path: Output file. Defaults to ``textfile``
+        :return:
+        """
+
+        path = path or self.textfile
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+
+        try:
+
+            with os.fdopen(handle, 'w') as output:
+                output.write(self.render())
+
+            os.chmod(temporary, 0o644)
+            getattr(os, 'replace', os.rename)(temporary, path)
+
+        except Exception:
+
+            os.remove(temporary)
+            raise
+
+    def _execute(self, journey):
+
+        steps = []
+        error = None
+        start = time.time()
+
+        _RUN.steps = steps
+
+        try:
+
+            with instrument.scope(journey.name, journey=journey.name), _deadline(journey.deadline):
+                with self.pool.lease(self.checkout_timeout or journey.deadline) as web_driver:
+                    journey.func(self.site(web_driver) if self.site is not None else web_driver)
+
+            result = 'success'
+
+        except (TimeoutException, PoolTimeout) as timeout:
+
+            # Out of time, or no session was free in time
+            result, error = 'timeout', timeout
+
+        except Exception as failure:
+            result, error = 'failure', failure
+
+        finally:
+            _RUN.steps = None
+
+        duration = time.time() - start
+
+        with self._lock:
+
+            journey._started = None
+
+            # Already counted by the scheduler
+            if journey._abandoned:
+
+                journey._abandoned = False
+                return 'timeout'
+
+            journey.results[result] += 1
+            journey.duration.add(duration)
+            journey.up = result == 'success'
+            journey.last_error = '{}: {}'.format(type(error).__name__, error) if error is not None else None
+
+            if result == 'success':
+                journey.last_success = time.time()
+
+            for name, seconds in steps:
+                journey.steps.setdefault(name, Latency(journey._window)).add(seconds)
+
+        self._export()
+
+        return result
+
+    def _export(self):
+
+        if self.textfile:
+
+            # A monitor keeps running when its textfile cannot be written
+            try:
+                self.write_textfile()
+
+            except (IOError, OSError):
+                pass
+
+    def _schedule(self):
+
+        now = time.time()
+        queue = []
+
+        with self._lock:
+            for journey in self.journeys.values():
+                heapq.heappush(queue, (now + random.uniform(0, journey.jitter * journey.every), now, journey.name))
+
+        while queue:
+
+            due, base, name = queue[0]
+
+            if self._stopped.wait(max(0, min(due, self._next_overdue()) - time.time())):
+                return
+
+            self._give_up()
+
+            if due > time.time():
+                continue
+
+            heapq.heappop(queue)
+            journey = self.journeys[name]
+
+            with self._lock:
+
+                if journey.running:
+                    journey.results['skipped'] += 1
+
+                else:
+
+                    journey._started = time.time()
+                    thread = threading.Thread(target=self._execute, args=(journey,), name='sda-monitor-' + name)
+                    thread.daemon = True
+                    thread.start()
+
+            # Fixed rate: the next run is due an interval after this one was, whatever the jitter or run time
+            base += journey.every
+            heapq.heappush(queue, (max(base, time.time()) + random.uniform(0, journey.jitter * journey.every), base,
+                                   name))
+
+    def _give_up(self):
+
+        now = time.time()
+        gave_up = False
+
+        with self._lock:
+
+            for journey in self.journeys.values():
+
+                if journey.running and not journey._abandoned and now - journey._started > journey.deadline + GRACE:
+
+                    journey._abandoned = True
+                    journey.results['timeout'] += 1
+                    journey.up = False
+                    journey.last_error = 'Run exceeded its {}s deadline'.format(journey.deadline)
+                    gave_up = True
+
+        if gave_up:
+            self._export()
+
+    def _next_overdue(self):
+
+        with self._lock:
+            return min([journey._started + journey.deadline + GRACE for journey in self.journeys.values()
+                        if journey.running and not journey._abandoned] or [float('inf')])
+
+
+class _MetricsServer(ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
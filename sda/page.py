@@ -9,7 +9,11 @@ from __future__ import unicode_literals
 import inspect
 import re
 from six import string_types
+from selenium.common.exceptions import WebDriverException
+from sda import scripts
 from sda.element import Element, SeleniumObject
+from sda.instrument import instrumented
+from sda.waits import limit_page_load
 
 try:
     from urlparse import urljoin, urlparse
@@ -17,7 +21,49 @@ except (ImportError, ModuleNotFoundError):
     from urllib.parse import urljoin, urlparse
 
 
-__all__ = ['Page']
+__all__ = ['Page', 'fill_path', 'url_pattern']
+
+LAYOUT_COLUMNS = ('x', 'y', 'width', 'height', 'displayed', 'in_viewport', 'covered')
+
+
+def fill_path(url_path, params=()):
+    """Returns a URL path with its placeholders filled
+
+    :param str url_path: URL path. Use Open API spec, ex. '/users/:id'
+    :param params: Values in placeholder order, or a dictionary of placeholder name to value
+    :return: URL path
+    :rtype: str
+    :raises IndexError: If a placeholder has no value
+    """
+
+    if isinstance(params, dict):
+
+        def value(match):
+
+            try:
+                return str(params[match.group(1)[1:]])
+
+            except KeyError:
+                raise IndexError('URL path has no value for {}'.format(match.group(1)))
+
+        return re.sub(r'(:\w+)', value, url_path)
+
+    try:
+        return re.sub(r'(:\w+)', '{}', url_path).format(*params)
+
+    except IndexError:
+        raise IndexError('URL path does not contain the correct number of args')
+
+
+def url_pattern(url_path):
+    """Returns a regular expression matching URL paths for a path template
+
+    :param str url_path: URL path. Use Open API spec, ex. '/users/:id'
+    :return: Regular expression
+    :rtype: str
+    """
+
+    return '^' + re.sub(r'(:\w+)', '.+', url_path) + '$'
 
 
 class Page(SeleniumObject):
@@ -38,6 +84,28 @@ class Page(SeleniumObject):
         # Instantiate page-level URL validation
         self._url_path = url_path if isinstance(url_path, string_types) else "/"
 
+    @instrumented
+    def computed_styles(self, names):
+        """Returns the computed values of CSS properties for every element on the page in a single round trip
+
+        :param list names: CSS properties
+        :return: Dictionary of element name to property values. Elements that do not exist map to an empty dict
+        :rtype: dict
+        """
+
+        elements = self.elements()
+        keys = sorted(elements)
+
+        try:
+            styles = self.driver.execute_script(scripts.COMPUTED_STYLES, [elements[key].search_term[1] for key in keys],
+                                                [str(name) for name in names])
+
+        except WebDriverException:
+            styles = [None] * len(keys)
+
+        return {key: style or {} for key, style in zip(keys, styles)}
+
+    @instrumented
     def elements(self):
         """Returns all testable elements on a page
 
@@ -47,6 +115,7 @@ class Page(SeleniumObject):
 
         return dict(inspect.getmembers(self, self.is_element))
 
+    @instrumented
     def in_view(self):
         """Returns True if the driver is currently within the scope of this page
 
@@ -54,7 +123,46 @@ class Page(SeleniumObject):
         :rtype: bool
         """
 
-        return bool(re.match('^' + re.sub(r'(:\w+)', '.+', self._url_path) + '$', urlparse(self.url).path))
+        return bool(re.match(url_pattern(self._url_path), urlparse(self.url).path))
+
+    @instrumented
+    def layout(self, table=False):
+        """Returns the bounding rect and visibility of every element on the page in a single round trip
+
+        Each element maps to a dict with its bounding client rect (x, y, width, height), whether it is displayed (same
+        rules as :meth:`Element.is_displayed`), whether it intersects the viewport and whether its center is covered by
+        another element (None when the center is outside the viewport). Elements that do not exist map to None.
+
+        :param bool table: True, to return a printable table instead of a dict
+        :return: Layout of every element
+        :rtype: dict or str
+        """
+
+        elements = self.elements()
+        keys = sorted(elements)
+
+        try:
+            rects = self.driver.execute_script(scripts.LAYOUT, [elements[key].search_term[1] for key in keys])
+
+        except WebDriverException:
+            rects = [None] * len(keys)
+
+        layout = dict(zip(keys, rects))
+
+        if not table:
+            return layout
+
+        rows = [('name',) + LAYOUT_COLUMNS]
+
+        for key in keys:
+
+            rect = layout[key]
+            rows.append((key,) + (tuple(str(rect[column]) for column in LAYOUT_COLUMNS) if rect
+                                  else ('-',) * len(LAYOUT_COLUMNS)))
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+
+        return '\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
 
     @staticmethod
     def is_element(attrib=None):
@@ -67,17 +175,17 @@ class Page(SeleniumObject):
 
         return not(inspect.isroutine(attrib)) and isinstance(attrib, Element)
 
+    @instrumented
     def navigate_to(self, *args):
-        """Navigate to path
+        """Navigate to path. Inside :func:`sda.deadline` the page load is bounded by the budget left
 
         :return:
+        :raises sda.waits.DeadlineExceeded: If the deadline's budget is already spent
         """
 
-        try:
-            path = re.sub(r'(:\w+)', '{}', self._url_path).format(*args)
-
-        except IndexError:
-            raise IndexError('URL path does not contain the correct number of args')
+        path = fill_path(self._url_path, args)
+        self.cache.invalidate()
+        limit_page_load(self.driver)
 
         if not self.in_view():
 
@@ -87,6 +195,7 @@ class Page(SeleniumObject):
         self.driver.refresh()
 
     @property
+    @instrumented
     def title(self):
         """Return page title
 
@@ -97,6 +206,7 @@ class Page(SeleniumObject):
         return self.driver.title
 
     @property
+    @instrumented
     def url(self):
         """Current page URL
 
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""sda.pool
+
+A thread-safe pool of WebDriver sessions for running journeys in parallel. Sessions come from a user factory, are
+leased to one thread at a time, and are reset (cookies, localStorage, sessionStorage) before the next lease. A session
+that fails its health check or raises a WebDriver error is quit and replaced.
+
+.. code-block:: python
+
+    from selenium import webdriver
+    from sda.pool import DriverPool
+
+    def journey(site, sku):
+        site.product.navigate_to(sku)
+        return site.product.price.text()
+
+    with DriverPool(lambda: webdriver.Chrome(), size=4) as pool:
+
+        prices = pool.map(journey, ['A-1', 'B-2', 'C-3'], site=ExampleSite)
+
+        with pool.site(ExampleSite) as site:
+            site.home.navigate_to()
+
+.. note:: Cookies and storage are cleared for the page the session is on when it is checked in, which is where a
+    journey normally ends. Data left on other origins survives until the session is recycled.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import threading
+from selenium.common.exceptions import WebDriverException
+from sda import scripts
+from sda.cache import dom_cache
+
+try:
+    from Queue import Empty, Queue
+except (ImportError, ModuleNotFoundError):
+    from queue import Empty, Queue
+
+__all__ = ['DriverPool', 'PoolTimeout', 'healthy', 'reset']
+
+DEFAULT_SIZE = 4
+
+# Queued in place of a session whose replacement failed, so a waiting checkout wakes up and fills the slot
+_VACANT = object()
+
+
+class PoolTimeout(Exception):
+    """Raised when no session is checked in before a checkout times out"""
+
+    pass
+
+
+def healthy(web_driver):
+    """Returns True if the session still answers commands
+
+    :param WebDriver web_driver: Selenium web driver
+    :return: True, if the session is usable
+    :rtype: bool
+    """
+
+    try:
+        web_driver.current_url
+        return True
+
+    except WebDriverException:
+        return False
+
+
+def reset(web_driver):
+    """Clear cookies, localStorage and sessionStorage for the current page, and drop sda's cached reads
+
+    :param WebDriver web_driver: Selenium web driver
+    :return:
+    :raises WebDriverException: If the session cannot be reset
+    """
+
+    dom_cache(web_driver).invalidate()
+    web_driver.delete_all_cookies()
+    web_driver.execute_script(scripts.CLEAR_STORAGE)
+
+
+class DriverPool(object):
+    """The DriverPool implementation
+
+    ``size`` sessions created by ``factory`` and handed out with :meth:`checkout` and :meth:`checkin`, or with the
+    :meth:`lease` and :meth:`site` context managers.
+    """
+
+    def __init__(self, factory, size=DEFAULT_SIZE, reset_between=True, check_health=True, max_uses=None):
+        """Driver pool. Sessions start on :meth:`start` or when entering the ``with`` block
+
+        :param factory: Callable returning a new Selenium web driver
+        :param int size: Number of sessions
+        :param bool reset_between: True, to clear cookies and storage when a session is checked in
+        :param bool check_health: True, to check a session answers before handing it out
+        :param int max_uses: Leases before a session is replaced, or None to keep it until it fails
+        """
+
+        self.factory = factory
+        self.size = size
+        self.reset_between = reset_between
+        self.check_health = check_health
+        self.max_uses = max_uses
+        self.created = 0
+        self.recycled = 0
+
+        self._idle = Queue()
+        self._lock = threading.Lock()
+        self._drivers = []
+        self._uses = {}
+        self._closed = False
+        self._starting = 0
+        self._vacancies = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def drivers(self):
+        """Returns every session in the pool, idle or leased
+
+        :rtype: list
+        """
+
+        with self._lock:
+            return list(self._drivers)
+
+    @property
+    def idle(self):
+        """Returns the number of sessions waiting to be checked out
+
+        :rtype: int
+        """
+
+        # A checkout may have taken a vacancy and not yet counted it
+        with self._lock:
+            return max(self._idle.qsize() - self._vacancies, 0)
+
+    def checkin(self, web_driver, failed=False):
+        """Return a session to the pool
+
+        The session is reset, or replaced if it failed, was used ``max_uses`` times or cannot be reset.
+
+        :param WebDriver web_driver: Session from :meth:`checkout`
+        :param bool failed: True, if the session raised a WebDriver error or failed otherwise
+        :return:
+        """
+
+        with self._lock:
+
+            if not any(driver is web_driver for driver in self._drivers):
+                raise ValueError('{!r} was not checked out of this pool'.format(web_driver))
+
+            self._uses[id(web_driver)] += 1
+            worn = self.max_uses is not None and self._uses[id(web_driver)] >= self.max_uses
+
+        if self._closed:
+            return self._discard(web_driver)
+
+        if not failed and not worn and self.reset_between:
+
+            try:
+                reset(web_driver)
+
+            except WebDriverException:
+                failed = True
+
+        if failed or worn:
+
+            self._discard(web_driver)
+
+            with self._lock:
+                self.recycled += 1
+
+            if not self._reserve():
+                return
+
+            try:
+                web_driver = self._create()
+
+            except Exception:
+
+                # The slot is left for the next checkout to fill, and a checkout already waiting is woken up for it
+                with self._lock:
+
+                    self._vacancies += 1
+                    self._idle.put(_VACANT)
+
+                return
+
+        self._idle.put(web_driver)
+
+    def checkout(self, timeout=None):
+        """Take a session out of the pool, waiting for one to be checked in if none is idle
+
+        :param float timeout: Seconds to wait, or None to wait forever
+        :return: Selenium web driver
+        :rtype: WebDriver
+        :raises PoolTimeout: If no session was checked in before the timeout
+        """
+
+        if self._closed:
+            raise RuntimeError('The driver pool is closed')
+
+        try:
+            web_driver = self._idle.get_nowait()
+
+        except Empty:
+
+            # Slots left empty by a failed replacement are filled here
+            if self._reserve():
+                return self._create()
+
+            try:
+                web_driver = self._idle.get(timeout=timeout)
+
+            except Empty:
+                raise PoolTimeout('No session was checked in within {} seconds'.format(timeout))
+
+        if web_driver is _VACANT:
+
+            with self._lock:
+                self._vacancies -= 1
+
+            return self.checkout(timeout)
+
+        if self.check_health and not healthy(web_driver):
+
+            self._discard(web_driver)
+
+            with self._lock:
+                self.recycled += 1
+
+            return self.checkout(timeout)
+
+        return web_driver
+
+    def close(self):
+        """Quit every session. Leased sessions are quit when checked in
+
+        :return:
+        """
+
+        self._closed = True
+
+        while True:
+
+            try:
+                web_driver = self._idle.get_nowait()
+
+            except Empty:
+                break
+
+            if web_driver is _VACANT:
+
+                with self._lock:
+                    self._vacancies -= 1
+
+            else:
+                self._discard(web_driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Check a session out for the block. It is replaced if the block raises a WebDriver error or leaves the
+        session unhealthy
+
+        :param float timeout: Seconds to wait for a session, or None to wait forever
+        :return: Selenium web driver
+        :rtype: WebDriver
+        """
+
+        web_driver = self.checkout(timeout)
+        failed = False
+
+        try:
+            yield web_driver
+
+        except WebDriverException:
+
+            failed = True
+            raise
+
+        except Exception:
+
+            failed = not healthy(web_driver)
+            raise
+
+        finally:
+            self.checkin(web_driver, failed)
+
+    def map(self, journey, inputs, site=None, workers=None, timeout=None):
+        """Run a journey once per input across the pool's sessions
+
+        :param journey: Callable taking a Site (or the driver, without site) and one input
+        :param inputs: Journey inputs
+        :param site: Site factory, ex. a Site subclass, called with the leased driver for every input
+        :param int workers: Threads to run journeys on. Defaults to the pool size
+        :param float timeout: Seconds each journey waits for a session, or None to wait forever
+        :return: Journey results, in input order
+        :rtype: list
+        :raises Exception: The first exception raised by a journey, once every journey has finished
+        """
+
+        def run(item):
+
+            with self.lease(timeout) as web_driver:
+                return journey(site(web_driver) if site is not None else web_driver, item)
+
+        with ThreadPoolExecutor(max_workers=workers or self.size) as executor:
+            futures = [executor.submit(run, item) for item in inputs]
+
+        return [future.result() for future in futures]
+
+    @contextmanager
+    def site(self, factory, timeout=None):
+        """Lease a session for the block, bound to a Site (or any page object taking a driver)
+
+        :param factory: Site factory, ex. a Site subclass
+        :param float timeout: Seconds to wait for a session, or None to wait forever
+        :return: Site bound to the leased driver
+        """
+
+        with self.lease(timeout) as web_driver:
+            yield factory(web_driver)
+
+    def start(self):
+        """Start every session. If one cannot be started, the ones already started are quit
+
+        :return: self
+        :rtype: DriverPool
+        :raises Exception: Whatever the factory raised
+        """
+
+        try:
+
+            while self._reserve():
+                self._idle.put(self._create())
+
+        except Exception:
+
+            # __exit__ does not run when __enter__ raises
+            self.close()
+            raise
+
+        return self
+
+    def _create(self):
+
+        # Callers reserve the slot first, see _reserve
+        try:
+            web_driver = self.factory()
+
+        except Exception:
+
+            with self._lock:
+                self._starting -= 1
+
+            raise
+
+        with self._lock:
+
+            self._starting -= 1
+            self._drivers.append(web_driver)
+            self._uses[id(web_driver)] = 0
+            self.created += 1
+
+        return web_driver
+
+    def _reserve(self):
+
+        with self._lock:
+
+            if len(self._drivers) + self._starting >= self.size:
+                return False
+
+            self._starting += 1
+            return True
+
+    def _discard(self, web_driver):
+
+        with self._lock:
+
+            self._drivers = [driver for driver in self._drivers if driver is not web_driver]
+            self._uses.pop(id(web_driver), None)
+
+        # A session being discarded is often already gone
+        try:
+            web_driver.quit()
+
+        except Exception:
+            pass
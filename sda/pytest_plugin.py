@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""sda.pytest_plugin
+
+pytest integration, registered through the ``pytest11`` entry point (or ``-p sda.pytest_plugin``).
+
+``--sda-metrics`` collects :mod:`sda.metrics` for the whole run and prints the sda methods and locators that sent the
+most WebDriver commands in the terminal summary.
+
+``--sda-trace DIR`` records :mod:`sda.trace` spans with one root span per test, and writes ``sda-trace.json`` (Chrome
+trace events) and ``sda-trace.otlp.json`` (OTLP) to DIR when the run ends.
+
+``--sda-waits FILE`` records every sda wait, prints per-locator histograms and writes recommended timeouts to FILE.
+``--sda-wait-profile FILE`` loads such a file, so waits without an explicit timeout use the recommendation.
+
+``--sda-affinity`` orders tests so the tests of each page (see :mod:`sda.affinity`) run back to back and, under
+pytest-xdist with ``--dist loadgroup``, on the same worker. ``--sda-affinity-chunk N`` splits pages with more than N
+tests over several workers. The ``sda_page`` fixture loads the marked page on the worker's ``sda_driver`` only when
+the driver is not already on it, and the terminal summary reports the navigation time saved.
+
+.. code-block:: python
+
+    @pytest.mark.sda_page(page=LoginPage)
+    def test_remember_me(sda_page):
+        assert not sda_page.remember_me.selected()
+
+``sda_driver`` is one driver per worker, created by the ``--sda-driver module:factory`` callable; override the
+fixture to create it differently.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from importlib import import_module
+import inspect
+import os
+import pytest
+from sda import affinity, instrument, waits
+from sda.metrics import Metrics
+from sda.page import Page
+from sda.trace import Tracer
+
+__all__ = ['pytest_addoption', 'pytest_collection_modifyitems', 'pytest_configure', 'pytest_runtest_call',
+           'pytest_sessionfinish', 'pytest_terminal_summary', 'pytest_testnodedown', 'pytest_unconfigure',
+           'sda_driver', 'sda_navigate', 'sda_page']
+
+
+def pytest_addoption(parser):
+
+    group = parser.getgroup('sda', 'selenium data attributes')
+    group.addoption('--sda-metrics', action='store_true', default=False,
+                    help='Count WebDriver commands per sda method and locator')
+    group.addoption('--sda-metrics-limit', type=int, default=20,
+                    help='Rows per table in the sda metrics summary')
+    group.addoption('--sda-trace', metavar='DIR', default=None,
+                    help='Write Chrome trace-event and OTLP JSON spans of every sda call to DIR')
+    group.addoption('--sda-waits', metavar='FILE', default=None,
+                    help='Record every sda wait and write recommended timeouts to FILE')
+    group.addoption('--sda-wait-margin', type=float, default=waits.DEFAULT_MARGIN,
+                    help='Margin applied to the p99 wait time when recommending timeouts')
+    group.addoption('--sda-wait-profile', metavar='FILE', default=None,
+                    help='Use the timeouts in FILE for waits called without an explicit timeout')
+    group.addoption('--sda-affinity', action='store_true', default=False,
+                    help='Run the tests of each page back to back, and on one xdist worker with --dist loadgroup')
+    group.addoption('--sda-affinity-chunk', type=int, default=0,
+                    help='Tests per xdist group, so pages with many tests spread over several workers')
+    group.addoption('--sda-driver', metavar='FACTORY', default=None,
+                    help='module:callable creating the driver of the sda_driver fixture')
+    group.addoption('--sda-base-url', metavar='URL', default=None,
+                    help='Scheme and host the sda_page fixture loads pages from')
+    parser.addini('sda_page_fixtures', type='linelist', default=[],
+                  help='"fixture = page" lines naming the page tests using a fixture target')
+
+
+def pytest_configure(config):
+
+    config.sda_metrics = Metrics().start() if config.getoption('--sda-metrics') else None
+    config.sda_tracer = Tracer().start() if config.getoption('--sda-trace') else None
+    config.sda_waits = waits.WaitStats().start() if config.getoption('--sda-waits') else None
+    config.sda_navigation = affinity.NavigationStats()
+    config.addinivalue_line('markers', 'sda_page(url_path, page=None, args=(), fresh=False): url_path or Page class '
+                                       'the test targets, see sda.affinity')
+
+    if config.getoption('--sda-wait-profile'):
+        waits.load_profile(config.getoption('--sda-wait-profile'))
+
+
+# Before xdist turns xdist_group markers into scheduling groups
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(session, config, items):
+
+    if not config.getoption('--sda-affinity'):
+        return
+
+    fixtures = affinity.parse_fixtures(config.getini('sda_page_fixtures'))
+    keys = [affinity.target_of(item, fixtures) for item in items]
+    ordered = affinity.order(list(zip(items, keys)), keys)
+    items[:] = [item for item, _ in ordered]
+
+    if not config.pluginmanager.hasplugin('xdist'):
+        return
+
+    positions = {}
+
+    for item, key in ordered:
+
+        if key is not None:
+
+            positions[key] = positions.get(key, -1) + 1
+            item.add_marker(pytest.mark.xdist_group(
+                affinity.group_name(key, positions[key], config.getoption('--sda-affinity-chunk'))))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+
+    if getattr(item.config, 'sda_tracer', None):
+
+        with instrument.scope(item.nodeid, test=item.nodeid):
+            yield
+
+    else:
+        yield
+
+
+def pytest_sessionfinish(session):
+
+    # On an xdist worker, hand the navigation stats to the controller
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['sda_navigation'] = session.config.sda_navigation.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+
+    node.config.sda_navigation.merge(getattr(node, 'workeroutput', {}).get('sda_navigation'))
+
+
+def pytest_unconfigure(config):
+
+    if getattr(config, 'sda_metrics', None):
+        config.sda_metrics.stop()
+
+    tracer = getattr(config, 'sda_tracer', None)
+
+    if tracer:
+
+        tracer.stop()
+        directory = config.getoption('--sda-trace')
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        tracer.export_chrome(os.path.join(directory, 'sda-trace.json'))
+        tracer.export_otlp(os.path.join(directory, 'sda-trace.otlp.json'))
+
+    stats = getattr(config, 'sda_waits', None)
+
+    if stats:
+
+        stats.stop()
+        stats.save_profile(config.getoption('--sda-waits'), margin=config.getoption('--sda-wait-margin'))
+
+    if config.getoption('--sda-wait-profile'):
+        waits.clear_profile()
+
+
+def pytest_terminal_summary(terminalreporter):
+
+    # The config argument is only passed from pytest 4.2
+    config = terminalreporter.config
+
+    navigation = getattr(config, 'sda_navigation', None)
+    report = navigation.report() if navigation else ''
+
+    if report:
+
+        terminalreporter.section('sda navigations (saved {:.1f}s by reusing loaded pages)'.format(navigation.saved()))
+
+        for line in report.splitlines():
+            terminalreporter.write_line(line)
+
+    stats = getattr(config, 'sda_waits', None)
+    report = stats.report() if stats else ''
+
+    if report:
+
+        terminalreporter.section('sda waits (count per duration bucket, slowest first)')
+
+        for line in report.splitlines():
+            terminalreporter.write_line(line)
+
+    metrics = getattr(config, 'sda_metrics', None)
+
+    if not metrics:
+        return
+
+    limit = config.getoption('--sda-metrics-limit')
+    report = metrics.report(limit)
+
+    if not report:
+        return
+
+    terminalreporter.section('sda commands by method')
+
+    for line in report.splitlines():
+        terminalreporter.write_line(line)
+
+    locators = sorted(metrics.locators.items(), key=lambda item: (-item[1]['commands'], item[0]))[:limit]
+
+    if locators:
+
+        terminalreporter.section('sda commands by locator')
+
+        for locator, summary in locators:
+
+            latency = summary['latency_p50']
+            terminalreporter.write_line('{:>8}  {:>9}  {}'.format(
+                summary['commands'], '{:.1f} ms'.format(latency * 1000) if latency is not None else '-', locator))
+
+
+@pytest.fixture(scope='session')
+def sda_driver(request):
+    """One driver per worker, created by the --sda-driver factory and quit when the run ends"""
+
+    factory = request.config.getoption('--sda-driver')
+
+    if not factory:
+        raise pytest.UsageError('sda_driver needs --sda-driver module:callable, or a fixture overriding it')
+
+    module, _, name = factory.partition(':')
+    target = import_module(module)
+
+    for attribute in name.split('.'):
+        target = getattr(target, attribute)
+
+    web_driver = target()
+
+    yield web_driver
+
+    web_driver.quit()
+
+
+@pytest.fixture
+def sda_navigate(request, sda_driver):
+    """Returns navigate(page, *args, fresh=False), loading a page unless the driver is already on it"""
+
+    base_url = request.config.getoption('--sda-base-url') or request.config.getoption('base_url', None)
+
+    def navigate(page, *args, **kwargs):
+        return affinity.navigate(page, args, request.config.sda_navigation, base_url, kwargs.get('fresh', False),
+                                 kwargs.get('key'))
+
+    return navigate
+
+
+@pytest.fixture
+def sda_page(request, sda_driver, sda_navigate):
+    """The page of the test's sda_page marker, loaded on sda_driver unless the driver is already on it"""
+
+    marker = affinity.page_marker(request.node)
+    target = affinity.marker_page(marker)
+
+    if target is None:
+        raise pytest.UsageError('{} uses sda_page without an sda_page marker'.format(request.node.nodeid))
+
+    page = target(sda_driver) if inspect.isclass(target) else Page(sda_driver, target)
+
+    sda_navigate(page, *marker.kwargs.get('args', ()), fresh=marker.kwargs.get('fresh', False),
+                 key=affinity.page_key(target))
+
+    return page
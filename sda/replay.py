@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""sda.replay
+
+Record every WebDriver command a journey sends, with its response and latency, and play the recording back without
+a browser. Replaying as fast as possible leaves only sda's own Python overhead in the wall time; replaying at recorded
+timing adds each command's recorded browser latency back.
+
+.. code-block:: python
+
+    from sda.replay import ReplayDriver, record
+
+    with record(driver, 'checkout.sda.gz'):
+        checkout(ExampleSite(driver))
+
+    replay = ReplayDriver('checkout.sda.gz')
+    checkout(ExampleSite(replay))
+    replay.commands  # Counter({'findElements': 12, 'executeScript': 9, ...})
+
+Recordings are gzipped JSON Lines: a header with the session, then one ``[start, duration, command, params,
+response]`` entry per command, where start and duration are seconds.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+import gzip
+import json
+import threading
+import time
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+__all__ = ['RecordingExecutor', 'ReplayDriver', 'ReplayError', 'ReplayExecutor', 'load', 'record']
+
+FORMAT_VERSION = 1
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'), sort_keys=True)
+
+
+def load(path):
+    """Read a recording
+
+    :param str path: Recording file
+    :return: Header, entries
+    :rtype: tuple
+    """
+
+    with gzip.open(path, 'rb') as recording:
+        lines = [json.loads(line.decode('utf-8')) for line in recording if line.strip()]
+
+    if not lines or lines[0].get('version') != FORMAT_VERSION:
+        raise ValueError('{} is not an sda recording'.format(path))
+
+    return lines[0], lines[1:]
+
+
+class ReplayError(WebDriverException):
+    """Raised when a replayed journey sends a command the recording does not have next"""
+
+    pass
+
+
+class RecordingExecutor(object):
+    """The RecordingExecutor implementation
+
+    Wraps a driver's command executor, passing every command through and appending it to a recording. Anything else is
+    delegated to the wrapped executor.
+    """
+
+    def __init__(self, executor, path, web_driver=None):
+        """Recording command executor
+
+        :param executor: Command executor to wrap
+        :param str path: Recording file
+        :param WebDriver web_driver: Driver whose session is stored in the header
+        """
+
+        self.executor = executor
+        self.path = path
+
+        self._file = gzip.open(path, 'wb')
+        self._lock = threading.Lock()
+        self._start = time.time()
+
+        self._write({'version': FORMAT_VERSION,
+                     'session_id': getattr(web_driver, 'session_id', None),
+                     'w3c': getattr(web_driver, 'w3c', False),
+                     'capabilities': getattr(web_driver, 'capabilities', {}) or {}})
+
+    def __getattr__(self, item):
+        return getattr(self.__dict__['executor'], item)
+
+    def close(self):
+        """Finish the recording
+
+        :return:
+        """
+
+        with self._lock:
+
+            if not self._file.closed:
+                self._file.close()
+
+    def execute(self, command, params):
+        """Execute a command and record it
+
+        :param str command: Selenium command name
+        :param dict params: Command parameters
+        :return: Response
+        :rtype: dict
+        """
+
+        start = time.time()
+        response = self.executor.execute(command, params)
+        duration = time.time() - start
+
+        self._write([round(start - self._start, 6), round(duration, 6), command, params, response])
+
+        return response
+
+    def _write(self, entry):
+
+        with self._lock:
+            self._file.write((_dumps(entry) + '\n').encode('utf-8'))
+
+
+@contextmanager
+def record(web_driver, path):
+    """Record the commands a driver sends until the block exits
+
+    :param WebDriver web_driver: Selenium web driver
+    :param str path: Recording file
+    :return: Recording executor
+    :rtype: RecordingExecutor
+    """
+
+    executor = RecordingExecutor(web_driver.command_executor, path, web_driver)
+    web_driver.command_executor = executor
+
+    try:
+        yield executor
+
+    finally:
+        web_driver.command_executor = executor.executor
+        executor.close()
+
+
+class ReplayExecutor(object):
+    """The ReplayExecutor implementation
+
+    Answers commands from a recording, in order. Session commands are answered from the header, so a fresh driver can
+    start on a recording that began mid-session.
+    """
+
+    def __init__(self, path, realtime=False, strict=True):
+        """Replay command executor
+
+        :param str path: Recording file
+        :param bool realtime: Sleep for each command's recorded duration before answering
+        :param bool strict: Raise ReplayError if a command's parameters differ from the recording
+        """
+
+        self.header, self.entries = load(path)
+        self.realtime = realtime
+        self.strict = strict
+        self.commands = Counter()
+        self.position = 0
+        self.w3c = self.header['w3c']
+
+        self._lock = threading.Lock()
+
+    @property
+    def browser_time(self):
+        """Recorded seconds spent waiting on the browser for the commands replayed so far
+
+        :return: Seconds
+        :rtype: float
+        """
+
+        return sum(entry[1] for entry in self.entries[:self.position])
+
+    @property
+    def remaining(self):
+        """Number of recorded commands not replayed yet
+
+        :return: Commands left
+        :rtype: int
+        """
+
+        return len(self.entries) - self.position
+
+    def execute(self, command, params):
+        """Return the next recorded response
+
+        :param str command: Selenium command name
+        :param dict params: Command parameters
+        :return: Response
+        :rtype: dict
+        """
+
+        if command == Command.NEW_SESSION:
+            return self._new_session()
+
+        with self._lock:
+
+            if self.position >= len(self.entries):
+
+                if command == Command.QUIT:
+                    return {'status': 0, 'value': None}
+
+                raise ReplayError('Recording exhausted, {} was not recorded'.format(command))
+
+            _, duration, recorded, recorded_params, response = self.entries[self.position]
+
+            if recorded != command or (self.strict and _dumps(recorded_params) != _dumps(params)):
+                raise ReplayError('Replay diverged at command {}: expected {} {}, got {} {}'.format(
+                    self.position, recorded, _dumps(recorded_params)[:200], command, _dumps(params)[:200]))
+
+            self.position += 1
+            self.commands[command] += 1
+
+        if self.realtime and duration:
+            time.sleep(duration)
+
+        return response
+
+    def _new_session(self):
+
+        if self.w3c:
+            return {'value': {'sessionId': self.header['session_id'], 'capabilities': self.header['capabilities']}}
+
+        return {'status': 0, 'sessionId': self.header['session_id'], 'value': self.header['capabilities']}
+
+
+class ReplayDriver(WebDriver):
+    """The ReplayDriver implementation
+
+    A selenium WebDriver bound to a :class:`ReplayExecutor`. sda objects built on it send the same commands as the
+    recorded journey and get the recorded responses back.
+    """
+
+    def __init__(self, path, realtime=False, strict=True):
+        """Replay web driver
+
+        :param str path: Recording file
+        :param bool realtime: Sleep for each command's recorded duration before answering
+        :param bool strict: Raise ReplayError if a command's parameters differ from the recording
+        """
+
+        super(ReplayDriver, self).__init__(command_executor=ReplayExecutor(path, realtime, strict),
+                                           desired_capabilities={})
+
+    @property
+    def browser_time(self):
+        """Recorded seconds spent waiting on the browser for the commands replayed so far"""
+
+        return self.command_executor.browser_time
+
+    @property
+    def commands(self):
+        """Counter of replayed commands by name"""
+
+        return self.command_executor.commands
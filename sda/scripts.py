@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""sda.scripts
+
+JavaScript snippets sda sends through ``execute_script``. Keeping them in one place lets drivers that do not run a
+real browser recognize sda's helper set by value.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+__all__ = ['ATTRIBUTES', 'CLEAR_STORAGE', 'COMPUTED_STYLES', 'ELEMENT_STATES', 'GENERATION', 'LAYOUT', 'NAME_WINDOW',
+           'OPEN_WINDOW', 'OPTIONS', 'READY', 'RESTORE_STORAGE', 'SET_VALUE', 'STORAGE', 'TEXT_CONTENT',
+           'XPATH_EXISTS']
+
+
+# Installs the DOM generation counter on first use and sets `generation`. The id changes on every page load and the
+# counter is bumped on any mutation, form input or history navigation.
+_GENERATION = "var sda = window.__sda;" \
+              "if (!sda) {" \
+              "sda = window.__sda = {id: Math.random().toString(36).slice(2), n: 0};" \
+              "var bump = function () { sda.n += 1; };" \
+              "new MutationObserver(bump).observe(document, " \
+              "{attributes: true, characterData: true, childList: true, subtree: true});" \
+              "['input', 'change'].forEach(function (e) { document.addEventListener(e, bump, true); });" \
+              "['hashchange', 'popstate'].forEach(function (e) { window.addEventListener(e, bump); });" \
+              "}" \
+              "var generation = sda.id + ':' + sda.n;"
+
+# Sets `node` to the first node matching the xpath in arguments[0]
+_NODE = "var node = document.evaluate(arguments[0], document, null, " \
+        "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;"
+
+# Defines `attribute(node, name)`, mirroring what WebElement.get_attribute returns for a name
+_ATTRIBUTE = "var attribute = function (node, name) {" \
+             "var lower = name.toLowerCase(), tag = node.tagName.toLowerCase(), value;" \
+             "if (lower === 'style') { return node.style ? node.style.cssText : null; }" \
+             "if ((lower === 'selected' || lower === 'checked') && " \
+             "(tag === 'option' || /^(checkbox|radio)$/i.test(node.type || ''))) {" \
+             "return node.selected || node.checked ? 'true' : null; }" \
+             "if ((tag === 'img' && lower === 'src') || (tag === 'a' && lower === 'href')) {" \
+             "return node.getAttribute(lower) !== null ? node[lower] : null; }" \
+             "if (BOOLEAN_ATTRIBUTES.indexOf(lower) >= 0) {" \
+             "return node.getAttribute(name) !== null || node[name] ? 'true' : null; }" \
+             "try { value = node[{'class': 'className', readonly: 'readOnly'}[name] || name]; } catch (e) {}" \
+             "if (value === null || value === undefined || " \
+             "typeof value === 'object' || typeof value === 'function') {" \
+             "value = node.getAttribute(name); }" \
+             "return value !== null && value !== undefined ? String(value) : null;" \
+             "};"
+
+_BOOLEAN_ATTRIBUTES = "var BOOLEAN_ATTRIBUTES = ('allowfullscreen async autofocus autoplay checked compact controls " \
+                      "declare default defaultchecked defaultselected defer disabled formnovalidate hidden " \
+                      "indeterminate ismap itemscope loop multiple muted nohref noresize noshade novalidate nowrap " \
+                      "open readonly required reversed scoped seamless selected').split(' ');"
+
+# arguments[0]: absolute xpath, arguments[1]: attribute name. Returns [generation, {name: value}] holding every
+# attribute set on the node plus the requested name, or null values if nothing matches.
+ATTRIBUTES = _GENERATION + _NODE + _BOOLEAN_ATTRIBUTES + _ATTRIBUTE + \
+    "if (!node) { return [generation, null]; }" \
+    "var values = {};" \
+    "[].forEach.call(node.attributes, function (a) { values[a.name] = attribute(node, a.name); });" \
+    "values[arguments[1]] = attribute(node, arguments[1]);" \
+    "return [generation, values];"
+
+# Empties localStorage and sessionStorage of the current origin. Pages without storage (about:blank, data: URLs)
+# throw on access, which is ignored.
+CLEAR_STORAGE = "try { window.localStorage.clear(); } catch (e) {}" \
+                "try { window.sessionStorage.clear(); } catch (e) {}"
+
+# arguments[0]: list of absolute xpaths, arguments[1]: list of CSS property names. Returns one {property: value}
+# object per xpath, or null where nothing matches.
+COMPUTED_STYLES = "var names = arguments[1];" \
+                  "return arguments[0].map(function (xpath) {" \
+                  "var node = document.evaluate(xpath, document, null, " \
+                  "XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;" \
+                  "if (!node || node.nodeType !== 1) { return null; }" \
+                  "var style = window.getComputedStyle(node), values = {};" \
+                  "names.forEach(function (name) { values[name] = style.getPropertyValue(name); });" \
+                  "return values;" \
+                  "});"
+
+# Defines `displayed(node)`, following the rules of Selenium's isDisplayed atom
+_DISPLAYED = "var displayed = function (node) {" \
+             "var tag = node.tagName.toLowerCase();" \
+             "if (tag === 'input' && (node.type || '').toLowerCase() === 'hidden') { return false; }" \
+             "if (tag === 'option' || tag === 'optgroup') {" \
+             "var select = node.closest('select'); if (select) { return displayed(select); } }" \
+             "for (var n = node; n && n.nodeType === 1; n = n.parentElement) {" \
+             "var s = window.getComputedStyle(n);" \
+             "if (s.display === 'none' || parseFloat(s.opacity) === 0) { return false; } }" \
+             "var style = window.getComputedStyle(node);" \
+             "if (style.visibility === 'hidden' || style.visibility === 'collapse') { return false; }" \
+             "var sized = function (n) { var r = n.getBoundingClientRect(); return r.width > 0 && r.height > 0; };" \
+             "return sized(node) || [].some.call(node.querySelectorAll('*'), sized);" \
+             "};"
+
+# arguments[0]: list of absolute xpaths. Returns one {x, y, width, height, displayed, in_viewport, covered} object per
+# xpath, or null where nothing matches. covered is null when the element's center is not in the viewport.
+LAYOUT = _DISPLAYED + \
+    "var vw = window.innerWidth || document.documentElement.clientWidth, " \
+    "vh = window.innerHeight || document.documentElement.clientHeight;" \
+    "return arguments[0].map(function (xpath) {" \
+    "var node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;" \
+    "if (!node || node.nodeType !== 1) { return null; }" \
+    "var r = node.getBoundingClientRect(), cx = r.left + r.width / 2, cy = r.top + r.height / 2, covered = null;" \
+    "if (cx >= 0 && cy >= 0 && cx < vw && cy < vh) {" \
+    "var hit = document.elementFromPoint(cx, cy); covered = !!hit && hit !== node && !node.contains(hit); }" \
+    "return {x: r.left, y: r.top, width: r.width, height: r.height, displayed: displayed(node), " \
+    "in_viewport: r.right > 0 && r.bottom > 0 && r.left < vw && r.top < vh, covered: covered};" \
+    "});"
+
+# arguments[0]: list of absolute xpaths. Returns one state per xpath: 0 if nothing matches, 1 if the first match is
+# not displayed, 2 if it is displayed.
+ELEMENT_STATES = _DISPLAYED + \
+    "return arguments[0].map(function (xpath) {" \
+    "var node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;" \
+    "if (!node || node.nodeType !== 1) { return 0; }" \
+    "return displayed(node) ? 2 : 1;" \
+    "});"
+
+# Returns the DOM generation
+GENERATION = _GENERATION + "return generation;"
+
+# arguments[0]: window name. Names the current window, returning its previous name.
+NAME_WINDOW = "var previous = window.name; window.name = arguments[0]; return previous;"
+
+# arguments[0]: URL, arguments[1]: window name. Loads the URL in the named window, opening one if there is none, and
+# returns without waiting for the load. Returns the browser clock (ms) from before the request, or null if the browser
+# refused to open the window.
+OPEN_WINDOW = "var requested = Date.now();" \
+              "return window.open(arguments[0], arguments[1]) ? requested : null;"
+
+# arguments[0]: absolute xpath. Returns [generation, [[text, selected], ...]], or null options if not a select.
+OPTIONS = _GENERATION + _NODE + \
+    "return [generation, node && node.tagName.toLowerCase() === 'select' ? " \
+    "[].map.call(node.options, function (o) { return [o.text, o.selected]; }) : null];"
+
+# arguments[0]: browser clock (ms) a load was requested at, or null. Returns True once the current document started
+# loading after that time and finished loading.
+READY = "return document.readyState === 'complete' && (!arguments[0] || performance.timeOrigin >= arguments[0]);"
+
+# arguments[0]: {key: value} for localStorage, arguments[1]: {key: value} for sessionStorage. Sets every item on the
+# current origin, ignoring storage the page cannot access.
+RESTORE_STORAGE = "[[function () { return window.localStorage; }, arguments[0]], " \
+                  "[function () { return window.sessionStorage; }, arguments[1]]].forEach(function (pair) {" \
+                  "try { var storage = pair[0]();" \
+                  "Object.keys(pair[1]).forEach(function (key) { storage.setItem(key, pair[1][key]); });" \
+                  "} catch (e) {} });"
+
+# arguments[0]: element, arguments[1]: value. Setting a value fires no mutation, so the generation is bumped by hand.
+SET_VALUE = "arguments[0].value = arguments[1]; if (window.__sda) { window.__sda.n += 1; }"
+
+# Returns {local: {key: value}, session: {key: value}} for the current origin. Storage the page cannot access is empty.
+STORAGE = "var read = function (get) { var items = {};" \
+          "try { var storage = get();" \
+          "for (var i = 0; i < storage.length; i++) { items[storage.key(i)] = storage.getItem(storage.key(i)); }" \
+          "} catch (e) {} return items; };" \
+          "return {local: read(function () { return window.localStorage; }), " \
+          "session: read(function () { return window.sessionStorage; })};"
+
+# arguments[0]: absolute xpath. Returns [generation, textContent], or null text if nothing matches.
+TEXT_CONTENT = _GENERATION + _NODE + "return [generation, node ? node.textContent : null];"
+
+# arguments[0]: absolute xpath. Returns True if at least one node matches.
+XPATH_EXISTS = 'return document.evaluate(arguments[0], document, null, ' \
+               'XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;'
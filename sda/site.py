@@ -6,6 +6,9 @@
 """
 
 from sda.element import SeleniumObject
+from sda.instrument import instrumented
+from sda.state import StateCache, capture, origin, restore
+from sda.tabs import Tabs
 
 try:
     from urlparse import urljoin, urlparse
@@ -59,9 +62,14 @@ class Site(SeleniumObject):
                 self.page_1 = Page1(web_driver)
                 self.page_2 = Page2(web_driver)
 
+    Saved states (see :mod:`sda.state`) go to ``state_cache``, or to a default :class:`sda.state.StateCache` when it
+    is None.
     """
 
+    state_cache = None
+
     @property
+    @instrumented
     def domain(self):
         """Returns the domain for a website
 
@@ -72,6 +80,7 @@ class Site(SeleniumObject):
         return urlparse(self.url).netloc
 
     @property
+    @instrumented
     def path(self):
         """Returns the website path
 
@@ -82,6 +91,7 @@ class Site(SeleniumObject):
         return urlparse(self.url).path
 
     @property
+    @instrumented
     def url(self):
         """Current page URL
 
@@ -90,3 +100,125 @@ class Site(SeleniumObject):
         """
 
         return self.driver.current_url
+
+    @property
+    def _states(self):
+        return self.state_cache if self.state_cache is not None else StateCache()
+
+    @instrumented
+    def crawl(self, routes, workers=None, pool=None, output=None, base_url=None, timeout=None):
+        """Visit every route across a pool of drivers and check, in one round trip per page, that the elements exist
+
+        Results stream to ``output`` as JSON Lines, see :func:`sda.crawl.crawl`.
+
+        .. code-block:: python
+
+            summary = site.crawl({'home': None, 'user': [1, 2, 3]}, workers=8, pool=webdriver.Chrome,
+                                 output='sweep.jsonl')
+            assert summary['missing'] == summary['error'] == 0
+
+        :param dict routes: Page attribute name to parameter sets filling the page's url_path, or None
+        :param int workers: Visits run in parallel. Defaults to :data:`sda.crawl.DEFAULT_WORKERS`
+        :param pool: DriverPool, or a driver factory. Defaults to this site's driver, one visit at a time
+        :param output: File path or writable file for the JSON lines. Defaults to stdout
+        :param str base_url: Scheme and host the paths are joined to. Defaults to those of the current URL
+        :param float timeout: Seconds each visit waits for a driver, or None to wait forever
+        :return: Counts of 'pages' visited, 'ok', 'missing' and 'error', and the crawl's wall 'seconds'
+        :rtype: dict
+        """
+
+        # Imported here so importing sda does not import the thread pools the crawl runs on
+        from sda.crawl import DEFAULT_WORKERS, crawl
+
+        return crawl(self, routes, workers or DEFAULT_WORKERS, pool, output, base_url, timeout)
+
+    @instrumented
+    def ensure_state(self, key, setup, urls=None):
+        """Restore a saved state, or run the setup that produces it and save the result
+
+        .. code-block:: python
+
+            site.ensure_state('admin', lambda s: s.login.as_user('admin', password))
+            site.dashboard.navigate_to()
+
+        :param str key: State name
+        :param setup: Callable taking the site, run only when the cache is cold or expired
+        :param list urls: Other URLs whose origins the setup writes to, see :meth:`save_state`
+        :return: True, if the state was restored without running the setup
+        :rtype: bool
+        """
+
+        if self.restore_state(key):
+            return True
+
+        setup(self)
+        self.save_state(key, urls)
+
+        return False
+
+    @instrumented
+    def restore_state(self, key):
+        """Load the cookies and storage saved under a key into the browser
+
+        Origins other than the current one are loaded to set their state. Navigate to the page under test afterwards.
+
+        :param str key: State name
+        :return: True, if a fresh state was restored. False, if the cache is cold or the state expired
+        :rtype: bool
+        """
+
+        origins = self._states.load(key)
+
+        if origins is None:
+            return False
+
+        restore(self.driver, origins)
+
+        return True
+
+    @instrumented
+    def save_state(self, key, urls=None):
+        """Save the cookies, localStorage and sessionStorage of the current origin under a key
+
+        :param str key: State name
+        :param list urls: Pages on other origins to save as well, ex. a single sign-on domain. Each is loaded, and the
+            browser returns to the current page afterwards
+        :return: File the state was saved to
+        :rtype: str
+        """
+
+        start = self.driver.current_url
+        origins = {}
+
+        if origin(start):
+            origins[origin(start)] = capture(self.driver)
+
+        for url in urls or []:
+
+            self.driver.get(url)
+            origins[origin(self.driver.current_url)] = capture(self.driver)
+
+        if urls:
+            self.driver.get(start)
+
+        return self._states.save(key, origins)
+
+    @instrumented
+    def tabs(self, count, base_url=None, timeout=None):
+        """Open windows in this site's session, to overlap page loads in some with work in another
+
+        See :class:`sda.tabs.Tabs`.
+
+        .. code-block:: python
+
+            with site.tabs(4) as tabs:
+                titles = [title for _, title in tabs.map(lambda page: page.title, site.user, user_ids)]
+
+        :param int count: Windows, including the current one
+        :param str base_url: Scheme and host page paths are joined to. Defaults to those of the current URL
+        :param float timeout: Seconds to wait for a page to load. Defaults to the deadline's budget left, or 300
+        :return: Open tabs, closed when used as a context manager
+        :rtype: Tabs
+        """
+
+        return Tabs(self, count, base_url, timeout).open()
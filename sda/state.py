@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""sda.state
+
+Saved browser state - cookies, localStorage and sessionStorage per origin - so an expensive setup such as logging in
+through the UI runs once and later sessions restore its result. States are JSON files in a cache directory and expire
+after a TTL. See :meth:`sda.site.Site.save_state`, :meth:`sda.site.Site.restore_state` and
+:meth:`sda.site.Site.ensure_state`.
+
+.. code-block:: python
+
+    from sda.state import StateCache
+
+    class ExampleSite(Site):
+
+        state_cache = StateCache('.sda-state', ttl=1800)
+
+    site = ExampleSite(driver)
+
+    # Logs in through the UI only when no saved login is fresh enough
+    site.ensure_state('admin', lambda s: s.login.as_user('admin', password))
+
+.. warning:: Saved states hold session cookies. Cache files are readable by their owner only, and a state is not
+    read from a file or directory another user owns or can write to. Keep the directory out of version control.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from sda import scripts
+from sda.cache import dom_cache
+
+try:
+    from urlparse import urlparse
+except (ImportError, ModuleNotFoundError):
+    from urllib.parse import urlparse
+
+__all__ = ['StateCache', 'capture', 'origin', 'restore']
+
+DEFAULT_DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'sda-state')
+DEFAULT_TTL = 3600
+STATE_VERSION = 1
+
+
+def _private(status, mask):
+
+    # Windows has no POSIX owners or modes to check
+    if not hasattr(os, 'getuid'):
+        return True
+
+    return status.st_uid == os.getuid() and not status.st_mode & mask
+
+
+def origin(url):
+    """Returns the origin of a URL, ex. 'https://example.com:8443'
+
+    :param str url: Absolute URL
+    :return: Origin, or None for URLs without one (about:blank, data: URLs)
+    :rtype: str
+    """
+
+    parsed = urlparse(url)
+
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return None
+
+    return '{}://{}'.format(parsed.scheme, parsed.netloc)
+
+
+def capture(web_driver):
+    """Returns the cookies and storage visible to the current page
+
+    :param WebDriver web_driver: Selenium web driver
+    :return: Dictionary with 'cookies', 'local' and 'session'
+    :rtype: dict
+    """
+
+    storage = web_driver.execute_script(scripts.STORAGE) or {}
+
+    return {'cookies': web_driver.get_cookies(), 'local': storage.get('local') or {},
+            'session': storage.get('session') or {}}
+
+
+def restore(web_driver, origins):
+    """Load saved cookies and storage into a session, visiting each origin to do so
+
+    Cookies and storage can only be set for the page the browser is on, so every origin other than the current one is
+    loaded once. The session is left on the last origin restored.
+
+    :param WebDriver web_driver: Selenium web driver
+    :param dict origins: Origin to state, as returned by :func:`capture`
+    :return:
+    """
+
+    now = time.time()
+    current = origin(web_driver.current_url)
+
+    # The current origin first, as it needs no page load
+    for name in sorted(origins, key=lambda item: (item != current, item)):
+
+        state = origins[name]
+
+        if origin(web_driver.current_url) != name:
+            web_driver.get(name + '/')
+
+        for cookie in state.get('cookies', []):
+
+            # Browsers reject cookies that already expired
+            if cookie.get('expiry') is not None and cookie['expiry'] <= now:
+                continue
+
+            web_driver.add_cookie(cookie)
+
+        web_driver.execute_script(scripts.RESTORE_STORAGE, state.get('local', {}), state.get('session', {}))
+        dom_cache(web_driver).invalidate()
+
+
+class StateCache(object):
+    """The StateCache implementation
+
+    One JSON file per key. A state older than ``ttl`` seconds reads as missing.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, ttl=DEFAULT_TTL):
+        """Saved state cache
+
+        :param str directory: Directory holding the state files. Created on first save
+        :param float ttl: Seconds a saved state stays usable, or None to keep states until cleared
+        """
+
+        self.directory = directory
+        self.ttl = ttl
+
+    def __repr__(self):
+        return '<StateCache directory={!r} ttl={}>'.format(self.directory, self.ttl)
+
+    def age(self, key):
+        """Returns how long ago a state was saved
+
+        :param str key: State name
+        :return: Seconds since the state was saved, or None if there is no state
+        :rtype: float
+        """
+
+        state = self._read(key)
+
+        return time.time() - state['saved'] if state else None
+
+    def clear(self, key=None):
+        """Delete a saved state, or every state in the directory
+
+        :param str key: State name, or None for every state
+        :return:
+        """
+
+        if key is not None:
+            paths = [self.path(key)]
+
+        elif os.path.isdir(self.directory):
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.endswith('.json')]
+
+        else:
+            paths = []
+
+        for path in paths:
+
+            try:
+                os.remove(path)
+
+            except OSError:
+                pass
+
+    def load(self, key):
+        """Returns a saved state, unless it expired
+
+        :param str key: State name
+        :return: Origin to state, or None if there is no fresh state
+        :rtype: dict
+        """
+
+        state = self._read(key)
+
+        if state is None or (self.ttl is not None and time.time() - state['saved'] > self.ttl):
+            return None
+
+        return state['origins']
+
+    def path(self, key):
+        """Returns the file a state is saved to
+
+        :param str key: State name
+        :return: File path
+        :rtype: str
+        """
+
+        name = re.sub(r'[^\w.-]+', '_', key)[:64]
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+        return os.path.join(self.directory, '{}-{}.json'.format(name, digest))
+
+    def save(self, key, origins):
+        """Save a state, replacing any previous one under the key
+
+        The file is written whole and then renamed, so parallel workers never read a partial state.
+
+        :param str key: State name
+        :param dict origins: Origin to state, as returned by :func:`capture`
+        :return: File path
+        :rtype: str
+        """
+
+        if not os.path.isdir(self.directory):
+
+            try:
+                os.makedirs(self.directory, 0o700)
+
+            # Another worker created it first
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+
+        path = self.path(key)
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+
+        try:
+
+            with os.fdopen(handle, 'w') as output:
+                json.dump({'version': STATE_VERSION, 'key': key, 'saved': time.time(), 'origins': origins}, output)
+
+            getattr(os, 'replace', os.rename)(temporary, path)
+
+        except Exception:
+
+            os.remove(temporary)
+            raise
+
+        return path
+
+    def _read(self, key):
+
+        try:
+
+            # Another user could plant a state in a directory they can write to, or read one they can open
+            if not _private(os.stat(self.directory), 0o022):
+                return None
+
+            with open(self.path(key)) as source:
+
+                if not _private(os.fstat(source.fileno()), 0o077):
+                    return None
+
+                state = json.load(source)
+
+        # A missing or damaged file is a cold cache
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(state, dict) or state.get('version') != STATE_VERSION or state.get('key') != key:
+            return None
+
+        return state
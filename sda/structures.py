@@ -12,6 +12,8 @@ import sys
 import warnings
 from selenium.webdriver.common.by import By
 from sda.element import Element, join
+from sda.instrument import instrumented
+from sda.waits import expired
 from sda.mixins import ClickMixin, InputMixin, SelectMixin, SelectiveMixin, TextMixin, to_int
 
 __all__ = ['Button', 'Div', 'Dropdown', 'Form', 'Image', 'InputCheckbox', 'InputRadio', 'InputText', 'Link',
@@ -163,6 +165,7 @@ class Dropdown(Element, ClickMixin, TextMixin):
                                '@ng-mouseover or @ng-click or @on-click)]')
 
     @property
+    @instrumented
     def container(self):
         """Dropdown container
 
@@ -180,6 +183,7 @@ class Dropdown(Element, ClickMixin, TextMixin):
         return Div(self.driver, By.XPATH, '|'.join([xpath_term[1], child_term[1]]))
 
     @property
+    @instrumented
     def toggle(self):
         """Show/hide toggle button
 
@@ -201,6 +205,7 @@ class Dropdown(Element, ClickMixin, TextMixin):
         else:
             self.toggle.click()
 
+    @instrumented
     def expand(self, hover=False):
         """Show dropdown
 
@@ -208,13 +213,18 @@ class Dropdown(Element, ClickMixin, TextMixin):
         :rtype: bool
         """
 
+        # Nothing left of the deadline's budget to wait for the dropdown with
+        if expired():
+            return False
+
         if not self.container.is_displayed():
-            self._toggle_or_hover(hover)
+            self._hover_or_click(hover)
 
             return self.container.wait_until_appears()
 
         return False
 
+    @instrumented
     def collapse(self, hover=False):
         """Hide dropdown
 
@@ -222,8 +232,12 @@ class Dropdown(Element, ClickMixin, TextMixin):
         :rtype: bool
         """
 
+        # Nothing left of the deadline's budget to wait for the dropdown with
+        if expired():
+            return False
+
         if self.container.is_displayed():
-            self._toggle_or_hover(hover)
+            self._hover_or_click(hover)
 
             return self.container.wait_until_disappears()
 
@@ -234,6 +248,7 @@ class Field(Element):
     """Field implementation
     """
 
+    @instrumented
     def label(self):
         """Returns the label for the input item
 
@@ -310,6 +325,7 @@ class Form(Element):
         if elements:
             return elements[0]
 
+    @instrumented
     def get_field(self, field_name):
         """Returns field with id `field_name`
 
@@ -384,6 +400,7 @@ class Image(Element):
             i.source()
     """
 
+    @instrumented
     def source(self):
         """Returns image source URL
 
@@ -711,6 +728,7 @@ class MultiSelect(Element):
         if isinstance(text, string_types):
             return Button(self.driver, *join(self.search_term, (By.XPATH, xpath.format(text))))
 
+    @instrumented
     def expand(self):
         """Show iSteven dropdown
 
@@ -718,6 +736,10 @@ class MultiSelect(Element):
         :rtype: bool
         """
 
+        # Nothing left of the deadline's budget to wait for the dropdown with
+        if expired():
+            return False
+
         if not self._container.is_displayed():
 
             self._toggle.click()
@@ -725,6 +747,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def collapse(self):
         """Hide iSteven dropdown
 
@@ -732,6 +755,10 @@ class MultiSelect(Element):
         :rtype: bool
         """
 
+        # Nothing left of the deadline's budget to wait for the dropdown with
+        if expired():
+            return False
+
         if self._container.is_displayed():
 
             self._toggle.click()
@@ -739,6 +766,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def select_all(self):
         """Select all possible selections
 
@@ -749,6 +777,7 @@ class MultiSelect(Element):
         self.expand()
         return self._select_all.click()
 
+    @instrumented
     def select_none(self):
         """Deselect all selections
 
@@ -759,6 +788,7 @@ class MultiSelect(Element):
         self.expand()
         return self._select_none.click()
 
+    @instrumented
     def reset(self):
         """Reset selection to default state
 
@@ -769,6 +799,7 @@ class MultiSelect(Element):
         self.expand()
         return self._reset.click()
 
+    @instrumented
     def search(self, value, clear=True):
         """Filter selections to those matching search criteria
 
@@ -781,6 +812,7 @@ class MultiSelect(Element):
         self.expand()
         return self._filter.input(value, clear)
 
+    @instrumented
     def clear_search(self):
         """Click clear search button
 
@@ -791,6 +823,7 @@ class MultiSelect(Element):
         self.expand()
         return self._clear.click()
 
+    @instrumented
     def select_by_index(self, index):
         """Select option at index 'i'
 
@@ -808,6 +841,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def select_by_text(self, text):
         """Select option that matches text criteria
 
@@ -825,6 +859,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def deselect_by_index(self, index):
         """Deselect option at index 'i'
 
@@ -842,6 +877,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def deselect_by_text(self, text):
         """Deselect option that matches text criteria
 
@@ -859,6 +895,7 @@ class MultiSelect(Element):
 
         return False
 
+    @instrumented
     def options(self, include_group=True):
         """Return all available options
 
@@ -879,6 +916,7 @@ class MultiSelect(Element):
         return [element.get_attribute('textContent').encode('ascii', 'ignore')
                 for element in self.driver.find_elements(*search_term)]
 
+    @instrumented
     def selected_options(self):
         """Return all selected options
 
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""sda.tabs
+
+Several windows of one browser session. A page is loaded into a window by name from whichever window is current, so
+the driver does not switch to start a load, and the load runs in the background while work goes on elsewhere. The
+driver switches only when work moves to another window, and every switch is timed. See :meth:`sda.site.Site.tabs`.
+
+.. code-block:: python
+
+    with site.tabs(4) as tabs:
+
+        for user_id, name in tabs.map(lambda page: page.name.text(), site.user, user_ids):
+            print(user_id, name)
+
+Windows find each other by name, which browsers allow between windows of the same site. Keep the pages of one
+:class:`Tabs` on the site the first window is on.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import deque
+import itertools
+import time
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.wait import WebDriverWait
+from sda import scripts
+from sda.cache import dom_cache
+from sda.page import fill_path
+from sda.state import origin
+from sda.waits import DEFAULT_PAGE_LOAD_TIMEOUT, limit_page_load, remaining
+
+try:
+    from urlparse import urljoin
+except (ImportError, ModuleNotFoundError):
+    from urllib.parse import urljoin
+
+__all__ = ['Tabs']
+
+POLL_INTERVAL = 0.02
+
+_IDS = itertools.count(1)
+
+
+def _params(params):
+    return params if isinstance(params, (dict, list, tuple)) else (params,)
+
+
+class Tabs(object):
+    """The Tabs implementation
+
+    Window ``0`` is the window the driver was on when the tabs were opened. The others are opened on
+    :meth:`open` and closed on :meth:`close`.
+    """
+
+    def __init__(self, site, count, base_url=None, timeout=None):
+        """Browser tabs
+
+        :param Site site: Site whose driver opens the windows
+        :param int count: Windows, including the current one
+        :param str base_url: Scheme and host page paths are joined to. Defaults to those of the site's current URL
+        :param float timeout: Seconds to wait for a page to load. Defaults to the deadline's budget left, or 300
+        :raises ValueError: If count is less than 1
+        """
+
+        if count < 1:
+            raise ValueError('Tabs needs at least one window, got {}'.format(count))
+
+        self.site = site
+        self.driver = site.driver
+        self.count = count
+        self.base_url = base_url
+        self.timeout = timeout
+
+        self.current = None
+        self.handles = []
+        self.names = ['sda-tabs-{}-{}'.format(next(_IDS), index) for index in range(count)]
+        self.pages = [None] * count
+        self.urls = [None] * count
+        self.switches = []
+        self.waits = []
+
+        self._name = None
+        self._requested = [None] * count
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getitem__(self, index):
+        return self.page(index)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def stats(self):
+        """Returns the switches made and the time spent waiting on loads
+
+        :return: Counts of 'switches' and 'waits', with the 'switch_seconds' and 'wait_seconds' they took
+        :rtype: dict
+        """
+
+        return {'switches': len(self.switches), 'switch_seconds': sum(self.switches), 'waits': len(self.waits),
+                'wait_seconds': sum(self.waits)}
+
+    def close(self):
+        """Close every window opened, leaving the driver on window 0
+
+        :return:
+        """
+
+        if not self.handles:
+            return
+
+        try:
+
+            for handle in reversed(self.handles[1:]):
+
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+
+            self.driver.switch_to.window(self.handles[0])
+            self.driver.execute_script(scripts.NAME_WINDOW, self._name or '')
+
+        finally:
+
+            dom_cache(self.driver).invalidate()
+            self.handles = []
+            self.current = None
+
+    def load(self, index, page, *args):
+        """Start loading a page in a window, without switching to it or waiting for the load
+
+        A page loaded into the current window is waited for, as :meth:`WebDriver.get` does.
+
+        :param int index: Window
+        :param Page page: Page object of the site
+        :param args: Values filling the page's url_path
+        :return: URL requested
+        :rtype: str
+        :raises ValueError: If there is no base_url and window 0 was not on a web page when the tabs were opened
+        """
+
+        return self._load(index, page, args)
+
+    def map(self, func, page, params):
+        """Call a function on a page for every parameter set, loading the next pages in the other windows meanwhile
+
+        Every window is loaded up front, the current one last as its load is waited for while the others load in
+        the background. After a page is done with, its window is loaded with the next parameter set as soon as the
+        driver has moved on to the next window.
+
+        .. code-block:: python
+
+            for user_id, name in tabs.map(lambda page: page.name.text(), site.user, user_ids):
+                ...
+
+        :param func: Callable taking the page, once it has loaded in the current window
+        :param Page page: Page object of the site
+        :param params: Parameter sets filling the page's url_path, each a single value, a sequence or a dictionary
+        :return: Generator of (parameter set, result), in the order of params
+        """
+
+        params = iter(params)
+        queue = deque()
+
+        def fill(index):
+
+            for value in itertools.islice(params, 1):
+
+                self._load(index, page, _params(value))
+                queue.append((index, value))
+
+        for index in list(range(1, self.count)) + [0]:
+            fill(index)
+
+        done = None
+
+        while queue:
+
+            index, value = queue.popleft()
+            self.switch(index)
+
+            # Refilled once the driver has left it, while this window finishes loading
+            if done is not None:
+                fill(done)
+
+            result = func(self.page(index))
+            done = index
+
+            if not queue:
+                fill(done)
+                done = None
+
+            yield value, result
+
+    def open(self):
+        """Open the windows
+
+        :return: self
+        :rtype: Tabs
+        :raises WebDriverException: If the browser refused to open a window
+        """
+
+        if self.handles:
+            return self
+
+        web_driver = self.driver
+        self.base_url = self.base_url or origin(web_driver.current_url)
+        self.handles.append(web_driver.current_window_handle)
+        self.current = 0
+        self._name = web_driver.execute_script(scripts.NAME_WINDOW, self.names[0])
+
+        try:
+
+            known = set(web_driver.window_handles)
+
+            for name in self.names[1:]:
+
+                if web_driver.execute_script(scripts.OPEN_WINDOW, 'about:blank', name) is None:
+                    raise WebDriverException('The browser refused to open a window, is a popup blocker on?')
+
+                handle = [item for item in web_driver.window_handles if item not in known][0]
+                self.handles.append(handle)
+                known.add(handle)
+
+        except Exception:
+
+            self.close()
+            raise
+
+        return self
+
+    def page(self, index):
+        """Returns the page of a window, switching to the window and waiting for its load if needed
+
+        :param int index: Window
+        :return: Page object last loaded into the window, or None
+        :rtype: Page
+        :raises selenium.common.exceptions.TimeoutException: If the page did not load within the timeout
+        """
+
+        self.switch(index)
+        requested = self._requested[index]
+
+        if requested is not None:
+
+            timeout = self.timeout if self.timeout is not None else remaining()
+            start = time.time()
+
+            WebDriverWait(self.driver, DEFAULT_PAGE_LOAD_TIMEOUT if timeout is None else timeout, POLL_INTERVAL).until(
+                lambda web_driver: web_driver.execute_script(scripts.READY, requested),
+                'Window {} did not load {}'.format(index, self.urls[index]))
+
+            self.waits.append(time.time() - start)
+            self._requested[index] = None
+            dom_cache(self.driver).invalidate()
+
+        return self.pages[index]
+
+    def switch(self, index):
+        """Switch the driver to a window, unless it is already there
+
+        :param int index: Window
+        :return: True, if the driver switched
+        :rtype: bool
+        """
+
+        if index == self.current:
+            return False
+
+        start = time.time()
+        self.driver.switch_to.window(self.handles[index])
+        self.switches.append(time.time() - start)
+
+        self.current = index
+        dom_cache(self.driver).invalidate()
+
+        return True
+
+    def _load(self, index, page, params):
+
+        if self.base_url is None:
+            raise ValueError('Tabs needs a base_url when window 0 is not on a web page')
+
+        url = urljoin(self.base_url, fill_path(page._url_path, params))
+        requested = None
+
+        if index != self.current:
+            requested = self.driver.execute_script(scripts.OPEN_WINDOW, url, self.names[index])
+
+        # The current window has nothing to overlap with, and a window the browser cannot reach by name is loaded in
+        # place
+        if requested is None:
+
+            self.switch(index)
+            dom_cache(self.driver).invalidate()
+            limit_page_load(self.driver)
+            self.driver.get(url)
+
+        self.pages[index], self.urls[index], self._requested[index] = page, url, requested
+
+        return url
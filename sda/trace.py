@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""sda.trace
+
+Nested timing spans for what sda does: scopes such as a test or journey, then Site, Page and Element methods, then
+the WebDriver commands they send. Spans carry the locator, the timeout and the result of the call, and export to Chrome
+trace-event JSON (opens in Perfetto or chrome://tracing) or OTLP JSON.
+
+.. code-block:: python
+
+    from sda import trace
+
+    with trace.record() as tracer:
+        with trace.span('checkout'):
+            site.cart.navigate_to()
+            site.cart.checkout.click()
+
+    tracer.export_chrome('checkout.trace.json')
+    tracer.export_otlp('checkout.otlp.json')
+
+When no tracer is recording, instrumented methods cost a single check.
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from contextlib import contextmanager
+import json
+import os
+import random
+import threading
+from six import integer_types, string_types
+from sda import instrument
+
+__all__ = ['Span', 'Tracer', 'record', 'span']
+
+MAX_VALUE_LENGTH = 200
+SERVICE_NAME = 'sda'
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_CLIENT = 3
+
+
+def _hex_id(bits):
+    return '{:0{}x}'.format(random.getrandbits(bits), bits // 4)
+
+
+def _value(value):
+
+    if value is None or isinstance(value, (bool, float) + integer_types):
+        return value
+
+    if isinstance(value, string_types):
+        return value[:MAX_VALUE_LENGTH]
+
+    return '<{}>'.format(type(value).__name__)
+
+
+class Span(object):
+    """The Span implementation
+
+    One finished sda call, scope or WebDriver command.
+    """
+
+    __slots__ = ('name', 'category', 'trace_id', 'span_id', 'parent_id', 'start', 'end', 'thread', 'attributes',
+                 'error')
+
+    def __init__(self, name, category, trace_id, span_id, parent_id, start, end, thread, attributes, error=None):
+        """Finished span
+
+        :param str name: Span name
+        :param str category: 'scope', 'sda' or 'webdriver'
+        :param str trace_id: 32 hex digit trace id
+        :param str span_id: 16 hex digit span id
+        :param str parent_id: Parent span id, or None for a root span
+        :param float start: Start, seconds since the epoch
+        :param float end: End, seconds since the epoch
+        :param int thread: Thread id
+        :param dict attributes: Span attributes
+        :param str error: Error message, if the call raised
+        """
+
+        self.name = name
+        self.category = category
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end = end
+        self.thread = thread
+        self.attributes = attributes
+        self.error = error
+
+    @property
+    def duration(self):
+        """Span duration in seconds"""
+
+        return self.end - self.start
+
+
+class Tracer(object):
+    """The Tracer implementation
+
+    An :mod:`sda.instrument` listener turning calls and commands into :class:`Span` objects.
+    """
+
+    def __init__(self):
+
+        self.spans = []
+
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def enter(self, call):
+        """Assign span ids to a starting call
+
+        :return:
+        """
+
+        parent = self._ids.get(id(call.parent)) if call.parent is not None else None
+        trace_id = parent[0] if parent else _hex_id(128)
+
+        with self._lock:
+            self._ids[id(call)] = (trace_id, _hex_id(64))
+
+    def exit(self, call, error):
+        """Finish the span of a call
+
+        :return:
+        """
+
+        with self._lock:
+            trace_id, span_id = self._ids.pop(id(call), (None, None))
+
+        if trace_id is None:
+            return
+
+        parent = self._ids.get(id(call.parent)) if call.parent is not None else None
+        attributes = dict((key, _value(value)) for key, value in call.attributes.items())
+
+        if call.locator:
+            attributes['sda.locator'] = call.locator
+
+        if call.func is not None:
+
+            arguments = call.arguments
+
+            if 'timeout' in arguments:
+                attributes['sda.timeout'] = _value(arguments['timeout'])
+
+            attributes['sda.result'] = _value(call.result)
+            attributes['sda.class'] = type(call.instance).__name__
+
+        self._add(Span(call.name, 'sda' if call.func is not None else 'scope', trace_id, span_id,
+                       parent[1] if parent else None, call.start, call.end, threading.current_thread().ident,
+                       attributes, str(error) if error is not None else None))
+
+    def command(self, stack, command, params, response, start, elapsed):
+        """Record a WebDriver command as a child span of the innermost call
+
+        :return:
+        """
+
+        parent = self._ids.get(id(stack[-1])) if stack else None
+        response = response if isinstance(response, dict) else {}
+        status = response.get('status')
+        value = response.get('value') if isinstance(response.get('value'), dict) else {}
+        error = None
+
+        # JSON wire errors have a non-zero status, W3C errors an error name
+        if status or 'error' in value:
+            error = value.get('message') or value.get('error') or 'status {}'.format(status)
+
+        attributes = {'webdriver.command': command}
+
+        if status is not None:
+            attributes['webdriver.status'] = status
+
+        if params and params.get('using'):
+            attributes['webdriver.locator'] = _value('{}={}'.format(params.get('using'), params.get('value')))
+
+        self._add(Span(command, 'webdriver', parent[0] if parent else _hex_id(128), _hex_id(64),
+                       parent[1] if parent else None, start, start + elapsed, threading.current_thread().ident,
+                       attributes, error))
+
+    def chrome_trace(self):
+        """Returns the spans as a Chrome trace-event document
+
+        :return: Trace document
+        :rtype: dict
+        """
+
+        pid = os.getpid()
+        events = []
+
+        for item in sorted(self.spans, key=lambda s: (s.start, -s.end)):
+
+            args = dict(item.attributes)
+
+            if item.error:
+                args['error'] = item.error
+
+            events.append({'name': item.name, 'cat': item.category, 'ph': 'X', 'pid': pid, 'tid': item.thread,
+                           'ts': int(item.start * 1e6), 'dur': max(1, int(item.duration * 1e6)), 'args': args})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome(self, path):
+        """Write the spans as Chrome trace-event JSON
+
+        :param str path: Output file
+        :return:
+        """
+
+        with open(path, 'w') as output:
+            json.dump(self.chrome_trace(), output)
+
+    def export_otlp(self, path):
+        """Write the spans as OTLP JSON (an ExportTraceServiceRequest)
+
+        :param str path: Output file
+        :return:
+        """
+
+        with open(path, 'w') as output:
+            json.dump(self.otlp(), output)
+
+    def otlp(self):
+        """Returns the spans as an OTLP JSON ExportTraceServiceRequest
+
+        :return: Request document
+        :rtype: dict
+        """
+
+        spans = []
+
+        for item in self.spans:
+
+            otlp_span = {'traceId': item.trace_id, 'spanId': item.span_id, 'name': item.name,
+                         'kind': KIND_CLIENT if item.category == 'webdriver' else KIND_INTERNAL,
+                         'startTimeUnixNano': str(int(item.start * 1e9)),
+                         'endTimeUnixNano': str(int(item.end * 1e9)),
+                         'attributes': [{'key': key, 'value': _otlp_value(value)}
+                                        for key, value in sorted(item.attributes.items())],
+                         'status': {'code': 2, 'message': item.error} if item.error else {'code': 1}}
+
+            if item.parent_id:
+                otlp_span['parentSpanId'] = item.parent_id
+
+            spans.append(otlp_span)
+
+        return {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{'scope': {'name': 'sda'}, 'spans': spans}]
+        }]}
+
+    def reset(self):
+        """Drop every finished span
+
+        :return:
+        """
+
+        with self._lock:
+            del self.spans[:]
+
+    def start(self):
+        """Start tracing
+
+        :return: self
+        :rtype: Tracer
+        """
+
+        instrument.add_listener(self)
+        return self
+
+    def stop(self):
+        """Stop tracing. Finished spans are kept
+
+        :return:
+        """
+
+        instrument.remove_listener(self)
+
+    def _add(self, item):
+
+        with self._lock:
+            self.spans.append(item)
+
+
+def _otlp_value(value):
+
+    if isinstance(value, bool):
+        return {'boolValue': value}
+
+    if isinstance(value, integer_types):
+        return {'intValue': str(value)}
+
+    if isinstance(value, float):
+        return {'doubleValue': value}
+
+    return {'stringValue': '' if value is None else value}
+
+
+@contextmanager
+def record(*web_drivers):
+    """Trace until the block exits
+
+    :param web_drivers: Drivers to watch from the start, so commands sent outside sda methods are traced too
+    :return: Tracer
+    :rtype: Tracer
+    """
+
+    tracer = Tracer()
+
+    for web_driver in web_drivers:
+        instrument.attach(web_driver)
+
+    tracer.start()
+
+    try:
+        yield tracer
+
+    finally:
+        tracer.stop()
+
+
+span = instrument.scope
@@ -0,0 +1,689 @@
+# -*- coding: utf-8 -*-
+"""sda.waits
+
+Every sda wait goes through :func:`wait_until`, which records how long it really took, whether the condition was
+met and which locator it was for. From those records sda can draw per-locator histograms and recommend tighter
+timeouts, and a saved recommendation can be loaded back as a timeout profile.
+
+.. code-block:: python
+
+    from sda import waits
+
+    with waits.record() as stats:
+        run_suite()
+
+    print(stats.report())
+    stats.save_profile('timeouts.json', margin=2.0)
+
+    # Later runs: waits called without an explicit timeout use the profile
+    waits.load_profile('timeouts.json')
+
+A :func:`deadline` shares one time budget between every wait, dropdown expand and navigation inside it:
+
+.. code-block:: python
+
+    with sda.deadline(45):
+        page.navigate_to()
+        page.menu.expand()
+        page.results.wait_until_appears()
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+import json
+import math
+import threading
+import time
+from six import integer_types
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException, \
+    WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as ec
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.wait import POLL_FREQUENCY
+from sda import instrument, scripts
+from sda.cache import dom_cache
+from sda.metrics import percentile
+
+__all__ = ['Deadline', 'DeadlineExceeded', 'Wait', 'WaitStats', 'clear_profile', 'deadline', 'expired', 'kind_of',
+           'limit_page_load', 'load_profile', 'page_load_timeout', 'record', 'remaining', 'timeout_for', 'wait_all',
+           'wait_any', 'wait_until']
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MARGIN = 1.5
+# W3C default page load timeout, restored when a deadline that shortened it ends
+DEFAULT_PAGE_LOAD_TIMEOUT = 300
+HISTOGRAM_BOUNDS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+KINDS = {
+    ec.presence_of_element_located: 'present',
+    ec.visibility_of_element_located: 'appears',
+    ec.invisibility_of_element_located: 'disappears',
+}
+MINIMUM_TIMEOUT = 1.0
+# W3C Get Timeouts, which Selenium 3 has no command for
+GET_TIMEOUTS = 'getTimeouts'
+PROFILE_VERSION = 1
+# Element states returned by sda.scripts.ELEMENT_STATES, and the states meeting each wait kind
+MISSING, HIDDEN, DISPLAYED = 0, 1, 2
+STATES = {
+    'present': (HIDDEN, DISPLAYED),
+    'appears': (DISPLAYED,),
+    'disappears': (MISSING, HIDDEN),
+}
+
+_DEADLINES = threading.local()
+_LOCK = threading.Lock()
+_PROFILE = {}
+_RECORDERS = []
+
+Wait = namedtuple('Wait', ('locator', 'kind', 'timeout', 'start', 'duration', 'met'))
+
+
+def _is_number(value):
+    return isinstance(value, (float,) + integer_types) and not isinstance(value, bool)
+
+
+class DeadlineExceeded(TimeoutException):
+    """Raised when a navigation starts after the deadline's budget is spent"""
+
+    pass
+
+
+class Deadline(object):
+    """The Deadline implementation
+
+    A time budget shared by everything sda waits for on this thread. Nested deadlines never extend an outer one.
+    """
+
+    def __init__(self, seconds, outer=None):
+        """Time budget
+
+        :param float seconds: Budget in seconds
+        :param Deadline outer: Enclosing deadline
+        """
+
+        self.seconds = seconds
+        self.end = time.time() + seconds
+
+        if outer is not None:
+            self.end = min(self.end, outer.end)
+
+        self.drivers = []
+
+    @property
+    def expired(self):
+        """Returns True once the budget is spent
+
+        :rtype: bool
+        """
+
+        return self.remaining <= 0
+
+    @property
+    def remaining(self):
+        """Returns the seconds left, never below 0
+
+        :rtype: float
+        """
+
+        return max(0.0, self.end - time.time())
+
+
+def _deadlines():
+
+    stack = getattr(_DEADLINES, 'stack', None)
+
+    if stack is None:
+        stack = _DEADLINES.stack = []
+
+    return stack
+
+
+@contextmanager
+def deadline(seconds):
+    """Share a time budget between every sda wait, dropdown expand and navigation in the block
+
+    Each wait uses the smaller of its own timeout and the budget left, so a broken page fails the first wait that
+    runs out instead of hanging every wait that follows for its full timeout.
+
+    :param float seconds: Budget in seconds
+    :return: Deadline
+    :rtype: Deadline
+    """
+
+    stack = _deadlines()
+    budget = Deadline(seconds, stack[-1] if stack else None)
+    stack.append(budget)
+
+    try:
+        yield budget
+
+    finally:
+        stack.pop()
+
+        for web_driver, previous in budget.drivers:
+
+            try:
+                web_driver.set_page_load_timeout(DEFAULT_PAGE_LOAD_TIMEOUT if previous is None else previous)
+
+            except WebDriverException:
+                pass
+
+
+def remaining():
+    """Returns the seconds left in the innermost deadline, or None outside of one
+
+    :return: Seconds left
+    :rtype: float
+    """
+
+    stack = _deadlines()
+
+    return stack[-1].remaining if stack else None
+
+
+def expired():
+    """Returns True inside a deadline whose budget is spent
+
+    :return: True, if the deadline has passed
+    :rtype: bool
+    """
+
+    left = remaining()
+
+    return left is not None and left <= 0
+
+
+def limit_page_load(web_driver):
+    """Bound the next page load by the deadline's remaining budget
+
+    Outside a deadline this does nothing. Inside one it costs one command, plus one the first time for each driver
+    to read its page load timeout, which is restored when the deadline ends. Drivers that cannot report it get the
+    W3C default of 300 seconds back.
+
+    :param WebDriver web_driver: Selenium web driver
+    :return:
+    :raises DeadlineExceeded: If the budget is already spent
+    """
+
+    stack = _deadlines()
+
+    if not stack:
+        return
+
+    budget = stack[-1]
+    left = budget.remaining
+
+    if left <= 0:
+        raise DeadlineExceeded('Deadline of {}s exceeded before navigating'.format(budget.seconds))
+
+    # The outermost deadline restores the timeout, after every nested one is done with it
+    if not any(driver is web_driver for driver, _ in stack[0].drivers):
+        stack[0].drivers.append((web_driver, page_load_timeout(web_driver)))
+
+    web_driver.set_page_load_timeout(max(1, int(math.ceil(left))))
+
+
+def page_load_timeout(web_driver):
+    """Returns the page load timeout of a W3C session
+
+    :param WebDriver web_driver: Selenium web driver
+    :return: Timeout in seconds, or None if the driver cannot tell
+    :rtype: float
+    """
+
+    commands = getattr(web_driver.command_executor, '_commands', None)
+
+    if commands is not None:
+        commands.setdefault(GET_TIMEOUTS, ('GET', '/session/$sessionId/timeouts'))
+
+    try:
+        value = web_driver.execute(GET_TIMEOUTS).get('value')
+
+    except WebDriverException:
+        return None
+
+    timeout = value.get('pageLoad') if isinstance(value, dict) else None
+
+    return timeout / 1000.0 if _is_number(timeout) else None
+
+
+def clear_profile():
+    """Stop using a timeout profile
+
+    :return:
+    """
+
+    _PROFILE.clear()
+
+
+def load_profile(path_or_profile):
+    """Use a timeout profile for waits called without an explicit timeout
+
+    :param path_or_profile: Profile file written by :meth:`WaitStats.save_profile`, or the profile itself
+    :return: Profile
+    :rtype: dict
+    """
+
+    if isinstance(path_or_profile, dict):
+        profile = path_or_profile
+
+    else:
+        with open(path_or_profile) as source:
+            profile = json.load(source)
+
+    if profile.get('version') != PROFILE_VERSION:
+        raise ValueError('Unsupported timeout profile version: {}'.format(profile.get('version')))
+
+    _PROFILE.clear()
+    _PROFILE.update(profile)
+
+    return profile
+
+
+def timeout_for(locator, kind, timeout=None):
+    """Returns the timeout a wait uses
+
+    An explicit timeout wins. Otherwise the profile's timeout for the locator and kind, then the profile's default,
+    then 30 seconds. Inside a :func:`deadline` the timeout never exceeds the budget left.
+
+    :param str locator: Locator path
+    :param str kind: 'present', 'appears' or 'disappears'
+    :param timeout: Timeout given by the caller, or None
+    :return: Timeout in seconds
+    :rtype: float
+    """
+
+    if _is_number(timeout):
+        seconds = timeout
+
+    else:
+        profiled = _PROFILE.get('timeouts', {}).get(locator, {}).get(kind)
+        seconds = profiled if profiled is not None else _PROFILE.get('default', DEFAULT_TIMEOUT)
+
+    left = remaining()
+
+    return seconds if left is None else min(seconds, left)
+
+
+def kind_of(expected_condition):
+    """Returns the wait kind for an expected condition: 'present', 'appears', 'disappears' or the condition's name
+
+    :param expected_condition: Selenium expected condition factory
+    :return: Wait kind
+    :rtype: str
+    """
+
+    return KINDS.get(expected_condition) or getattr(expected_condition, '__name__', 'condition')
+
+
+def _check(web_driver, expected_condition, locator, kind):
+
+    # XPath locators are checked in the browser, so a missing element does not block for the implicit wait
+    if kind in STATES and locator[0] == By.XPATH:
+
+        try:
+            return web_driver.execute_script(scripts.ELEMENT_STATES, [locator[1]])[0] in STATES[kind]
+
+        except WebDriverException:
+            return MISSING in STATES[kind]
+
+    try:
+        return bool(expected_condition(locator)(web_driver))
+
+    except (NoSuchElementException, StaleElementReferenceException):
+        return False
+
+
+def _record(entry):
+
+    if _RECORDERS:
+
+        with _LOCK:
+            for recorder in _RECORDERS:
+                recorder.add(entry)
+
+
+def _state(web_element):
+
+    try:
+        return DISPLAYED if web_element.is_displayed() else HIDDEN
+
+    except WebDriverException:
+        return MISSING
+
+
+def _states(web_driver, elements):
+
+    # Locators are checked together in the browser, elements wrapping a WebElement one by one
+    xpaths = [element.search_term[1] for element in elements if element.search_term[0] != 'element']
+
+    try:
+        states = iter(web_driver.execute_script(scripts.ELEMENT_STATES, xpaths) if xpaths else [])
+
+    except WebDriverException:
+        states = iter([MISSING] * len(xpaths))
+
+    return [_state(element.search_term[1]) if element.search_term[0] == 'element' else next(states)
+            for element in elements]
+
+
+def _wait_many(elements, condition, timeout, any_met):
+
+    keys = sorted(elements) if isinstance(elements, dict) else None
+    items = [elements[key] for key in keys] if keys is not None else list(elements)
+    kind = condition if condition in STATES else KINDS.get(condition)
+
+    if kind is None:
+        raise ValueError('Cannot wait for {!r} on several elements. Use {}'.format(
+            condition, ', '.join(sorted(STATES))))
+
+    if not items:
+        return {} if keys is not None else []
+
+    web_driver = items[0].driver
+    locators = [repr(element) if element.search_term[0] == 'element' else element.search_term[1] for element in items]
+    timeouts = [timeout_for(locator, kind, timeout) for locator in locators]
+    met_at = [None] * len(items)
+    start = time.time()
+
+    # Waiting implies the page is expected to change
+    dom_cache(web_driver).invalidate()
+
+    with instrument.scope('wait_any' if any_met else 'wait_all', kind=kind, elements=len(items)):
+
+        while True:
+
+            states = _states(web_driver, items)
+            elapsed = time.time() - start
+
+            for index, state in enumerate(states):
+                if met_at[index] is None and state in STATES[kind]:
+                    met_at[index] = elapsed
+
+            # Elements still worth polling for: not met yet and within their own timeout
+            pending = [seconds - elapsed for seconds, at in zip(timeouts, met_at) if at is None and elapsed < seconds]
+
+            if not pending or (any_met and any(at is not None for at in met_at)):
+                break
+
+            time.sleep(min(POLL_FREQUENCY, max(pending)))
+
+    end = time.time() - start
+    results = []
+
+    for locator, seconds, at in zip(locators, timeouts, met_at):
+
+        entry = Wait(locator, kind, seconds, start, at if at is not None else min(end, seconds), at is not None)
+        results.append(entry)
+        _record(entry)
+
+    return dict(zip(keys, results)) if keys is not None else results
+
+
+def wait_all(elements, condition='appears', timeout=None):
+    """Wait until every element meets a condition, checking all of them in one script per poll
+
+    Each element gives up after its own timeout (explicit, profiled or 30 seconds, never beyond a :func:`deadline`), so
+    the whole wait lasts as long as the slowest element instead of the sum of them.
+
+    .. code-block:: python
+
+        results = sda.wait_all([page.header, page.results, page.footer])
+
+        if not all(result.met for result in results):
+            ...
+
+    :param elements: List of elements, or dictionary of name to element, ex. Page.elements(). Elements must share a
+        web driver
+    :param condition: 'present', 'appears', 'disappears', or the matching Selenium expected condition factory
+    :param timeout: Timeout in seconds, or None to use the profile per element
+    :return: One :class:`Wait` per element, in the same list order or under the same names
+    :rtype: list or dict
+    :raises ValueError: If the condition cannot be checked in the browser
+    """
+
+    return _wait_many(elements, condition, timeout, False)
+
+
+def wait_any(elements, condition='appears', timeout=None):
+    """Wait until at least one element meets a condition, checking all of them in one script per poll
+
+    .. code-block:: python
+
+        errors = sda.wait_any({'banner': page.error_banner, 'toast': page.error_toast}, timeout=5)
+        shown = [name for name, result in errors.items() if result.met]
+
+    :param elements: List of elements, or dictionary of name to element. Elements must share a web driver
+    :param condition: 'present', 'appears', 'disappears', or the matching Selenium expected condition factory
+    :param timeout: Timeout in seconds, or None to use the profile per element
+    :return: One :class:`Wait` per element, in the same list order or under the same names. Every element met by the
+        poll that ended the wait is marked met
+    :rtype: list or dict
+    :raises ValueError: If the condition cannot be checked in the browser
+    """
+
+    return _wait_many(elements, condition, timeout, True)
+
+
+def wait_until(web_driver, expected_condition, locator, timeout=None):
+    """Wait for an expected condition on a locator, recording the wait
+
+    :param WebDriver web_driver: Selenium web driver
+    :param expected_condition: Selenium expected condition factory, ex. ec.visibility_of_element_located
+    :param tuple locator: Selenium locator
+    :param timeout: Timeout in seconds, or None to use the profile
+    :return: True, if the condition was met before the timeout
+    :rtype: bool
+    """
+
+    kind = kind_of(expected_condition)
+    seconds = timeout_for(locator[1], kind, timeout)
+    start = time.time()
+
+    try:
+
+        # A spent budget gets one check, without WebDriverWait's poll interval
+        if seconds <= 0:
+            met = _check(web_driver, expected_condition, locator, kind)
+
+        else:
+            WebDriverWait(web_driver, seconds).until(expected_condition(locator))
+            met = True
+
+    except (NoSuchElementException, TimeoutException):
+        met = False
+
+    if _RECORDERS:
+        _record(Wait(locator[1], kind, seconds, start, time.time() - start, met))
+
+    return met
+
+
+class WaitStats(object):
+    """The WaitStats implementation
+
+    Collected waits, with per-locator histograms and timeout recommendations.
+    """
+
+    def __init__(self):
+
+        self.waits = []
+
+    def add(self, entry):
+        """Add a finished wait
+
+        :param Wait entry: Wait
+        :return:
+        """
+
+        self.waits.append(entry)
+
+    def by_locator(self):
+        """Returns the waits grouped by locator and kind
+
+        :return: (locator, kind) to waits
+        :rtype: dict
+        """
+
+        groups = defaultdict(list)
+
+        for entry in self.waits:
+            groups[(entry.locator, entry.kind)].append(entry)
+
+        return dict(groups)
+
+    def histograms(self, bounds=HISTOGRAM_BOUNDS):
+        """Returns wait duration histograms per locator and kind
+
+        :param tuple bounds: Upper bucket bounds in seconds. A last, open bucket catches the rest
+        :return: (locator, kind) to {'buckets': [counts], 'met': int, 'timed_out': int}
+        :rtype: dict
+        """
+
+        histograms = {}
+
+        for key, entries in self.by_locator().items():
+
+            buckets = [0] * (len(bounds) + 1)
+
+            for entry in entries:
+                buckets[next((i for i, bound in enumerate(bounds) if entry.duration <= bound), len(bounds))] += 1
+
+            met = sum(1 for entry in entries if entry.met)
+            histograms[key] = {'buckets': buckets, 'met': met, 'timed_out': len(entries) - met}
+
+        return histograms
+
+    def recommend(self, margin=DEFAULT_MARGIN, rank=99, minimum=MINIMUM_TIMEOUT, maximum=DEFAULT_TIMEOUT):
+        """Recommend a timeout per locator and kind: the percentile of waits that succeeded, times a margin
+
+        Locators without a single successful wait keep the default and are left out.
+
+        :param float margin: Safety factor applied to the percentile
+        :param int rank: Percentile of successful wait durations
+        :param float minimum: Smallest timeout to recommend
+        :param float maximum: Largest timeout to recommend
+        :return: locator to {kind: seconds}
+        :rtype: dict
+        """
+
+        timeouts = defaultdict(dict)
+
+        for (locator, kind), entries in self.by_locator().items():
+
+            durations = [entry.duration for entry in entries if entry.met]
+
+            if durations:
+
+                # Round up to a tenth of a second
+                seconds = math.ceil(percentile(durations, rank) * margin * 10) / 10.0
+                timeouts[locator][kind] = min(maximum, max(minimum, seconds))
+
+        return dict(timeouts)
+
+    def profile(self, margin=DEFAULT_MARGIN, rank=99, minimum=MINIMUM_TIMEOUT, default=DEFAULT_TIMEOUT):
+        """Returns a timeout profile for :func:`load_profile`
+
+        :param float margin: Safety factor applied to the percentile
+        :param int rank: Percentile of successful wait durations
+        :param float minimum: Smallest timeout to recommend
+        :param float default: Timeout for locators the profile does not know
+        :return: Profile
+        :rtype: dict
+        """
+
+        return {'version': PROFILE_VERSION, 'margin': margin, 'percentile': rank, 'default': default,
+                'timeouts': self.recommend(margin, rank, minimum, default)}
+
+    def report(self, bounds=HISTOGRAM_BOUNDS):
+        """Returns a text table of wait histograms and recommendations, slowest locators first
+
+        :param tuple bounds: Upper bucket bounds in seconds
+        :return: Table
+        :rtype: str
+        """
+
+        histograms = self.histograms(bounds)
+
+        if not histograms:
+            return ''
+
+        recommended = self.recommend()
+        worst = dict((key, max(entry.duration for entry in entries)) for key, entries in self.by_locator().items())
+        header = ['<={}s'.format(bound) for bound in bounds] + ['>{}s'.format(bounds[-1])]
+        lines = ['  '.join(['{:>7}'.format(label) for label in header] +
+                           ['{:>5}'.format('fail'), '{:>8}'.format('suggest'), 'kind', 'locator'])]
+
+        for key in sorted(histograms, key=lambda k: -worst[k]):
+
+            locator, kind = key
+            suggestion = recommended.get(locator, {}).get(kind)
+            lines.append('  '.join(['{:>7}'.format(count) for count in histograms[key]['buckets']] +
+                                   ['{:>5}'.format(histograms[key]['timed_out']),
+                                    '{:>8}'.format('{}s'.format(suggestion) if suggestion is not None else '-'),
+                                    kind, locator]))
+
+        return '\n'.join(lines)
+
+    def save_profile(self, path, margin=DEFAULT_MARGIN, rank=99, minimum=MINIMUM_TIMEOUT, default=DEFAULT_TIMEOUT):
+        """Write a timeout profile for :func:`load_profile`
+
+        :param str path: Output file
+        :param float margin: Safety factor applied to the percentile
+        :param int rank: Percentile of successful wait durations
+        :param float minimum: Smallest timeout to recommend
+        :param float default: Timeout for locators the profile does not know
+        :return: Profile
+        :rtype: dict
+        """
+
+        profile = self.profile(margin, rank, minimum, default)
+
+        with open(path, 'w') as output:
+            json.dump(profile, output, indent=2, sort_keys=True)
+
+        return profile
+
+    def start(self):
+        """Start recording waits
+
+        :return: self
+        :rtype: WaitStats
+        """
+
+        with _LOCK:
+            if self not in _RECORDERS:
+                _RECORDERS.append(self)
+
+        return self
+
+    def stop(self):
+        """Stop recording waits. Recorded waits are kept
+
+        :return:
+        """
+
+        with _LOCK:
+            if self in _RECORDERS:
+                _RECORDERS.remove(self)
+
+
+@contextmanager
+def record():
+    """Record every sda wait until the block exits
+
+    :return: Wait statistics
+    :rtype: WaitStats
+    """
+
+    stats = WaitStats().start()
+
+    try:
+        yield stats
+
+    finally:
+        stats.stop()
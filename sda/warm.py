@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""sda.warm
+
+Browser sessions take seconds to start. :class:`WarmSessions` keeps ``idle`` sessions booting or booted on background
+threads, hands a ready one out on :meth:`WarmSessions.checkout` and starts its replacement right away. While the
+first browsers boot, :func:`precompile` builds every Locators, Page and Site class once, so the CSS selectors they use
+are converted to xpath before the first test needs them.
+
+.. code-block:: python
+
+    from selenium import webdriver
+    from sda.warm import WarmSessions
+
+    warm = WarmSessions(webdriver.Chrome, idle=3).start()
+
+    with warm.session() as driver:
+        ExampleSite(driver).home.navigate_to()
+
+    # Or feed a DriverPool, which then starts from already booted sessions
+    pool = DriverPool(warm.checkout, size=4)
+
+.. codeauthor:: John Lane <jlane@fanthreesixty.com>
+
+"""
+
+from contextlib import contextmanager
+import re
+import threading
+import time
+from selenium.webdriver.remote.webdriver import WebDriver
+from sda.browserless import OfflineExecutor
+from sda.element import normalize
+from sda.locators import Locators
+from sda.page import Page, url_pattern
+from sda.pool import PoolTimeout
+from sda.site import Site
+
+try:
+    from Queue import Empty, Queue
+except (ImportError, ModuleNotFoundError):
+    from queue import Empty, Queue
+
+__all__ = ['WarmSessions', 'precompile']
+
+DEFAULT_IDLE = 2
+
+
+def _subclasses(cls):
+
+    found = []
+    pending = list(cls.__subclasses__())
+
+    while pending:
+
+        subclass = pending.pop()
+
+        if subclass not in found:
+            found.append(subclass)
+            pending.extend(subclass.__subclasses__())
+
+    return sorted(found, key=lambda item: (item.__module__, item.__name__))
+
+
+def precompile(classes=None):
+    """Build every Locators, Page and Site class once, converting the locators they use ahead of time
+
+    Locators classes are instantiated and each locator normalized. Page and Site classes are built with a driver that
+    never loads a page, which runs their constructors (and so every element's normalization) and compiles their URL
+    patterns. Classes whose constructor needs more than a driver, or fails without a page, are skipped.
+
+    :param list classes: Classes to build. Defaults to every imported subclass of Locators, Page and Site
+    :return: Counts of 'locators' and 'pages' built, and the names of the classes 'skipped'
+    :rtype: dict
+    """
+
+    if classes is None:
+        classes = _subclasses(Locators) + _subclasses(Page) + _subclasses(Site)
+
+    summary = {'locators': 0, 'pages': 0, 'skipped': []}
+    web_driver = None
+
+    for cls in classes:
+
+        try:
+
+            if issubclass(cls, Locators):
+
+                for locator in cls().as_dict().values():
+                    normalize(*locator)
+
+                summary['locators'] += 1
+                continue
+
+            if web_driver is None:
+                web_driver = WebDriver(command_executor=OfflineExecutor(), desired_capabilities={})
+
+            instance = cls(web_driver)
+            path = getattr(instance, '_url_path', None)
+
+            if path is not None:
+                re.compile(url_pattern(path))
+
+            summary['pages'] += 1
+
+        except Exception:
+            summary['skipped'].append('{}.{}'.format(cls.__module__, cls.__name__))
+
+    return summary
+
+
+class WarmSessions(object):
+    """The WarmSessions implementation
+
+    Keeps ``idle`` sessions booted or booting in the background. Checked out sessions are the caller's; hand them back
+    with :meth:`release` to have them quit in the background.
+    """
+
+    def __init__(self, factory, idle=DEFAULT_IDLE, precompile_classes=True):
+        """Warm session manager. Nothing starts before :meth:`start`
+
+        :param factory: Callable returning a new Selenium web driver
+        :param int idle: Sessions to keep ready
+        :param precompile_classes: True to precompile every imported Locators, Page and Site class while the sessions
+            boot, a list of classes to precompile only those, or False
+        """
+
+        self.factory = factory
+        self.idle = idle
+        self.precompile_classes = precompile_classes
+        self.boot_times = []
+        self.wait_times = []
+        self.compiled = None
+
+        self._ready = Queue()
+        self._lock = threading.Lock()
+        self._booting = 0
+        self._failed = 0
+        self._running = False
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def ready(self):
+        """Returns the number of booted sessions waiting to be checked out. Failed boots are not counted
+
+        :rtype: int
+        """
+
+        # A checkout may have taken a failed boot and not yet uncounted it
+        with self._lock:
+            return max(self._ready.qsize() - self._failed, 0)
+
+    def checkout(self, timeout=None):
+        """Take a booted session, waiting for one if none is ready, and start booting its replacement
+
+        :param float timeout: Seconds to wait, or None to wait forever
+        :return: Selenium web driver
+        :rtype: WebDriver
+        :raises PoolTimeout: If no session booted before the timeout
+        :raises Exception: Whatever the factory raised when booting the session this checkout would have received
+        """
+
+        if not self._running:
+            raise RuntimeError('Warm sessions are not running')
+
+        start = time.time()
+
+        # Covers boots that failed without a checkout to replace them
+        self._refill()
+
+        try:
+            web_driver = self._ready.get(timeout=timeout)
+
+        except Empty:
+            raise PoolTimeout('No session booted within {} seconds'.format(timeout))
+
+        with self._lock:
+
+            self.wait_times.append(time.time() - start)
+
+            if isinstance(web_driver, Exception):
+                self._failed -= 1
+
+        self._refill()
+
+        if isinstance(web_driver, Exception):
+            raise web_driver
+
+        return web_driver
+
+    def close(self):
+        """Stop booting sessions and quit the ones ready. Sessions still booting are quit once they are up
+
+        :return:
+        """
+
+        self._running = False
+
+        while True:
+
+            try:
+                web_driver = self._ready.get_nowait()
+
+            except Empty:
+                break
+
+            if isinstance(web_driver, Exception):
+
+                with self._lock:
+                    self._failed -= 1
+
+            else:
+                _quit(web_driver)
+
+    def join(self, timeout=None):
+        """Wait for the sessions booting and the precompile to finish
+
+        :param float timeout: Seconds to wait per thread, or None to wait forever
+        :return:
+        """
+
+        with self._lock:
+            threads = list(self._threads)
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def release(self, web_driver):
+        """Quit a checked out session in the background
+
+        :param WebDriver web_driver: Session from :meth:`checkout`
+        :return:
+        """
+
+        self._spawn(_quit, web_driver)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Check a session out for the block and release it afterwards
+
+        :param float timeout: Seconds to wait for a session, or None to wait forever
+        :return: Selenium web driver
+        :rtype: WebDriver
+        """
+
+        web_driver = self.checkout(timeout)
+
+        try:
+            yield web_driver
+
+        finally:
+            self.release(web_driver)
+
+    def start(self):
+        """Start booting sessions, and precompiling page objects alongside
+
+        :return: self
+        :rtype: WarmSessions
+        """
+
+        self._running = True
+        self._refill()
+
+        if self.precompile_classes:
+            self._spawn(self._precompile)
+
+        return self
+
+    def _boot(self):
+
+        start = time.time()
+
+        try:
+            web_driver = self.factory()
+
+        except Exception as error:
+
+            # Handed to the checkout that would have received the session
+            web_driver = error
+
+        with self._lock:
+
+            self._booting -= 1
+
+            if not isinstance(web_driver, Exception):
+                self.boot_times.append(time.time() - start)
+
+            # Counted and queued together, so ready never counts the failure
+            queued = self._running
+
+            if queued:
+
+                self._failed += isinstance(web_driver, Exception)
+                self._ready.put(web_driver)
+
+        if not queued and not isinstance(web_driver, Exception):
+            _quit(web_driver)
+
+    def _precompile(self):
+
+        classes = self.precompile_classes if isinstance(self.precompile_classes, (list, tuple)) else None
+        self.compiled = precompile(classes)
+
+    def _refill(self):
+
+        with self._lock:
+
+            missing = self.idle - self._ready.qsize() - self._booting if self._running else 0
+            self._booting += max(0, missing)
+
+        for _ in range(missing):
+            self._spawn(self._boot)
+
+    def _spawn(self, target, *args):
+
+        thread = threading.Thread(target=target, args=args, name='sda-warm')
+        thread.daemon = True
+
+        with self._lock:
+            self._threads = [item for item in self._threads if item.is_alive()] + [thread]
+
+        thread.start()
+
+
+def _quit(web_driver):
+
+    # Quitting a session that is already gone is not an error here
+    try:
+        web_driver.quit()
+
+    except Exception:
+        pass
@@ -11,7 +11,7 @@ from sda import __author__, __email__, __license__, __version__
 setup(
     name='sda',
     version=__version__,
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     scripts=[],
     description='A wrapper for Selenium. This library uses custom data attributes to accelerate '
                 'testing through the Selenium framework',
@@ -20,7 +20,8 @@ setup(
     url='https://github.com/jlane9/selenium-data-attributes',
     download_url='https://github.com/jlane9/selenium-data-attributes/tarball/{}'.format(__version__),
     keywords='testing selenium qa web automation',
-    install_requires=['lxml', 'cssselect'],
+    install_requires=['lxml', 'cssselect', 'urllib3', 'futures; python_version < "3"'],
+    entry_points={'pytest11': ['sda = sda.pytest_plugin']},
     license=__license__,
     classifiers=['Development Status :: 5 - Production/Stable',
                  'Intended Audience :: Developers',
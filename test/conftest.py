@@ -0,0 +1,4 @@
+import sys
+
+# sda.aio is written with async/await, which is a syntax error before Python 3.5
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 5) else []
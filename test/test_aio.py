@@ -0,0 +1,65 @@
+import asyncio
+from selenium.webdriver.common.by import By
+from sda import aio
+from benchmarks.fakedriver import BASE_URL
+from benchmarks.server import StandInServer
+
+
+def run(coroutine):
+    """Run a coroutine on a new event loop. asyncio.run is only available from Python 3.7
+
+    :param coroutine: Coroutine
+    :return: Coroutine result
+    """
+
+    loop = asyncio.new_event_loop()
+
+    try:
+        return loop.run_until_complete(coroutine)
+
+    finally:
+        loop.close()
+
+
+class TestAsyncDriver(object):
+    """
+    """
+
+    def test_aio(self):
+
+        async def journey(pool):
+
+            async with aio.AsyncWebDriver(pool, {'browserName': 'standin'}) as driver:
+
+                await driver.get(BASE_URL + '/')
+                header = aio.structures.Text(driver, By.XPATH, '//*[@data-qa-id="header"]')
+                banner = aio.structures.Text(driver, By.XPATH, '//*[@data-qa-id="banner"]')
+                username = aio.structures.InputText(driver, By.XPATH, '//*[@id="username"]')
+
+                found = await driver.find_elements(By.XPATH, '//h1')
+                assert len(found) == 1 and isinstance(found[0], aio.AsyncWebElement)
+                assert await header.text() == 'Example Domain'
+
+                # The element goes to the script as an argument
+                assert await username.set_value('jane')
+                assert await username.value() == 'jane'
+
+                assert await header.wait_until_appears(1)
+                assert not await banner.wait_until_appears(0.1)
+
+        # The stand-in sends element references with the W3C key only, in chunked responses
+        with StandInServer(chunked=True) as server:
+
+            pool = aio.ConnectionPool(server.url, maxsize=1)
+
+            try:
+
+                run(journey(pool))
+                assert pool.opened == 1 and pool.requests > 1 and pool.idle == 1
+
+                # Connections and the maxsize limit are kept per event loop
+                run(journey(pool))
+                assert pool.opened == 2
+
+            finally:
+                pool.close()
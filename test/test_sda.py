@@ -1,5 +1,22 @@
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import json
+import os
+import pickle
+import time
+import weakref
+import pytest
 from selenium.webdriver.common.by import By
-from sda import Locators, Page, Site, structures
+from sda import Locators, Page, Site, affinity, deadline, metrics, structures, trace, wait_all, wait_any, waits
+from sda.broker import SessionBroker
+from sda.browserless import BrowserlessDriver
+from sda.definition import PageDef, define
+from sda.monitor import Monitor, step
+from sda.pool import DriverPool, PoolTimeout
+from sda.replay import ReplayDriver, record
+from sda.state import StateCache
+from sda.warm import WarmSessions
+from benchmarks.fakedriver import BASE_URL, FakeWebDriver
 
 
 class ExampleLocators(Locators):
@@ -136,3 +153,439 @@ class TestExampleSite(object):
         site.driver.get('https://example.com/')
 
         assert str(site.example.header.parent().tag_name) == 'div'
+
+    def test_exists_ignores_implicit_wait(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+        site.wait_implicitly(10)
+
+        missing = structures.Text(selenium, By.XPATH, '//*[@id="missing"]')
+        start = time.time()
+
+        assert missing.exists() is False
+        assert time.time() - start < 5
+
+    def test_dom_cache(self):
+
+        driver = FakeWebDriver()
+        driver.get(BASE_URL + '/')
+        page = ExamplePage(driver)
+
+        assert page.header.text() == 'Example Domain'
+        generation = page.cache.generation
+
+        # A hit costs only the generation read
+        driver.reset_counts()
+        assert page.header.text() == 'Example Domain'
+        assert driver.round_trips == 1
+
+        # The page changed without sda knowing: the new generation drops the cached text
+        driver.find_element(By.XPATH, '//h1').click()
+        driver.reset_counts()
+        assert page.header.text() == 'Example Domain'
+        assert page.cache.generation != generation and driver.round_trips == 2
+
+    def test_dom_cache_release(self):
+
+        driver = FakeWebDriver()
+        driver.get(BASE_URL + '/')
+        assert ExamplePage(driver).header.text() == 'Example Domain'
+
+        # The cached element refers back to the driver, which must not keep it alive
+        reference = weakref.ref(driver)
+        driver.quit()
+        del driver
+        gc.collect()
+
+        assert reference() is None
+
+    def test_attribute_cache(self):
+
+        driver = FakeWebDriver()
+        driver.get(BASE_URL + '/')
+        page = ExamplePage(driver)
+
+        with page.cache.hold():
+
+            assert page.link.data_qa_id == 'link'
+            assert page.header.text() == 'Example Domain'
+
+            # Every attribute came back with the first read, and the held generation is never read again
+            driver.reset_counts()
+            assert page.link.data_qa_model == 'link' and page.link.data_qa_id == 'link'
+            assert page.header.text() == 'Example Domain'
+            assert driver.round_trips == 0
+
+    def test_computed_styles(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+
+        styles = site.example.computed_styles(['display', 'color'])
+
+        assert sorted(styles) == ['header', 'link', 'text']
+        assert styles['header'] == site.example.header.css_properties(['display', 'color'])
+
+    def test_layout(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+
+        layout = site.example.layout()
+
+        assert layout['header']['displayed'] is True
+        assert layout['header']['in_viewport'] is True
+        assert site.example.layout(table=True).splitlines()[0].startswith('name')
+
+    def test_browserless(self):
+
+        # Sent as UTF-8 bytes with the charset in the Content-Type header only
+        page = '<html><body><h1>caf\u00e9 na\u00efve</h1><p>Text</p><p><a href="/">Link</a></p></body></html>'
+        site = ExampleSite(FakeWebDriver({'/': page}))
+        site.driver.get(BASE_URL + '/')
+
+        assert site.driver.command_executor.status == 200
+        assert site.example.header.text() == 'caf\u00e9 na\u00efve'
+        assert site.example.link.exists()
+
+        site.driver.quit()
+
+    def test_record_replay(self, selenium, tmpdir):
+
+        path = str(tmpdir.join('example.sda.gz'))
+        site = ExampleSite(selenium)
+
+        with record(selenium, path):
+            site.driver.get('https://example.com/')
+            header = site.example.header.text()
+
+        replay = ExampleSite(ReplayDriver(path))
+        replay.driver.get('https://example.com/')
+
+        assert replay.example.header.text() == header
+        assert replay.driver.command_executor.remaining == 0
+
+    def test_metrics(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+
+        with metrics.collect(selenium) as stats:
+            site.example.header.text()
+
+        assert stats.methods['TextMixin.text']['calls'] == 1
+        assert stats.methods['TextMixin.text']['commands'] >= 1
+        assert site.example.header.search_term[1] in stats.locators
+
+    def test_trace(self, selenium):
+
+        site = ExampleSite(selenium)
+
+        with trace.record(selenium) as tracer:
+            with trace.span('example'):
+                site.driver.get('https://example.com/')
+                site.example.header.text()
+
+        names = [event['name'] for event in tracer.chrome_trace()['traceEvents']]
+
+        assert names[0] == 'example'
+        assert 'TextMixin.text' in names
+        assert len(set(span['traceId'] for span in tracer.otlp()['resourceSpans'][0]['scopeSpans'][0]['spans'])) == 1
+
+    def test_wait_profile(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+
+        with waits.record() as stats:
+            assert site.example.header.wait_until_appears()
+
+        profile = stats.profile(margin=2.0)
+        locator = site.example.header.search_term[1]
+
+        assert profile['timeouts'][locator]['appears'] >= waits.MINIMUM_TIMEOUT
+
+        waits.load_profile(profile)
+
+        try:
+            assert waits.timeout_for(locator, 'appears') == profile['timeouts'][locator]['appears']
+            assert waits.timeout_for(locator, 'appears', 5) == 5
+
+        finally:
+            waits.clear_profile()
+
+    def test_deadline(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+        missing = structures.Text(selenium, By.XPATH, '//*[@data-qa-id="missing"]')
+
+        start = time.time()
+
+        with deadline(2):
+            assert missing.wait_until_present(timeout=30) is False
+            assert missing.wait_until_present(timeout=30) is False
+
+        assert time.time() - start < 10
+
+    def test_deadline_page_load(self):
+
+        driver = FakeWebDriver()
+        driver.get(BASE_URL + '/')
+        driver.set_page_load_timeout(60)
+        missing = structures.Text(driver, By.XPATH, '//*[@data-qa-id="missing"]')
+
+        with deadline(5):
+
+            waits.limit_page_load(driver)
+            assert waits.page_load_timeout(driver) == 5
+
+        assert waits.page_load_timeout(driver) == 60
+
+        # A spent budget checks once, in the browser
+        with deadline(0.001):
+
+            time.sleep(0.01)
+            driver.reset_counts()
+
+            assert missing.wait_until_present() is False
+            assert missing.wait_until_disappears() is True
+            assert driver.round_trips == 2
+
+    def test_wait_all(self, selenium):
+
+        site = ExampleSite(selenium)
+        site.driver.get('https://example.com/')
+        header = structures.Text(selenium, By.XPATH, '//h1')
+        missing = structures.Text(selenium, By.XPATH, '//*[@data-qa-id="missing"]')
+
+        results = wait_all({'header': header, 'missing': missing}, timeout=2)
+        assert results['header'].met and not results['missing'].met
+
+        start = time.time()
+        assert [result.met for result in wait_any([missing, header], timeout=30)] == [False, True]
+        assert time.time() - start < 10
+
+    def test_driver_pool(self):
+
+        def journey(site, path):
+            site.driver.get(BASE_URL + path)
+            return site.example.header.text()
+
+        with DriverPool(FakeWebDriver, size=2) as pool:
+
+            assert pool.map(journey, ['/', '/'], site=ExampleSite) == ['Example Domain', 'Example Domain']
+            assert pool.idle == 2 and pool.created == 2
+
+        # The replacement for a failed session cannot be created, so the waiting checkout creates it
+        factories = iter([FakeWebDriver, None, FakeWebDriver])
+
+        with DriverPool(lambda: next(factories)(), size=1) as pool:
+
+            web_driver = pool.checkout()
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+
+                waiting = executor.submit(pool.checkout, 5)
+                time.sleep(0.05)
+                pool.checkin(web_driver, failed=True)
+
+                assert waiting.result() is not web_driver
+
+            assert pool.created == 2 and pool.recycled == 1 and pool.idle == 0
+
+        # The second session cannot be started, so the first is quit
+        started = []
+        factories = iter([FakeWebDriver, None])
+
+        def factory():
+            started.append(next(factories)())
+            return started[-1]
+
+        with pytest.raises(TypeError):
+
+            with DriverPool(factory, size=2):
+                pass
+
+        assert started[0].commands['quit'] == 1
+
+    def test_warm_sessions(self):
+
+        with WarmSessions(FakeWebDriver, idle=2, precompile_classes=[ExampleSite]) as warm:
+
+            with warm.session(timeout=30) as driver:
+
+                driver.get(BASE_URL + '/')
+                assert ExampleSite(driver).example.header.text() == 'Example Domain'
+
+            warm.join(30)
+            assert warm.ready == 2 and warm.compiled['pages'] == 1
+
+        # A failed boot is handed to the next checkout, and is not a ready session
+        factories = iter([None, FakeWebDriver])
+
+        with WarmSessions(lambda: next(factories)(), idle=1, precompile_classes=False) as warm:
+
+            warm.join(30)
+            assert warm.ready == 0
+
+            with pytest.raises(TypeError):
+                warm.checkout(30)
+
+            warm.join(30)
+            assert warm.ready == 1
+
+    def test_saved_state(self, selenium, tmpdir):
+
+        def login(site):
+            site.driver.get('https://example.com/')
+            site.driver.add_cookie({'name': 'session', 'value': 'abc'})
+
+        ExampleSite.state_cache = StateCache(str(tmpdir), ttl=60)
+
+        try:
+            assert ExampleSite(selenium).ensure_state('example', login) is False
+
+            selenium.delete_all_cookies()
+            assert ExampleSite(selenium).ensure_state('example', login) is True
+            assert selenium.get_cookie('session')['value'] == 'abc'
+
+        finally:
+            ExampleSite.state_cache = None
+
+    def test_state_permissions(self, tmpdir):
+
+        cache = StateCache(str(tmpdir.join('state')), ttl=60)
+        path = cache.save('example', {BASE_URL: {'cookies': [], 'local': {}, 'session': {}}})
+
+        assert cache.load('example') is not None
+
+        # Readable by others
+        os.chmod(path, 0o644)
+        assert cache.load('example') is None
+
+        # Writable by others
+        os.chmod(path, 0o600)
+        os.chmod(cache.directory, 0o777)
+        assert cache.load('example') is None
+
+    def test_crawl(self, tmpdir):
+
+        path = str(tmpdir.join('crawl.jsonl'))
+        site = ExampleSite(FakeWebDriver())
+
+        summary = site.crawl({'example': None}, workers=2, pool=FakeWebDriver, output=path, base_url=BASE_URL)
+
+        with open(path) as results:
+            result = json.loads(results.readline())
+
+        assert summary['pages'] == summary['ok'] == 1
+        assert result['url'] == BASE_URL + '/' and result['missing'] == []
+
+        # Every driver is taken, so each visit times out waiting. Parameters that are not JSON are written as repr
+        with DriverPool(FakeWebDriver, size=1) as pool:
+
+            with pool.lease():
+                summary = site.crawl({'example': [(object(),), ()]}, pool=pool, output=path, base_url=BASE_URL,
+                                     timeout=0.01)
+
+        with open(path) as results:
+            results = [json.loads(line) for line in results]
+
+        assert summary['pages'] == summary['error'] == 2
+        assert all(result['status'] == 'error' and result['error'].startswith('PoolTimeout') for result in results)
+        assert sorted(len(result['params']) for result in results) == [0, 1]
+
+    def test_monitor(self):
+
+        def journey(site):
+            with step('open'):
+                site.driver.get(BASE_URL + '/')
+
+            assert site.example.header.text() == 'Example Domain'
+
+        monitor = Monitor(FakeWebDriver, size=1, site=ExampleSite, checkout_timeout=0.1)
+        monitor.add('example', journey, every=60, deadline=30)
+
+        try:
+            assert monitor.run_once('example') == 'success'
+
+            # The only session is taken, so the run gets none in time
+            with monitor.pool.lease():
+                assert monitor.run_once('example') == 'timeout'
+
+        finally:
+            monitor.stop()
+
+        assert 'sda_journey_runs_total{journey="example",result="success"} 1' in monitor.render()
+        assert 'sda_journey_runs_total{journey="example",result="timeout"} 1' in monitor.render()
+        assert 'sda_journey_step_duration_seconds_count{journey="example",step="open"} 1' in monitor.render()
+
+    def test_affinity_order(self):
+
+        keys = ['/a', '/b', None, '/a', '/b']
+        stats = affinity.NavigationStats()
+
+        assert affinity.order(list('12345'), keys) == list('14253')
+
+        stats.navigated('/a', 2.0)
+        stats.reused('/a')
+        assert stats.saved() == 2.0
+
+        # Test items before pytest 3.6 have get_marker only
+        class Item(object):
+
+            def get_marker(self, name):
+                return pytest.mark.sda_page('/a').mark if name == affinity.MARKER else None
+
+        assert affinity.marked_page(Item()) == '/a' and affinity.target_of(Item()) == '/a'
+
+    def test_session_broker(self):
+
+        broker = SessionBroker(BrowserlessDriver, capacity=2, caps={'large': 1})
+        large = broker.acquire('large')
+        small = broker.acquire('small')
+
+        assert broker.active == {'large': 1, 'small': 1}
+
+        with pytest.raises(PoolTimeout):
+            broker.acquire('small', timeout=0.1)
+
+        broker.release(small)
+        broker.release(large)
+
+        assert not broker.active
+        assert 'sda_broker_queue_timeouts_total{suite="small"} 1' in broker.render()
+
+    def test_page_definition(self):
+
+        definition = pickle.loads(pickle.dumps(PageDef.of(ExamplePage)))
+        page = definition.bind(BrowserlessDriver())
+
+        assert isinstance(page, ExamplePage)
+        assert definition.url_path == '/'
+        assert page.header.search_term == definition.elements()['header'].search_term
+
+        # Attributes named like ElementDef's own parameters
+        element = structures.Text(BrowserlessDriver(), *ExampleLocators.HEADER)
+        element.cls, element.by, element.path = 'title', 'css', '/a'
+        bound = define(element).bind(BrowserlessDriver())
+
+        assert (bound.cls, bound.by, bound.path) == ('title', 'css', '/a')
+        assert bound.search_term == element.search_term
+
+    def test_tabs(self):
+
+        driver = FakeWebDriver(load_time=0.1)
+        driver.get(BASE_URL + '/')
+        site = ExampleSite(driver)
+
+        # Five pages through two windows: window 1 is loaded in the background while window 0 loads in place
+        with site.tabs(2) as tabs:
+            results = list(tabs.map(lambda page: page.header.text(), site.example, [()] * 5))
+
+        assert [text for _, text in results] == ['Example Domain'] * 5
+        assert tabs.stats['switches'] == 5 and tabs.stats['waits'] == 4
+        assert tabs.waits[0] < 0.05
+        assert driver.window_handles == ['main']